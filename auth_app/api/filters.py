@@ -0,0 +1,47 @@
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
+from freelancer_platform_app.search import get_match_expression
+from ..models import BusinessProfile
+from ..search import PROFILE_SEARCH_TABLE, profile_search_available
+
+
+class BusinessProfileFilter(filters.FilterSet):
+    """
+    Filter class for filtering business profiles by location.
+
+    Filters:
+        - location: Case-insensitive exact match, using the index on the lowercased location.
+    """
+    location = filters.CharFilter(method='filter_location')
+
+    def filter_location(self, queryset, name, value):
+        """
+        Compares the lowercased location, so the functional index can be used.
+        """
+        return queryset.alias(location_lower=Lower('location')).filter(location_lower=value.strip().lower())
+
+    class Meta:
+        model = BusinessProfile
+        fields = ['location']
+
+
+class BusinessProfileSearchFilter(SearchFilter):
+    """
+    Search backend for business profiles using the FTS5 search index on the description.
+
+    Every search term is matched as prefix, the ordering of the directory is kept.
+    Falls back to the LIKE-based SearchFilter on the view's search_fields if the search index is not available.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if not profile_search_available():
+            return super().filter_queryset(request, queryset, view)
+
+        match = get_match_expression(self.get_search_terms(request))
+        if not match:
+            return queryset
+
+        matches = RawSQL(f'SELECT rowid FROM {PROFILE_SEARCH_TABLE} WHERE {PROFILE_SEARCH_TABLE} MATCH %s', [match])
+        return queryset.filter(pk__in=matches)
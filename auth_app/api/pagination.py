@@ -0,0 +1,11 @@
+from freelancer_platform_app.api.pagination import KeysetPagination
+
+
+class ProfileCursorPagination(KeysetPagination):
+    """
+    Keyset pagination for the customer and business directories, ordered by (created_at, id).
+    """
+    page_size = 20
+    max_page_size = 100
+    ordering_fields = ['created_at']
+    ordering = '-created_at'
@@ -2,6 +2,35 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from ..models import CustomerProfile, BusinessProfile
 from coderr_project.utils import get_user_details
+from coderr_project.images import get_derivative_urls, get_sizes_field
+from freelancer_platform_app.models import RatingAggregate
+
+
+class DerivativesField(serializers.ReadOnlyField):
+    """
+    Read-only field returning the URLs of the resized versions of an uploaded image,
+    built from the file and its stored derivative sizes.
+    """
+
+    def __init__(self, file_field, **kwargs):
+        self.file_field = file_field
+        super().__init__(source='*', **kwargs)
+
+    def to_representation(self, instance):
+        return get_derivative_urls(
+            getattr(instance, self.file_field), getattr(instance, get_sizes_field(self.file_field)), self.context.get('request')
+        )
+
+
+class RatingField(serializers.ReadOnlyField):
+    """
+    Read-only field returning the review count, average rating and rating histogram of a business user.
+    """
+
+    def to_representation(self, value):
+        aggregate = getattr(value, 'rating_aggregate', None) or RatingAggregate()
+        return {'review_count': aggregate.review_count, 'average_rating': aggregate.average_rating, 'histogram': aggregate.histogram}
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -83,9 +112,11 @@ class CustomerProfileDetailSerializer(serializers.ModelSerializer):
     Serializer for the CustomerProfile model. Provides basic details 
     such as the user, creation timestamp, uploaded file, and type.
     """
+    file_derivatives = DerivativesField('file')
+
     class Meta:
         model = CustomerProfile
-        fields = ['user', 'created_at', 'file', 'uploaded_at', 'type']
+        fields = ['user', 'created_at', 'file', 'file_derivatives', 'uploaded_at', 'type']
 
 
 class BusinessProfileDetailSerializer(serializers.ModelSerializer):
@@ -94,9 +125,12 @@ class BusinessProfileDetailSerializer(serializers.ModelSerializer):
     the user, creation timestamp, uploaded file, business location, 
     telephone number, description, working hours, and type.
     """
+    file_derivatives = DerivativesField('file')
+    rating = RatingField(source='user')
+
     class Meta:
         model = BusinessProfile
-        fields = ['user', 'created_at', 'file', 'uploaded_at', 'location', 'tel', 'description', 'working_hours', 'type']
+        fields = ['user', 'created_at', 'file', 'file_derivatives', 'uploaded_at', 'location', 'tel', 'description', 'working_hours', 'type', 'rating']
 
 
 class CustomerProfileSerializer(serializers.ModelSerializer):
@@ -104,9 +138,11 @@ class CustomerProfileSerializer(serializers.ModelSerializer):
     Serializer for the CustomerProfile model. Customizes the representation 
     of user details based on the request method.
     """
+    file_derivatives = DerivativesField('file')
+
     class Meta:
         model = CustomerProfile
-        fields = ['user', 'created_at', 'file', 'uploaded_at', 'type']
+        fields = ['user', 'created_at', 'file', 'file_derivatives', 'uploaded_at', 'type']
 
     def to_representation(self, instance):
         """
@@ -115,9 +151,10 @@ class CustomerProfileSerializer(serializers.ModelSerializer):
         """
         representation = super().to_representation(instance)
         if self.context['request'].method == 'GET':
-            user = User.objects.get(pk=representation.pop('user'))
-            representation['user'] = get_user_details(user)
-            representation['user']['pk'] = user.id
+            # The user is loaded together with the profile (select_related)
+            representation.pop('user')
+            representation['user'] = get_user_details(instance.user)
+            representation['user']['pk'] = instance.user_id
         return representation
 
 
@@ -126,9 +163,12 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
     Serializer for the BusinessProfile model. Customizes the representation 
     of user details and other business-related fields.
     """
+    file_derivatives = DerivativesField('file')
+    rating = RatingField(source='user')
+
     class Meta:
         model = BusinessProfile
-        fields = ['user', 'created_at', 'file', 'uploaded_at', 'location', 'tel', 'description', 'working_hours', 'type']
+        fields = ['user', 'created_at', 'file', 'file_derivatives', 'uploaded_at', 'location', 'tel', 'description', 'working_hours', 'type', 'rating']
 
     def to_representation(self, instance):
         """
@@ -137,7 +177,8 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
         """
         representation = super().to_representation(instance)
         if self.context['request'].method == 'GET':
-            user = User.objects.get(pk=representation.pop('user'))
-            representation['user'] = get_user_details(user)
-            representation['user']['pk'] = user.id
+            # The user is loaded together with the profile (select_related)
+            representation.pop('user')
+            representation['user'] = get_user_details(instance.user)
+            representation['user']['pk'] = instance.user_id
         return representation
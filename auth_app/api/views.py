@@ -2,14 +2,17 @@ from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from django.contrib.auth.models import User
+from django_filters.rest_framework import DjangoFilterBackend
 from auth_app.models import BusinessProfile
 from ..models import CustomerProfile, BusinessProfile
 from .serializers import UserSerializer, RegistrationSerializer, LoginSerializer, CustomerProfileSerializer, BusinessProfileSerializer, CustomerProfileDetailSerializer, BusinessProfileDetailSerializer
-from rest_framework.authentication import TokenAuthentication
+from .filters import BusinessProfileFilter, BusinessProfileSearchFilter
+from .pagination import ProfileCursorPagination
+from coderr_project.authentication import CachedTokenAuthentication
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from coderr_project.permissions import ReadOnly
-from coderr_project.utils import create_profile, get_profile_by_user_id, get_profile_serializer
+from coderr_project.utils import create_profile, get_profile_by_user_id, get_profile_serializer, resolve_profile
+from coderr_project.conditional import make_etag, conditional_response, set_validators
 
 
 class RegistrationView(APIView):
@@ -55,7 +58,6 @@ class LoginView(APIView):
         if serializer.is_valid():
             user = serializer.save()
             token, created = Token.objects.get_or_create(user=user)
-            profile = get_profile_by_user_id(id=user.pk, customer_model=CustomerProfile, business_model=BusinessProfile)
             return Response({
                 'token': token.key,
                 'user_id': user.pk,
@@ -67,16 +69,30 @@ class LoginView(APIView):
 
 class ProfileDetailView(APIView):
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
         """ 
         Fetches user profile details, including the user's information and profile data.
+        Answers conditional requests based on the profile's upload timestamp, the user's fields and,
+        for business users, their rating aggregate with 304.
         """
         try:
-            profile = get_profile_by_user_id(id=pk, customer_model=CustomerProfile, business_model=BusinessProfile)
+            # The profile, its user and the user's rating aggregate are loaded with one query
+            profile = resolve_profile(CustomerProfile, BusinessProfile, 'rating_aggregate', pk=pk)
+            last_modified = profile.uploaded_at
             user = profile.user
+            # User changes don't touch the profile's timestamp
+            validators = [profile.type, profile.pk, profile.uploaded_at, user.username, user.first_name, user.last_name, user.email]
+            aggregate = getattr(user, 'rating_aggregate', None)
+            if profile.type == 'business' and aggregate is not None:
+                last_modified = max(last_modified, aggregate.updated_at)
+                validators += [aggregate.review_count, aggregate.rating_sum, *aggregate.histogram.values()]
+            etag = make_etag(*validators)
+            not_modified = conditional_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
 
             user_serializer = UserSerializer(user)
             profile_serializer = get_profile_serializer(
@@ -87,7 +103,7 @@ class ProfileDetailView(APIView):
 
             response_data = profile_serializer.data
             response_data.update(user_serializer.data)
-            return Response(response_data, status=status.HTTP_200_OK)
+            return set_validators(Response(response_data, status=status.HTTP_200_OK), etag, last_modified)
         except:
             return Response({'detail': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -97,7 +113,7 @@ class ProfileDetailView(APIView):
         """
         try:
             profile = get_profile_by_user_id(id=pk, customer_model=CustomerProfile, business_model=BusinessProfile)
-            user = User.objects.get(pk=pk)
+            user = profile.user
         except:
             return Response({'detail': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -122,7 +138,7 @@ class ProfileDetailView(APIView):
         if user_serializer.is_valid():
             if profile_serializer.is_valid():
                 response_data = {'email': user_serializer.data['email'], **profile_serializer.data}
-                for item in ['user', 'created_at', 'file', 'uploaded_at']:
+                for item in ['user', 'created_at', 'file', 'file_derivatives', 'uploaded_at', 'rating']:
                     if item in response_data:
                         response_data.pop(item)
                 return Response(response_data, status=status.HTTP_200_OK)
@@ -131,18 +147,32 @@ class ProfileDetailView(APIView):
 
 
 class CustomerProfileView(generics.ListAPIView):
-
-    authentication_classes = [TokenAuthentication]
+    """
+    Lists the customer profiles with their users, loaded in the same query.
+    The list is paginated with keyset pagination ordered by (created_at, id), newest first.
+    """
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [ReadOnly]
 
-    queryset = CustomerProfile.objects.all()
+    queryset = CustomerProfile.objects.select_related('user')
     serializer_class = CustomerProfileSerializer
+    pagination_class = ProfileCursorPagination
 
 
 class BusinessProfileView(generics.ListAPIView):
-
-    authentication_classes = [TokenAuthentication]
+    """
+    Lists the business profiles with their users and rating aggregates, loaded in the same query.
+    Supports filtering by location and searching the description.
+    The list is paginated with keyset pagination ordered by (created_at, id), newest first.
+    """
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [ReadOnly]
 
-    queryset = BusinessProfile.objects.all()
+    queryset = BusinessProfile.objects.select_related('user__rating_aggregate')
     serializer_class = BusinessProfileSerializer
+
+    # Enables filtering by location and searching the description
+    filter_backends = [DjangoFilterBackend, BusinessProfileSearchFilter]
+    filterset_class = BusinessProfileFilter
+    search_fields = ['description']
+    pagination_class = ProfileCursorPagination
@@ -0,0 +1,157 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+from ...models import CustomerProfile, BusinessProfile, UserRole
+
+PROFILE_MODELS = {'customer': CustomerProfile, 'business': BusinessProfile}
+
+
+class Command(BaseCommand):
+    """
+    Imports users from a CSV or NDJSON file, creating their profiles and tokens like the registration does.
+
+    Each row needs 'username', 'password' and 'type' ('customer' or 'business'), 'email', 'first_name'
+    and 'last_name' are optional. Passwords are hashed on a process pool while the previous batch is
+    inserted, every batch is written with bulk inserts in one transaction. Usernames which already exist
+    are skipped, so an interrupted import is resumed by running it again with the same file.
+    """
+    help = 'Imports users with their profiles and tokens from a CSV or NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row, or NDJSON file with one object per line.')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Format of the file, detected from the extension by default.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of users inserted per transaction.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Number of processes hashing the passwords.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'File "{path}" does not exist.')
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        workers = max(1, options['workers'] or 1)
+        self.counts = {'imported': 0, 'skipped': 0, 'invalid': 0}
+        self.seen = set()
+        self.started = time.monotonic()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            pending = None
+            for rows in self.read_batches(path, file_format, max(1, options['batch_size'])):
+                accounts = self.prepare_accounts(rows)
+                # The hashes of this batch are computed while the previous batch is inserted
+                chunksize = max(1, len(accounts) // (workers * 4))
+                hashes = pool.map(make_password, [account[2] for account in accounts], chunksize=chunksize)
+                if pending is not None:
+                    self.insert_accounts(*pending)
+                pending = (accounts, hashes)
+            if pending is not None:
+                self.insert_accounts(*pending)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.counts["imported"]} users, skipped {self.counts["skipped"]} existing '
+            f'and {self.counts["invalid"]} invalid rows.'
+        ))
+
+    def read_rows(self, path, file_format):
+        """
+        Yields the line number and data of every row of the file, the data is None for unreadable rows.
+        """
+        with open(path, newline='', encoding='utf-8') as file:
+            if file_format == 'csv':
+                reader = csv.DictReader(file)
+                for row in reader:
+                    yield reader.line_num, row
+                return
+            for line_number, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield line_number, row if isinstance(row, dict) else None
+
+    def read_batches(self, path, file_format, batch_size):
+        rows = self.read_rows(path, file_format)
+        while batch := list(islice(rows, batch_size)):
+            yield batch
+
+    def prepare_accounts(self, rows):
+        """
+        Validates the rows of a batch and drops duplicates and already imported users.
+
+        Returns:
+            - A list of (user, profile type, raw password) tuples of the users to import.
+        """
+        accounts = []
+        for line_number, row in rows:
+            error = self.validate_row(row)
+            if error:
+                self.counts['invalid'] += 1
+                self.stderr.write(f'Line {line_number}: {error}')
+                continue
+            username = row['username'].strip()
+            if username in self.seen:
+                self.counts['skipped'] += 1
+                continue
+            self.seen.add(username)
+            user = User(
+                username=username,
+                email=(row.get('email') or '').strip(),
+                first_name=(row.get('first_name') or '').strip(),
+                last_name=(row.get('last_name') or '').strip(),
+            )
+            accounts.append((user, row['type'].strip(), str(row['password'])))
+
+        existing = set(User.objects.filter(username__in=[account[0].username for account in accounts]).values_list('username', flat=True))
+        self.counts['skipped'] += len(existing)
+        return [account for account in accounts if account[0].username not in existing]
+
+    def validate_row(self, row):
+        """
+        Returns the reason why a row can't be imported, or None if it is valid.
+        """
+        if row is None:
+            return 'Unreadable row.'
+        username = str(row.get('username') or '').strip()
+        if not username or len(username) > 150:
+            return 'A username with at most 150 characters is required.'
+        if not row.get('password'):
+            return 'A password is required.'
+        if str(row.get('type') or '').strip() not in PROFILE_MODELS:
+            return 'The type must be "customer" or "business".'
+        return None
+
+    def insert_accounts(self, accounts, hashes):
+        """
+        Inserts the users of a batch with their profiles, roles and tokens in one transaction.
+        Bulk inserts send no signals, so the roles are written explicitly.
+        """
+        for (user, _, _), password in zip(accounts, hashes):
+            user.password = password
+        if not accounts:
+            return
+        try:
+            with transaction.atomic():
+                users = User.objects.bulk_create([account[0] for account in accounts])
+                for profile_type, model in PROFILE_MODELS.items():
+                    model.objects.bulk_create([model(user=user) for user, user_type, _ in accounts if user_type == profile_type])
+                UserRole.objects.bulk_create([UserRole(user=user, type=user_type) for user, user_type, _ in accounts])
+                Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in users])
+        except IntegrityError as error:
+            raise CommandError(f'Importing a batch failed ({error}), run the command again to resume the import.')
+
+        self.counts['imported'] += len(accounts)
+        rate = self.counts['imported'] / max(time.monotonic() - self.started, 0.001)
+        self.stdout.write(
+            f'Imported {self.counts["imported"]} users, skipped {self.counts["skipped"]} existing '
+            f'and {self.counts["invalid"]} invalid rows ({rate:.0f} users/s).'
+        )
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('file', models.FileField(blank=True, null=True, upload_to='uploads/avatars/')),
+                ('uploaded_at', models.DateTimeField(auto_now=True)),
+                ('location', models.CharField(blank=True, default='', max_length=50, null=True)),
+                ('tel', models.CharField(blank=True, default='', max_length=50, null=True)),
+                ('description', models.TextField(blank=True, default='', null=True)),
+                ('working_hours', models.CharField(blank=True, default='', max_length=20, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='business_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CustomerProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('file', models.FileField(blank=True, null=True, upload_to='uploads/avatars/')),
+                ('uploaded_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
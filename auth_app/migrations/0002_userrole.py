@@ -0,0 +1,34 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_user_roles(apps, schema_editor):
+    CustomerProfile = apps.get_model('auth_app', 'CustomerProfile')
+    BusinessProfile = apps.get_model('auth_app', 'BusinessProfile')
+    UserRole = apps.get_model('auth_app', 'UserRole')
+    roles = {user_id: 'business' for user_id in BusinessProfile.objects.values_list('user_id', flat=True)}
+    # The customer profile took precedence when resolving profiles before
+    roles.update({user_id: 'customer' for user_id in CustomerProfile.objects.values_list('user_id', flat=True)})
+    UserRole.objects.bulk_create([UserRole(user_id=user_id, type=type) for user_id, type in roles.items()], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('auth_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRole',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='role', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('type', models.CharField(choices=[('customer', 'customer'), ('business', 'business')], max_length=8)),
+            ],
+        ),
+        migrations.RunPython(backfill_user_roles, migrations.RunPython.noop),
+    ]
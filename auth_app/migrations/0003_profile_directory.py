@@ -0,0 +1,77 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:14
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+# The statements are inlined, the migration must not depend on the current search module
+PROFILE_SEARCH_TABLE = 'auth_app_businessprofile_search'
+
+
+def fts5_supported(connection):
+    """
+    Returns True if the database is SQLite and was compiled with the FTS5 extension.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(content)')
+            cursor.execute('DROP TABLE temp.fts5_probe')
+            return True
+        except Exception:
+            return False
+
+
+def create_business_profile_search_index(apps, schema_editor):
+    """
+    Creates the FTS5 search index for the descriptions of business profiles and fills it with all existing profiles.
+    Without FTS5 the directory search falls back to LIKE queries.
+    """
+    connection = schema_editor.connection
+    if not fts5_supported(connection):
+        return
+    BusinessProfile = apps.get_model('auth_app', 'BusinessProfile')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {PROFILE_SEARCH_TABLE} USING fts5('
+            "description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute(f'DELETE FROM {PROFILE_SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {PROFILE_SEARCH_TABLE} (rowid, description) '
+            f"SELECT id, COALESCE(description, '') FROM {BusinessProfile._meta.db_table}"
+        )
+
+
+def drop_business_profile_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {PROFILE_SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0002_userrole'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='businessprofile',
+            index=models.Index(fields=['created_at', 'id'], name='business_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='businessprofile',
+            index=models.Index(django.db.models.functions.text.Lower('location'), models.F('created_at'), models.F('id'), name='business_location_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customerprofile',
+            index=models.Index(fields=['created_at', 'id'], name='customer_created_id_idx'),
+        ),
+        migrations.RunPython(create_business_profile_search_index, drop_business_profile_search_index),
+    ]
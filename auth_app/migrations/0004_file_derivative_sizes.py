@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:09
+
+import os
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_derivative_sizes(apps, schema_editor):
+    """
+    Stores the sizes of the derivatives which were generated before their sizes were stored.
+    """
+    sizes = list(getattr(settings, 'IMAGE_DERIVATIVES', {}).get('SIZES', ['thumbnail', 'card']))
+    for model_name, field in [('CustomerProfile', 'file'), ('BusinessProfile', 'file')]:
+        model = apps.get_model('auth_app', model_name)
+        for instance in model.objects.exclude(**{field: ''}).exclude(**{field: None}).only('pk', field).iterator():
+            file = getattr(instance, field)
+            directory, filename = os.path.split(file.name)
+            available = [size for size in sizes if file.storage.exists(os.path.join(directory, 'derivatives', f'{filename}.{size}.jpg'))]
+            if available:
+                model.objects.filter(pk=instance.pk).update(**{f'{field}_derivative_sizes': available})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0003_profile_directory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='businessprofile',
+            name='file_derivative_sizes',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customerprofile',
+            name='file_derivative_sizes',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(backfill_derivative_sizes, migrations.RunPython.noop),
+    ]
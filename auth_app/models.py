@@ -1,15 +1,22 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
+from coderr_project.utils import MaintainedFieldsMixin
 
 
-class UserProfile(models.Model):
+class UserProfile(MaintainedFieldsMixin, models.Model):
     """
     Abstract base class for user profiles. 
     It contains common fields that will be inherited by other profile types (CustomerProfile, BusinessProfile).
     """
+    maintained_fields = ['file_derivative_sizes']
+
     created_at = models.DateTimeField(auto_now_add=True)
     file = models.FileField(upload_to='uploads/avatars/', blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now=True)
+    # Sizes of the generated picture derivatives, stored by the background generation
+    file_derivative_sizes = models.JSONField(default=list, blank=True, editable=False)
 
     class Meta:
         # Marks this class as abstract, meaning it won't create its own table
@@ -24,6 +31,12 @@ class CustomerProfile(UserProfile):
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='customer_profile')
 
+    class Meta:
+        # Composite key of the customer directory, ordered by (created_at, id)
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='customer_created_id_idx'),
+        ]
+
     @property
     def type(self):
         """
@@ -43,9 +56,58 @@ class BusinessProfile(UserProfile):
     description = models.TextField(default='', blank=True, null=True)
     working_hours = models.CharField(max_length=20, default='', blank=True, null=True)
 
+    class Meta:
+        # Composite keys of the business directory, ordered by (created_at, id) and optionally filtered by location
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='business_created_id_idx'),
+            models.Index(Lower('location'), F('created_at'), F('id'), name='business_location_created_idx'),
+        ]
+
     @property
     def type(self):
         """
         Returns the profile type as 'business'.
         """
         return 'business'
+
+
+class UserRoleQuerySet(models.QuerySet):
+
+    def assign(self, user_id, type):
+        """
+        Stores the role of a user who got a profile of the given type.
+        The customer profile takes precedence, a business profile doesn't replace an existing customer role.
+        """
+        if type == 'customer':
+            self.update_or_create(user_id=user_id, defaults={'type': type})
+        else:
+            self.get_or_create(user_id=user_id, defaults={'type': type})
+
+    def refresh(self, user_id):
+        """
+        Recomputes the existing role of a user from the remaining profiles (customer first)
+        and removes it if the user has no profile left.
+        Never creates a role, as the user may be deleted in the same cascade.
+        """
+        if CustomerProfile.objects.filter(user_id=user_id).exists():
+            self.filter(user_id=user_id).update(type='customer')
+        elif BusinessProfile.objects.filter(user_id=user_id).exists():
+            self.filter(user_id=user_id).update(type='business')
+        else:
+            self.filter(user_id=user_id).delete()
+
+
+class UserRole(models.Model):
+    """
+    Role discriminator of a user, telling which profile table holds the user's profile.
+    Maintained by the profile signals, so the profile can be resolved with a single query.
+    """
+    TYPE_CHOICES = (
+        ('customer', 'customer'),
+        ('business', 'business'),
+    )
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='role')
+    type = models.CharField(max_length=8, choices=TYPE_CHOICES)
+
+    objects = UserRoleQuerySet.as_manager()
@@ -0,0 +1,67 @@
+from django.db import connection as default_connection
+from freelancer_platform_app.search import fts5_supported, search_index_available, reset_search_index_availability
+from .models import BusinessProfile
+
+
+PROFILE_SEARCH_TABLE = 'auth_app_businessprofile_search'
+
+
+def profile_search_available(connection=default_connection):
+    """
+    Returns True if the full-text search index for business profiles exists in the database.
+    """
+    return search_index_available(connection, PROFILE_SEARCH_TABLE)
+
+
+def create_profile_search_index(connection=default_connection):
+    """
+    Creates the FTS5 search index for the descriptions of business profiles and fills it with all existing profiles.
+    Does nothing if FTS5 is not supported by the database.
+    """
+    if not fts5_supported(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {PROFILE_SEARCH_TABLE} USING fts5('
+            "description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute(f'DELETE FROM {PROFILE_SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {PROFILE_SEARCH_TABLE} (rowid, description) '
+            f"SELECT id, COALESCE(description, '') FROM {BusinessProfile._meta.db_table}"
+        )
+    reset_search_index_availability()
+    return True
+
+
+def drop_profile_search_index(connection=default_connection):
+    """
+    Removes the FTS5 search index for business profiles.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {PROFILE_SEARCH_TABLE}')
+    reset_search_index_availability()
+
+
+def index_business_profile(profile, connection=default_connection):
+    """
+    Adds a business profile to the search index or replaces its indexed description.
+    """
+    if not profile_search_available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {PROFILE_SEARCH_TABLE} WHERE rowid = %s', [profile.pk])
+        cursor.execute(
+            f'INSERT INTO {PROFILE_SEARCH_TABLE} (rowid, description) VALUES (%s, %s)',
+            [profile.pk, profile.description or '']
+        )
+
+
+def remove_business_profile(profile_id, connection=default_connection):
+    """
+    Removes a business profile from the search index.
+    """
+    if not profile_search_available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {PROFILE_SEARCH_TABLE} WHERE rowid = %s', [profile_id])
@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from coderr_project.authentication import invalidate_user_credentials
+from coderr_project.images import derivatives_generated, remember_file, handle_file_saved, handle_file_deleted
+from .models import CustomerProfile, BusinessProfile, UserRole
+from .search import index_business_profile, remove_business_profile
+
+
+@receiver(post_init, sender=CustomerProfile)
+@receiver(post_init, sender=BusinessProfile)
+def remember_profile_file(sender, instance, **kwargs):
+    """
+    Remembers the loaded file of the profile to detect replacements.
+    """
+    remember_file(instance, 'file')
+
+
+@receiver(post_save, sender=CustomerProfile)
+@receiver(post_save, sender=BusinessProfile)
+def process_profile_file(sender, instance, **kwargs):
+    """
+    Generates the derivatives of a new profile picture in the background and removes those of a replaced one.
+    """
+    handle_file_saved(instance, 'file')
+
+
+@receiver(post_delete, sender=CustomerProfile)
+@receiver(post_delete, sender=BusinessProfile)
+def delete_profile_file_derivatives(sender, instance, **kwargs):
+    """
+    Removes the derivatives of the deleted profile's picture.
+    """
+    handle_file_deleted(instance, 'file')
+
+
+@receiver(derivatives_generated, sender=CustomerProfile)
+@receiver(derivatives_generated, sender=BusinessProfile)
+def refresh_profile_file_derivatives(sender, pk, **kwargs):
+    """
+    Renews the validators of a profile whose picture derivatives were generated.
+    """
+    sender.objects.filter(pk=pk).update(uploaded_at=timezone.now())
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """
+    Drops the cached tokens of a user whose token or user changed after the transaction was committed.
+    """
+    user_id = instance.pk if sender is User else instance.user_id
+    transaction.on_commit(lambda: invalidate_user_credentials(user_id))
+
+
+@receiver(post_save, sender=CustomerProfile)
+@receiver(post_save, sender=BusinessProfile)
+@receiver(post_delete, sender=CustomerProfile)
+@receiver(post_delete, sender=BusinessProfile)
+def invalidate_cached_profile_flags(sender, instance, **kwargs):
+    """
+    Drops the cached tokens of a user whose profile changed, as they carry the user's profile flags,
+    after the transaction was committed.
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user_credentials(user_id))
+
+
+@receiver(post_save, sender=CustomerProfile)
+@receiver(post_save, sender=BusinessProfile)
+def set_user_role(sender, instance, created, **kwargs):
+    """
+    Stores the role of the user of a created profile, the customer profile takes precedence.
+    """
+    if created:
+        UserRole.objects.assign(instance.user_id, instance.type)
+
+
+@receiver(post_delete, sender=CustomerProfile)
+@receiver(post_delete, sender=BusinessProfile)
+def delete_user_role(sender, instance, **kwargs):
+    """
+    Recomputes the role of the user of a deleted profile from the remaining profiles.
+    """
+    UserRole.objects.refresh(instance.user_id)
+
+
+@receiver(post_save, sender=BusinessProfile)
+def update_profile_search_index(sender, instance, **kwargs):
+    """
+    Adds or updates the business profile in the full-text search index.
+    """
+    index_business_profile(instance)
+
+
+@receiver(post_delete, sender=BusinessProfile)
+def remove_profile_from_search_index(sender, instance, **kwargs):
+    """
+    Removes the deleted business profile from the full-text search index.
+    """
+    remove_business_profile(instance.pk)
@@ -0,0 +1,83 @@
+import time
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from coderr_project.authentication import TokenCache, get_revocation_cache, get_token_cache
+from ..models import BusinessProfile, CustomerProfile
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class CachedTokenAuthenticationTests(APITestCase):
+    """
+    Ensures that tokens and profile flags are resolved with one query, cached and invalidated on changes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='business', password='asdasd')
+        BusinessProfile.objects.create(user=cls.user)
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        get_token_cache().clear()
+        get_revocation_cache().clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def post_offer(self):
+        # Fails validation after the permission check, the permission result is enough
+        return self.client.post('/api/offers/', {}, format='json')
+
+    def test_token_and_profile_flags_are_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.post_offer().status_code, 400)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.post_offer().status_code, 400)
+
+    def test_profile_change_invalidates_cache(self):
+        self.post_offer()
+        with self.captureOnCommitCallbacks(execute=True):
+            BusinessProfile.objects.filter(user=self.user).delete()
+            CustomerProfile.objects.create(user=self.user)
+        self.assertEqual(self.post_offer().status_code, 403)
+
+    def test_token_deletion_invalidates_cache(self):
+        self.post_offer()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        self.assertEqual(self.post_offer().status_code, 401)
+
+    def test_inactive_user_is_rejected(self):
+        self.post_offer()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.post_offer().status_code, 401)
+
+    def test_revocation_of_another_process_is_respected(self):
+        self.post_offer()
+        # Another process revoked the tokens, the local token cache still holds the token
+        get_revocation_cache().set(f'token_revocation:{self.user.pk}', time.time())
+        with self.assertNumQueries(1):
+            self.post_offer()
+
+
+class TokenCacheTests(APITestCase):
+    """
+    Ensures that the token cache drops the least recently used and expired entries.
+    """
+
+    def test_lru_and_ttl(self):
+        users = [User.objects.create_user(username=f'user{index}') for index in range(3)]
+        tokens = [Token.objects.create(user=user) for user in users]
+        cache = TokenCache(ttl=60, max_size=2)
+        cache.set('a', tokens[0])
+        cache.set('b', tokens[1])
+        cache.get('a')
+        cache.set('c', tokens[2])
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+
+        cache = TokenCache(ttl=-1, max_size=2)
+        cache.set('a', tokens[0])
+        self.assertIsNone(cache.get('a'))
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from ..models import BusinessProfile, CustomerProfile, UserRole
+
+
+class ImportUsersTests(TestCase):
+    """
+    Ensures that the bulk import creates users with profiles, roles and tokens and can be resumed.
+    """
+
+    def write_file(self, suffix, content):
+        file = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False, encoding='utf-8')
+        file.write(content)
+        file.close()
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def import_users(self, path, **options):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_users', path, workers=1, batch_size=2, stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_import(self):
+        path = self.write_file('.csv', 'username,email,password,type\nanna,anna@mail.de,secret1,customer\nbert,,secret2,business\ncarl,,secret3,admin\n')
+        stdout, stderr = self.import_users(path)
+        self.assertIn('Imported 2 users, skipped 0 existing and 1 invalid rows.', stdout)
+        self.assertIn('Line 4', stderr)
+        anna = User.objects.get(username='anna')
+        self.assertTrue(anna.check_password('secret1'))
+        self.assertEqual(anna.email, 'anna@mail.de')
+        self.assertTrue(CustomerProfile.objects.filter(user=anna).exists())
+        self.assertTrue(BusinessProfile.objects.filter(user__username='bert').exists())
+        self.assertEqual(dict(UserRole.objects.values_list('user__username', 'type')), {'anna': 'customer', 'bert': 'business'})
+        self.assertEqual(Token.objects.count(), 2)
+
+    def test_rerun_resumes_import(self):
+        User.objects.create_user(username='anna', password='old')
+        rows = [{'username': name, 'password': 'secret', 'type': 'business'} for name in ['anna', 'bert', 'carl', 'bert']]
+        path = self.write_file('.ndjson', '\n'.join(json.dumps(row) for row in rows) + '\n{broken\n')
+        stdout, _ = self.import_users(path)
+        self.assertIn('Imported 2 users, skipped 2 existing and 1 invalid rows.', stdout)
+        self.assertTrue(User.objects.get(username='anna').check_password('old'))
+
+        stdout, _ = self.import_users(path)
+        self.assertIn('Imported 0 users, skipped 4 existing', stdout)
+        self.assertEqual(BusinessProfile.objects.count(), 2)
@@ -0,0 +1,185 @@
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from coderr_project.authentication import get_profile_flags, get_token_cache
+from coderr_project.utils import get_profile_by_user_id, get_profile_by_user_username
+from freelancer_platform_app.search import reset_search_index_availability
+from ..models import BusinessProfile, CustomerProfile, UserRole
+from ..search import PROFILE_SEARCH_TABLE, profile_search_available
+
+
+class ProfileResolutionTests(APITestCase):
+    """
+    Ensures that profiles are resolved with their user in a single query using the role discriminator.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(username='customer', password='asdasd')
+        CustomerProfile.objects.create(user=cls.customer)
+        cls.business = User.objects.create_user(username='business', password='asdasd')
+        BusinessProfile.objects.create(user=cls.business, location='Berlin')
+        cls.token = Token.objects.create(user=cls.customer)
+
+    def test_profile_changes_maintain_role(self):
+        self.assertEqual(UserRole.objects.get(user=self.business).type, 'business')
+        BusinessProfile.objects.filter(user=self.business).delete()
+        self.assertFalse(UserRole.objects.filter(user=self.business).exists())
+
+    def test_customer_role_takes_precedence(self):
+        user = User.objects.create_user(username='both', password='asdasd')
+        CustomerProfile.objects.create(user=user)
+        business_profile = BusinessProfile.objects.create(user=user)
+        role = UserRole.objects.get(user=user)
+        self.assertEqual(role.type, 'customer')
+        self.assertEqual(get_profile_flags(User.objects.select_related('role').get(pk=user.pk)), (True, False))
+
+        business_profile.delete()
+        self.assertEqual(UserRole.objects.get(user=user).type, 'customer')
+        self.assertEqual(get_profile_by_user_id(user.pk, CustomerProfile, BusinessProfile).type, 'customer')
+
+    def test_deleting_customer_profile_falls_back_to_business(self):
+        user = User.objects.create_user(username='both', password='asdasd')
+        customer_profile = CustomerProfile.objects.create(user=user)
+        BusinessProfile.objects.create(user=user)
+        customer_profile.delete()
+        self.assertEqual(UserRole.objects.get(user=user).type, 'business')
+        self.assertEqual(get_profile_by_user_id(user.pk, CustomerProfile, BusinessProfile).type, 'business')
+
+    def test_deleting_user_with_both_profiles(self):
+        user = User.objects.create_user(username='both', password='asdasd')
+        CustomerProfile.objects.create(user=user)
+        BusinessProfile.objects.create(user=user)
+        user.delete()
+        self.assertFalse(UserRole.objects.filter(user_id=user.pk).exists())
+
+    def test_resolution_uses_one_query(self):
+        with self.assertNumQueries(1):
+            profile = get_profile_by_user_id(self.business.pk, CustomerProfile, BusinessProfile)
+            self.assertEqual((profile.type, profile.location, profile.user.username), ('business', 'Berlin', 'business'))
+        with self.assertNumQueries(1):
+            profile = get_profile_by_user_username('customer', CustomerProfile, BusinessProfile)
+            self.assertEqual((profile.type, profile.user.pk), ('customer', self.customer.pk))
+        self.assertIsNone(get_profile_by_user_id(999, CustomerProfile, BusinessProfile))
+
+    def test_profile_detail_query_count(self):
+        get_token_cache().clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        # Token with role and the profile with its user and rating aggregate
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/profile/{self.business.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['type'], response.data['username']), ('business', 'business'))
+
+    def test_profile_detail_etag_follows_user_changes(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        url = f'/api/profile/{self.business.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        for field, value in [('first_name', 'Max'), ('last_name', 'Muster'), ('email', 'max@example.com')]:
+            User.objects.filter(pk=self.business.pk).update(**{field: value})
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data[field], value)
+            etag = response['ETag']
+
+    def test_registration_stores_role(self):
+        data = {'username': 'new', 'email': 'new@mail.de', 'password': 'asdasd', 'repeated_password': 'asdasd', 'type': 'business'}
+        response = self.client.post('/api/registration/', data, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(UserRole.objects.get(user_id=response.data['user_id']).type, 'business')
+
+
+class ProfileDirectoryTests(APITestCase):
+    """
+    Ensures that the profile directories are loaded with one query, filtered, searched and paginated.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profiles = []
+        for index, (location, description) in enumerate([('Berlin', 'Webdesign and hosting'), ('berlin ', 'Logo design'), ('Hamburg', 'Webshops')]):
+            user = User.objects.create_user(username=f'business{index}', password='asdasd')
+            cls.profiles.append(BusinessProfile.objects.create(user=user, location=location, description=description))
+        for index in range(3):
+            CustomerProfile.objects.create(user=User.objects.create_user(username=f'customer{index}', password='asdasd'))
+
+    def setUp(self):
+        get_token_cache().clear()
+
+    def get_ids(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return [profile['user']['pk'] for profile in response.data['results']]
+
+    def test_directories_use_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/profiles/business/')
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(response.data['results'][0]['user']['username'], 'business2')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/profiles/customer/')
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_location_filter_ignores_case(self):
+        self.assertEqual(self.get_ids('/api/profiles/business/', {'location': 'BERLIN'}), [self.profiles[0].user_id])
+        self.assertEqual(self.get_ids('/api/profiles/business/', {'location': 'hamburg'}), [self.profiles[2].user_id])
+
+    def test_description_search_follows_updates(self):
+        self.assertEqual(self.get_ids('/api/profiles/business/', {'search': 'web'}), [self.profiles[2].user_id, self.profiles[0].user_id])
+        self.profiles[2].description = 'Photography'
+        self.profiles[2].save()
+        self.assertEqual(self.get_ids('/api/profiles/business/', {'search': 'web'}), [self.profiles[0].user_id])
+
+    def test_directories_are_paginated_by_default(self):
+        for index in range(3, 23):
+            CustomerProfile.objects.create(user=User.objects.create(username=f'customer{index}'))
+        response = self.client.get('/api/profiles/customer/')
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIsNotNone(response.data['next'])
+        self.assertEqual(len(self.client.get(response.data['next']).data['results']), 3)
+
+    def test_cursor_pagination(self):
+        response = self.client.get('/api/profiles/business/', {'page_size': 2})
+        ids = [profile['user']['pk'] for profile in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [profile['user']['pk'] for profile in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(ids, [profile.user_id for profile in reversed(self.profiles)])
+
+
+class ProfileSearchMigrationTests(ProfileDirectoryTests):
+    """
+    Ensures that the search index migration fills the index and that the search falls back to LIKE queries without FTS5.
+    """
+    migration = import_module('auth_app.migrations.0003_profile_directory')
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(reset_search_index_availability)
+        schema_editor = SimpleNamespace(connection=connection)
+        self.migration.drop_business_profile_search_index(apps, schema_editor)
+        self.migration.create_business_profile_search_index(apps, schema_editor)
+        # Looks the index up again, like a process started after the migration
+        reset_search_index_availability()
+        profile_search_available()
+
+    def test_migration_fills_index_with_existing_profiles(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {PROFILE_SEARCH_TABLE}')
+            self.assertEqual(cursor.fetchone()[0], 3)
+
+    def test_search_falls_back_without_fts5(self):
+        schema_editor = SimpleNamespace(connection=connection)
+        self.migration.drop_business_profile_search_index(apps, schema_editor)
+        with mock.patch.object(self.migration, 'fts5_supported', return_value=False):
+            self.migration.create_business_profile_search_index(apps, schema_editor)
+        reset_search_index_availability()
+        self.assertNotIn(PROFILE_SEARCH_TABLE, connection.introspection.table_names())
+        self.assertEqual(self.get_ids('/api/profiles/business/', {'search': 'web'}), [self.profiles[2].user_id, self.profiles[0].user_id])
+        self.assertEqual(self.get_ids('/api/profiles/business/', {'search': 'design'}), [self.profiles[1].user_id, self.profiles[0].user_id])
@@ -2,6 +2,8 @@
 ASGI config for coderr_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The order event stream (/api/orders/events/) is asynchronous and needs to be served
+through this application, e.g. with ``uvicorn coderr_project.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -0,0 +1,174 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+# Seconds the clocks of the processes may differ, tokens looked up this close to a revocation are looked up again
+CLOCK_TOLERANCE = 1.0
+
+
+def get_token_cache_settings():
+    """
+    Returns the settings of the token cache (TOKEN_CACHE), completed by their defaults.
+
+    Settings:
+        - TTL: Seconds an authenticated token is trusted without a lookup.
+        - MAX_SIZE: Maximum number of cached tokens, the least recently used ones are dropped.
+        - ALIAS: Name of the cache in CACHES sharing the revocations between the processes.
+    """
+    config = {'TTL': 60, 'MAX_SIZE': 10000, 'ALIAS': 'default'}
+    config.update(getattr(settings, 'TOKEN_CACHE', {}))
+    return config
+
+
+class TokenCache:
+    """
+    Thread-safe LRU cache of authenticated tokens with a time to live per entry.
+
+    The cache is kept per process, the invalidations reach the other processes
+    through the revocations in the shared cache (see revoke_user_credentials).
+    """
+
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.keys_by_user = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self.remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, token):
+        with self.lock:
+            self.remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl, token)
+            self.keys_by_user.setdefault(token.user_id, set()).add(key)
+            while len(self.entries) > self.max_size:
+                self.remove(next(iter(self.entries)))
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            keys = self.keys_by_user.get(entry[1].user_id, set())
+            keys.discard(key)
+            if not keys:
+                self.keys_by_user.pop(entry[1].user_id, None)
+
+    def invalidate_user(self, user_id):
+        with self.lock:
+            for key in list(self.keys_by_user.get(user_id, ())):
+                self.remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_user.clear()
+
+
+def get_token_cache():
+    """
+    Returns the token cache of this process, created on first use.
+    """
+    global _token_cache
+    with _token_cache_lock:
+        if _token_cache is None:
+            config = get_token_cache_settings()
+            _token_cache = TokenCache(config['TTL'], config['MAX_SIZE'])
+    return _token_cache
+
+
+def get_revocation_cache():
+    return caches[get_token_cache_settings()['ALIAS']]
+
+
+def get_revocation_time(user_id):
+    """
+    Returns the time of the last revocation of the user's cached tokens, or None.
+    """
+    return get_revocation_cache().get(f'token_revocation:{user_id}')
+
+
+def invalidate_user_credentials(user_id):
+    """
+    Drops the cached tokens of a user, e.g. after their token, user or profile changed.
+    The revocation is stored in the shared cache for the lifetime of cached tokens, so the other processes
+    drop tokens looked up before it. Must run after the change was committed (transaction.on_commit),
+    otherwise a concurrent request could look up and cache the old state again.
+    """
+    get_revocation_cache().set(f'token_revocation:{user_id}', time.time(), timeout=get_token_cache_settings()['TTL'] + 2 * CLOCK_TOLERANCE)
+    get_token_cache().invalidate_user(user_id)
+
+
+def get_profile_flags(user):
+    """
+    Returns whether the user has a customer and a business profile as a tuple of booleans,
+    read from the user's role discriminator. The flags are resolved once per user instance,
+    users authenticated by CachedTokenAuthentication already carry them.
+    """
+    if user is None or not user.is_authenticated:
+        return False, False
+    if '_profile_flags' not in user.__dict__:
+        role = getattr(user, 'role', None)
+        user._profile_flags = (role is not None and role.type == 'customer', role is not None and role.type == 'business')
+    return user._profile_flags
+
+
+def is_customer_user(user):
+    return get_profile_flags(user)[0]
+
+
+def is_business_user(user):
+    return get_profile_flags(user)[1]
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication resolving the token, its user and the user's role with one query.
+    Authenticated tokens are cached (see TokenCache) and invalidated by the signals of auth_app
+    when tokens are deleted or users and profiles change. A cached token is only used
+    if it was looked up after the last revocation of its user's tokens.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        token = cache.get(key)
+        if token is not None:
+            revoked_at = get_revocation_time(token.user_id)
+            if revoked_at is not None and token._looked_up_at <= revoked_at + CLOCK_TOLERANCE:
+                token = None
+        if token is None:
+            looked_up_at = time.time()
+            try:
+                token = Token.objects.select_related('user__role').get(key=key)
+            except Token.DoesNotExist:
+                raise AuthenticationFailed(_('Invalid token.'))
+            get_profile_flags(token.user)
+            token._looked_up_at = looked_up_at
+            cache.set(key, token)
+
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+
+        # Every request gets its own instances, the cached ones are shared between requests
+        request_token = copy.copy(token)
+        request_token.user = copy.copy(token.user)
+        return (request_token.user, request_token)
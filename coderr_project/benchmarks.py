@@ -0,0 +1,332 @@
+import gc
+import json
+import math
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from importlib import import_module
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .cache import get_cache
+
+
+URLCONFS = ['auth_app.api.urls', 'freelancer_platform_app.api.urls']
+
+# Routes which can't be measured like a request-response endpoint
+EXCLUDED_ROUTES = {
+    'orders-events': 'Long-lived event stream, served through the ASGI application.',
+}
+
+
+def get_benchmark_settings():
+    """
+    Returns the settings of the endpoint benchmarks (BENCHMARK), completed by their defaults.
+
+    Settings:
+        - BASELINE: Path of the committed baseline file.
+        - ITERATIONS: Number of measured requests per case.
+        - THRESHOLD: Allowed relative increase of latencies and allocations, e.g. 0.5 for 50 %.
+        - LATENCY_FLOOR_MS: Allowed absolute increase of latencies, absorbing the noise of fast requests.
+        - ALLOCATION_FLOOR_KIB: Allowed absolute increase of the allocation peak.
+        - RETRIES: Number of times a regressed case is measured again before it fails,
+          the best value of every metric counts.
+        - DATASET: Arguments of dummy_data.generate_data for the seeded dataset.
+    """
+    config = {
+        'BASELINE': settings.BASE_DIR / 'coderr_project' / 'benchmark_baseline.json',
+        'ITERATIONS': 15,
+        'THRESHOLD': 0.5,
+        'LATENCY_FLOOR_MS': 2.0,
+        'ALLOCATION_FLOOR_KIB': 64,
+        'RETRIES': 2,
+        'DATASET': {
+            'customers': 2000, 'businesses': 100, 'offers_per_business': 3,
+            'orders_per_customer': 5, 'reviews_per_customer': 1, 'seed': 42,
+        },
+    }
+    config.update(getattr(settings, 'BENCHMARK', {}))
+    return config
+
+
+@dataclass
+class Case:
+    """
+    One benchmarked request. The URL is reversed from the route name and its kwargs,
+    the user is one of the fixture users ('customer', 'business', 'admin') or None for anonymous requests.
+    """
+    name: str
+    route: str
+    method: str = 'get'
+    user: str = None
+    kwargs: dict = field(default_factory=dict)
+    params: dict = None
+    data: dict = None
+
+
+def get_route_names():
+    """
+    Returns the names of all routes of the API URL configurations.
+    """
+    names = set()
+
+    def collect(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                collect(pattern.url_patterns)
+            elif pattern.name:
+                names.add(pattern.name)
+
+    for urlconf in URLCONFS:
+        collect(import_module(urlconf).urlpatterns)
+    return names
+
+
+def get_unbenchmarked_routes(cases):
+    """
+    Returns the routes which are neither benchmarked nor excluded.
+    """
+    return get_route_names() - {case.route for case in cases} - set(EXCLUDED_ROUTES)
+
+
+def create_fixture():
+    """
+    Picks the objects of the seeded dataset used by the cases and creates the tokens of their users.
+    The business user is the one with the most orders, the customer one of its reviewers.
+
+    Returns:
+        - A dictionary of the IDs, tokens and credentials used by get_cases.
+    """
+    from auth_app.models import BusinessProfile
+    from freelancer_platform_app.models import Offer, Order, OrderCount, Review
+
+    admin = User.objects.create_superuser('benchmarkadmin', password='asdasd')
+    business_id = OrderCount.objects.order_by('-completed', '-in_progress').values_list('business_user_id', flat=True).first()
+    review = Review.objects.filter(business_user_id=business_id).select_related('reviewer').first()
+    customer = review.reviewer
+    reviewed = Review.objects.filter(reviewer=customer).values('business_user_id')
+    offer = Offer.objects.filter(user_id=business_id).first()
+    orders = list(Order.objects.filter(business_user_id=business_id, status='in_progress').values_list('pk', flat=True)[:20])
+    tokens = {
+        role: Token.objects.get_or_create(user_id=user_id)[0].key
+        for role, user_id in [('customer', customer.pk), ('business', business_id), ('admin', admin.pk)]
+    }
+    return {
+        'tokens': tokens,
+        'customer_id': customer.pk,
+        'customer_username': customer.username,
+        'business_id': business_id,
+        'unreviewed_business_id': BusinessProfile.objects.exclude(user_id__in=reviewed).values_list('user_id', flat=True).first(),
+        'offer_id': offer.pk,
+        'detail_id': offer.details.values_list('pk', flat=True).first(),
+        'order_id': orders[0],
+        'order_ids': orders,
+        'review_id': review.pk,
+        'order_count_ids': ','.join(str(pk) for pk in OrderCount.objects.values_list('business_user_id', flat=True)[:50]),
+    }
+
+
+def get_offer_data(title):
+    return {
+        'title': title, 'description': 'Benchmark offer',
+        'details': [
+            {'title': offer_type, 'revisions': 1, 'delivery_time_in_days': 3, 'price': 100, 'features': ['Design'], 'offer_type': offer_type}
+            for offer_type in ['basic', 'standard', 'premium']
+        ],
+    }
+
+
+def get_cases(fixture):
+    """
+    Returns the benchmarked requests, covering every route of the API except the excluded ones.
+    """
+    return [
+        Case('api-root', 'api-root'),
+        Case('registration', 'registration', 'post', data={'username': 'benchmarkuser', 'email': 'bench@mail.de', 'password': 'asdasd', 'repeated_password': 'asdasd', 'type': 'customer'}),
+        Case('login', 'login', 'post', data={'username': fixture['customer_username'], 'password': 'asdasd'}),
+        Case('profile-detail', 'profile-detail', user='customer', kwargs={'pk': fixture['business_id']}),
+        Case('profile-detail:patch', 'profile-detail', 'patch', user='business', kwargs={'pk': fixture['business_id']}, data={'location': 'Berlin'}),
+        Case('customer-profiles', 'customer-profiles', user='customer'),
+        Case('customer-profiles:max-page', 'customer-profiles', user='customer', params={'page_size': 100}),
+        Case('business-profiles', 'business-profiles', user='customer'),
+        Case('business-profiles:search', 'business-profiles', user='customer', params={'search': 'Web', 'location': 'Berlin'}),
+        Case('offers', 'offers'),
+        Case('offers:search', 'offers', params={'search': 'Webdesign', 'ordering': 'min_price'}),
+        Case('offers:cursor', 'offers', user='customer', params={'pagination': 'cursor'}),
+        Case('offers:post', 'offers', 'post', user='business', data=get_offer_data('Benchmark')),
+        Case('offers-bulk', 'offers-bulk', 'post', user='business', data=[get_offer_data(f'Benchmark {index}') for index in range(5)]),
+        Case('offers-facets', 'offers-facets', params={'search': 'Web'}),
+        Case('offers-detail', 'offers-detail', user='customer', kwargs={'pk': fixture['offer_id']}),
+        Case('offers-detail:patch', 'offers-detail', 'patch', user='business', kwargs={'pk': fixture['offer_id']}, data={'title': 'Benchmark', 'details': [{'offer_type': 'basic', 'price': 120}]}),
+        Case('offerdetail-detail', 'offerdetail-detail', user='customer', kwargs={'pk': fixture['detail_id']}),
+        Case('orders-list:business', 'orders-list', user='business'),
+        Case('orders-list:customer', 'orders-list', user='customer'),
+        Case('orders-list:status', 'orders-list', user='business', params={'status': 'in_progress'}),
+        Case('orders-list:post', 'orders-list', 'post', user='customer', data={'offer_detail_id': fixture['detail_id']}),
+        Case('orders-detail', 'orders-detail', user='business', kwargs={'pk': fixture['order_id']}),
+        Case('orders-detail:patch', 'orders-detail', 'patch', user='business', kwargs={'pk': fixture['order_id']}, data={'status': 'completed'}),
+        Case('orders-events-ticket', 'orders-events-ticket', 'post', user='customer'),
+        Case('orders-bulk-status', 'orders-bulk-status', 'post', user='business', data={'ids': fixture['order_ids'], 'from_status': 'in_progress', 'to_status': 'completed'}),
+        Case('reviews-list', 'reviews-list', user='customer', params={'business_user_id': fixture['business_id']}),
+        Case('reviews-list:post', 'reviews-list', 'post', user='customer', data={'business_user': fixture['unreviewed_business_id'], 'rating': 4, 'description': 'Benchmark'}),
+        Case('reviews-detail', 'reviews-detail', user='customer', kwargs={'pk': fixture['review_id']}),
+        Case('reviews-detail:patch', 'reviews-detail', 'patch', user='customer', kwargs={'pk': fixture['review_id']}, data={'rating': 2}),
+        Case('base-info', 'base-info'),
+        Case('order-count', 'order-count', kwargs={'pk': fixture['business_id']}),
+        Case('completed-order-count', 'completed-order-count', kwargs={'pk': fixture['business_id']}),
+        Case('order-counts', 'order-counts', params={'ids': fixture['order_count_ids']}),
+    ]
+
+
+def calibrate(runs=5):
+    """
+    Returns the time in milliseconds of a fixed CPU-bound workload (best of several runs).
+    On a machine slower than the one of the baseline, the baseline latencies are scaled up
+    by the ratio of the calibrations.
+    """
+    data = [{'id': index, 'title': f'Offer {index}', 'price': index * 1.5, 'features': ['Design', 'Hosting']} for index in range(2000)]
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        for _ in range(5):
+            encoded = json.dumps(data)
+            sorted(json.loads(encoded), key=lambda item: (-item['price'], item['title']))
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(min(timings), 2)
+
+
+def percentile(values, fraction):
+    """
+    Returns the nearest-rank percentile of the values, e.g. fraction 0.95 for p95.
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def send(client, case):
+    """
+    Sends the request of a case in a transaction which is rolled back,
+    so every request sees the same data. Response caches are cleared before, so the uncached work is measured,
+    and the garbage collector is paused while the request is timed.
+
+    Returns:
+        - The response, its latency in seconds and the executed queries.
+    """
+    get_cache().clear()
+    url = reverse(case.route, kwargs=case.kwargs)
+    gc.collect()
+    gc.disable()
+    try:
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                if case.method == 'get':
+                    response = client.get(url, case.params)
+                else:
+                    response = getattr(client, case.method)(url, case.data, format='json')
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+    finally:
+        gc.enable()
+    return response, elapsed, len(queries)
+
+
+def run_case(case, fixture, iterations):
+    """
+    Measures a case: the maximum query count and p50/p95 latency over the iterations,
+    and the allocation peak of one further request traced with tracemalloc.
+    A warm-up request fills the per-process caches (e.g. the token cache) first.
+
+    Returns:
+        - A dictionary with the status code, queries, p50_ms, p95_ms and peak_kib.
+    """
+    client = APIClient()
+    if case.user:
+        client.credentials(HTTP_AUTHORIZATION=f'Token {fixture["tokens"][case.user]}')
+
+    response, _, _ = send(client, case)
+    if response.status_code >= 400:
+        raise AssertionError(f'{case.name} answered with {response.status_code}: {response.content[:200]!r}')
+
+    latencies = []
+    queries = 0
+    for _ in range(iterations):
+        _, elapsed, count = send(client, case)
+        latencies.append(elapsed * 1000)
+        queries = max(queries, count)
+
+    tracemalloc.start()
+    try:
+        send(client, case)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'queries': queries,
+        'p50_ms': round(percentile(latencies, 0.5), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def merge_results(result, other):
+    """
+    Returns the best value of every metric of two measurements of the same case.
+    """
+    return {metric: min(value, other[metric]) if metric != 'status' else value for metric, value in result.items()}
+
+
+def compare_results(results, baseline, config, speed=1.0):
+    """
+    Compares the results with the baseline results.
+    Any additional query is a regression, latencies and allocation peaks regress if they exceed
+    the baseline by more than the relative threshold plus the absolute floor.
+
+    Parameters:
+        - results (dict): The measured results per case.
+        - baseline (dict): The baseline results per case.
+        - config (dict): The benchmark settings.
+        - speed (float): The calibration of this machine divided by the one of the baseline,
+          the baseline latencies are scaled with it.
+
+    Returns:
+        - A list of regression messages, empty if there are none.
+    """
+    regressions = []
+    threshold = config['THRESHOLD']
+    floors = {'p50_ms': config['LATENCY_FLOOR_MS'], 'p95_ms': config['LATENCY_FLOOR_MS'], 'peak_kib': config['ALLOCATION_FLOOR_KIB']}
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if result['queries'] > expected['queries']:
+            regressions.append(f'{name}: {result["queries"]} queries, baseline {expected["queries"]}')
+        for metric, floor in floors.items():
+            scale = speed if metric.endswith('_ms') else 1.0
+            limit = expected[metric] * scale * (1 + threshold) + floor
+            if result[metric] > limit:
+                regressions.append(f'{name}: {metric} {result[metric]}, baseline {expected[metric]} (limit {limit:.1f})')
+    return regressions
+
+
+def load_baseline(path):
+    """
+    Returns the baseline file's content, or None if it doesn't exist.
+    """
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, dataset, iterations, calibration_ms, results):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'dataset': dataset, 'iterations': iterations, 'calibration_ms': calibration_ms, 'results': results}, file, indent=2, sort_keys=True)
+        file.write('\n')
@@ -0,0 +1,145 @@
+import hashlib
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+
+HITS_KEY = 'response_cache:hits'
+MISSES_KEY = 'response_cache:misses'
+
+
+def get_response_cache_settings():
+    """
+    Returns the settings of the response cache, completed by their defaults.
+
+    Settings (RESPONSE_CACHE):
+        - ENABLED: Switches the response cache on or off.
+        - TIMEOUT: Number of seconds a cached response is kept.
+        - ALIAS: Name of the cache in CACHES used for the responses.
+    """
+    config = {'ENABLED': True, 'TIMEOUT': 300, 'ALIAS': 'default'}
+    config.update(getattr(settings, 'RESPONSE_CACHE', {}))
+    return config
+
+
+def get_cache():
+    return caches[get_response_cache_settings()['ALIAS']]
+
+
+def get_versions(*names):
+    """
+    Returns the current version of each of the given cache namespaces.
+    """
+    versions = get_cache().get_many(names)
+    return [versions.get(name, 0) for name in names]
+
+
+def invalidate_response_cache(*names):
+    """
+    Invalidates all cached responses depending on the given namespaces by bumping their versions.
+    """
+    cache = get_cache()
+    for name in names:
+        cache.add(name, 0, timeout=None)
+        try:
+            cache.incr(name)
+        except ValueError:
+            cache.set(name, 1, timeout=None)
+
+
+def count(key):
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def get_response_cache_stats():
+    """
+    Returns the number of hits and misses of the response cache.
+    """
+    stats = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    return {'hits': stats.get(HITS_KEY, 0), 'misses': stats.get(MISSES_KEY, 0)}
+
+
+class CachedResponseMixin:
+    """
+    Mixin for generic views caching the data of successful list and retrieve responses.
+
+    The cache key is built from the path, the normalized query parameters (sorted, page size clamped),
+    the requesting user if the response is user-specific and the versions of the namespaces
+    returned by get_cache_namespaces. Entries are invalidated by bumping a namespace version
+    with invalidate_response_cache.
+
+    Attributes:
+        - cache_user_specific: True if responses to authenticated users contain user-specific data.
+    """
+    cache_user_specific = False
+
+    def get_cache_namespaces(self):
+        """
+        Returns the namespaces the cached response depends on.
+        """
+        return []
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        """
+        Returns the cached response data if available, otherwise calls the handler and caches its response.
+        """
+        config = get_response_cache_settings()
+        if not config['ENABLED']:
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            count(HITS_KEY)
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        count(MISSES_KEY)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout=config['TIMEOUT'])
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def get_response_cache_key(self, request):
+        namespaces = list(self.get_cache_namespaces())
+        user = 'anonymous'
+        if self.cache_user_specific and request.user.is_authenticated:
+            user = f'user:{request.user.pk}'
+            namespaces.append(user)
+        versions = ','.join(f'{name}={version}' for name, version in zip(namespaces, get_versions(*namespaces)))
+        raw_key = f'{request.path}?{self.get_normalized_query(request)}|{user}|{versions}'
+        return 'response:' + hashlib.md5(raw_key.encode()).hexdigest()
+
+    def get_normalized_query(self, request):
+        """
+        Returns the query parameters sorted by name and value, with the page size clamped
+        to the limits of the view's pagination class.
+        """
+        params = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+        pagination_class = getattr(self, 'pagination_class', None)
+        page_size_param = getattr(pagination_class, 'page_size_query_param', None)
+        if page_size_param:
+            params = [(key, self.clamp_page_size(pagination_class, value) if key == page_size_param else value) for key, value in params]
+        return urlencode(params)
+
+    def clamp_page_size(self, pagination_class, value):
+        try:
+            value = int(value)
+        except ValueError:
+            return pagination_class.page_size
+        if value < 1:
+            return pagination_class.page_size
+        return min(value, pagination_class.max_page_size or value)
@@ -0,0 +1,102 @@
+import hashlib
+from calendar import timegm
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """
+    Returns a quoted ETag built from the given parts.
+    """
+    return quote_etag(hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest())
+
+
+def get_validators(queryset, last_modified_fields, *extra):
+    """
+    Computes the validators of the rows in a queryset with a single aggregate query.
+
+    Parameters:
+        - queryset (QuerySet): The rows the response is built from.
+        - last_modified_fields (list): Timestamp fields (may span relations) whose maximum is the last modification.
+        - *extra: Additional values the representation depends on, e.g. the requesting user.
+
+    Returns:
+        - A tuple of the number of rows, the ETag and the last modification (or None).
+    """
+    aggregates = {f'last_modified_{index}': Max(field) for index, field in enumerate(last_modified_fields)}
+    result = queryset.order_by().aggregate(row_count=Count('pk', distinct=True), **aggregates)
+    timestamps = [value for key, value in result.items() if key != 'row_count' and value is not None]
+    last_modified = max(timestamps) if timestamps else None
+    return result['row_count'], make_etag(result['row_count'], last_modified, *extra), last_modified
+
+
+def conditional_response(request, etag, last_modified):
+    """
+    Returns a 304 (or 412) response if the conditional headers of the request match the validators,
+    otherwise None.
+    """
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag, last_modified):
+    """
+    Adds the ETag and Last-Modified headers to a response.
+    """
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Mixin for generic views and viewsets answering conditional GET requests (If-None-Match, If-Modified-Since).
+
+    The validators are computed from the maximum of last_modified_fields with one aggregate query,
+    for a single object on retrieve and for the whole filtered collection on list.
+    A matching request is answered with 304 without loading or serializing any object.
+
+    Attributes:
+        - last_modified_fields: Timestamp fields the representation depends on.
+        - conditional_user_specific: True if the representation depends on the requesting user and their details.
+        - embedded_fields: Fields of related rows without a timestamp embedded in the representation
+          (e.g. the names of a user), their distinct values are loaded with one more query.
+    """
+    last_modified_fields = ['updated_at']
+    conditional_user_specific = False
+    embedded_fields = []
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.get_conditional_response(queryset, False, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        return self.get_conditional_response(queryset, True, super().retrieve, request, *args, **kwargs)
+
+    def get_conditional_response(self, queryset, single, handler, request, *args, **kwargs):
+        """
+        Answers with 304 if the request's validators match, otherwise calls the handler
+        and adds the validators to its response.
+        """
+        extra = []
+        if self.conditional_user_specific:
+            user = request.user
+            extra += [user.pk, *(getattr(user, field, '') for field in ['username', 'first_name', 'last_name'])]
+        if self.embedded_fields:
+            extra += queryset.order_by(*self.embedded_fields).values_list(*self.embedded_fields).distinct()
+        row_count, etag, last_modified = get_validators(queryset, self.last_modified_fields, *extra)
+        if single and not row_count:
+            return handler(request, *args, **kwargs)
+
+        response = conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag, last_modified)
+        return response
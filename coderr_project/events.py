@@ -0,0 +1,218 @@
+import asyncio
+import json
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+TICKET_SALT = 'coderr_project.events.stream_ticket'
+
+
+def get_event_settings():
+    """
+    Returns the settings of the event streams (EVENT_STREAM), completed by their defaults.
+
+    Settings:
+        - HEARTBEAT: Seconds between two heartbeats of an idle stream.
+        - RETRY: Milliseconds a client waits before reconnecting.
+        - BUFFER_SIZE: Number of recent events kept for resuming streams.
+        - QUEUE_SIZE: Number of undelivered events per stream before it is closed.
+        - TICKET_MAX_AGE: Seconds a stream ticket can be used to open a stream.
+    """
+    config = {'HEARTBEAT': 15, 'RETRY': 3000, 'BUFFER_SIZE': 1000, 'QUEUE_SIZE': 100, 'TICKET_MAX_AGE': 30}
+    config.update(getattr(settings, 'EVENT_STREAM', {}))
+    return config
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    sequence: int
+    user_ids: frozenset
+    name: str
+    data: dict
+
+    def encode(self):
+        """
+        Returns the event in the text/event-stream format.
+        """
+        data = json.dumps(self.data, cls=DjangoJSONEncoder)
+        return f'id: {self.id}\nevent: {self.name}\ndata: {data}\n\n'
+
+
+class Subscription:
+    """
+    Queue of the events of one user for one stream, filled from any thread
+    and consumed on the event loop of the stream.
+    """
+
+    def __init__(self, user_id, queue_size):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.queue_size = queue_size
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self.put, event)
+        except RuntimeError:  # The event loop of the stream is closed
+            pass
+
+    def put(self, event):
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.queue_size:
+            # A stream which can't keep up is closed, the client resumes from the buffer
+            self.overflowed = True
+            self.queue.put_nowait(None)
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """
+        Returns the next event, or None if there was none within the timeout.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroadcaster:
+    """
+    In-process broadcaster delivering events to the streams of their users.
+
+    Recent events are kept in a ring buffer, so a reconnecting stream can resume after its Last-Event-ID.
+    Event IDs contain an ID of the broadcaster, IDs of another process or of a restarted one can't be resumed.
+    """
+
+    def __init__(self, buffer_size, queue_size):
+        self.instance = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self.buffer = deque(maxlen=buffer_size)
+        self.queue_size = queue_size
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def publish(self, user_ids, name, data):
+        """
+        Delivers an event to all streams of the given users. Can be called from any thread.
+        """
+        with self.lock:
+            self.sequence += 1
+            event = Event(f'{self.instance}-{self.sequence}', self.sequence, frozenset(user_ids), name, data)
+            self.buffer.append(event)
+            subscriptions = [subscription for user_id in event.user_ids for subscription in self.subscriptions.get(user_id, ())]
+        for subscription in subscriptions:
+            subscription.deliver(event)
+        return event
+
+    def subscribe(self, user_id, last_event_id=None):
+        """
+        Registers a stream of a user on the running event loop.
+
+        Returns:
+            - The subscription and the missed events after last_event_id. The missed events are None
+              if they can't be resumed, e.g. because they already left the buffer.
+        """
+        subscription = Subscription(user_id, self.queue_size)
+        with self.lock:
+            missed = self.get_missed_events(user_id, last_event_id)
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription, missed
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.user_id, None)
+
+    def get_missed_events(self, user_id, last_event_id):
+        if not last_event_id:
+            return []
+        instance, _, sequence = last_event_id.partition('-')
+        try:
+            sequence = int(sequence)
+        except ValueError:
+            return None
+        if instance != self.instance or sequence > self.sequence:
+            return None
+        if sequence < self.sequence and (not self.buffer or self.buffer[0].sequence > sequence + 1):
+            return None
+        return [event for event in self.buffer if event.sequence > sequence and user_id in event.user_ids]
+
+
+def get_broadcaster():
+    """
+    Returns the broadcaster of this process, created on first use.
+    """
+    global _broadcaster
+    with _broadcaster_lock:
+        if _broadcaster is None:
+            config = get_event_settings()
+            _broadcaster = EventBroadcaster(config['BUFFER_SIZE'], config['QUEUE_SIZE'])
+    return _broadcaster
+
+
+def create_stream_ticket(user_id):
+    """
+    Returns a signed ticket opening the event stream of a user. As EventSource can't send headers,
+    the stream is opened with the ticket in the URL instead of the long-lived token,
+    it is only valid for streams and expires after TICKET_MAX_AGE.
+    """
+    return signing.TimestampSigner(salt=TICKET_SALT).sign(str(user_id))
+
+
+def get_ticket_user_id(ticket):
+    """
+    Returns the user ID of a valid stream ticket, or None if it is invalid or expired.
+    """
+    try:
+        value = signing.TimestampSigner(salt=TICKET_SALT).unsign(ticket, max_age=get_event_settings()['TICKET_MAX_AGE'])
+        return int(value)
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def publish_on_commit(user_ids, name, data):
+    """
+    Publishes an event after the current transaction was committed.
+    """
+    transaction.on_commit(lambda: get_broadcaster().publish(user_ids, name, data))
+
+
+async def stream_events(user_id, last_event_id=None):
+    """
+    Yields the events of a user in the text/event-stream format, starting with the missed events
+    after last_event_id. A 'reset' event tells the client that events were lost and its data has to be reloaded.
+    Idle streams receive a heartbeat comment. The stream ends if it can't keep up with its events.
+    """
+    config = get_event_settings()
+    broadcaster = get_broadcaster()
+    subscription, missed = broadcaster.subscribe(user_id, last_event_id)
+    try:
+        yield f'retry: {config["RETRY"]}\n\n'
+        if missed is None:
+            yield 'event: reset\ndata: {}\n\n'
+        for event in missed or []:
+            yield event.encode()
+        while not subscription.overflowed:
+            event = await subscription.get(config['HEARTBEAT'])
+            if event is None:
+                if subscription.overflowed:
+                    break
+                yield ': heartbeat\n\n'
+            else:
+                yield event.encode()
+    finally:
+        broadcaster.unsubscribe(subscription)
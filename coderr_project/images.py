@@ -0,0 +1,200 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.dispatch import Signal
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional, derivatives are skipped without it
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Sent with the model as sender, pk, field and sizes when the derivatives of an instance's file were stored
+derivatives_generated = Signal()
+
+
+def get_derivative_settings():
+    """
+    Returns the settings of the image derivatives (IMAGE_DERIVATIVES), completed by their defaults.
+
+    Settings:
+        - SIZES: Maximum (width, height) of every derivative by name.
+        - WORKERS: Number of background threads generating derivatives.
+        - QUALITY: JPEG quality of the derivatives.
+    """
+    config = {'SIZES': {'thumbnail': (160, 160), 'card': (480, 320)}, 'WORKERS': 2, 'QUALITY': 85}
+    config.update(getattr(settings, 'IMAGE_DERIVATIVES', {}))
+    return config
+
+
+def get_executor():
+    """
+    Returns the thread pool generating the derivatives, created on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_derivative_settings()['WORKERS'], thread_name_prefix='image-derivatives')
+    return _executor
+
+
+def get_derivative_name(name, size):
+    """
+    Returns the storage name of a derivative, e.g. 'uploads/avatars/derivatives/me.png.thumbnail.jpg'.
+    """
+    directory, filename = os.path.split(name)
+    return os.path.join(directory, 'derivatives', f'{filename}.{size}.jpg')
+
+
+def get_sizes_field(field):
+    """
+    Returns the name of the model field storing the generated derivative sizes of a file field.
+    """
+    return f'{field}_derivative_sizes'
+
+
+def generate_derivatives(storage, name):
+    """
+    Generates all derivatives of an image file and returns their size names.
+    Files which are no images are skipped.
+    """
+    if Image is None:
+        return []
+    config = get_derivative_settings()
+    try:
+        with storage.open(name, 'rb') as source:
+            image = ImageOps.exif_transpose(Image.open(source))
+            image.load()
+    except Exception:
+        logger.info('No derivatives generated for %s, the file is not a readable image.', name)
+        return []
+
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    else:
+        image = image.convert('RGB')
+
+    for size, dimensions in config['SIZES'].items():
+        derivative = image.copy()
+        derivative.thumbnail(dimensions)
+        buffer = io.BytesIO()
+        derivative.save(buffer, format='JPEG', quality=config['QUALITY'], optimize=True)
+        content = ContentFile(buffer.getvalue())
+        derivative_name = get_derivative_name(name, size)
+        if storage.exists(derivative_name):
+            storage.delete(derivative_name)
+        storage.save(derivative_name, content)
+    return list(config['SIZES'])
+
+
+def store_derivatives(model, pk, field, storage, name):
+    """
+    Generates the derivatives of an instance's file and stores their sizes on the instance,
+    unless the file was replaced meanwhile. Sends derivatives_generated afterwards,
+    so the apps can invalidate the responses containing the instance.
+    """
+    sizes = generate_derivatives(storage, name)
+    if sizes and model.objects.filter(pk=pk, **{field: name}).update(**{get_sizes_field(field): sizes}):
+        derivatives_generated.send(sender=model, pk=pk, field=field, sizes=sizes)
+
+
+def delete_derivatives(storage, name):
+    """
+    Deletes all derivatives of a file.
+    """
+    for size in get_derivative_settings()['SIZES']:
+        derivative_name = get_derivative_name(name, size)
+        if storage.exists(derivative_name):
+            storage.delete(derivative_name)
+
+
+def schedule(function, *args):
+    """
+    Runs the function in the background after the current transaction was committed.
+    """
+    def submit():
+        future = get_executor().submit(run_in_background, function, *args)
+        future.add_done_callback(log_failure)
+    transaction.on_commit(submit)
+
+
+def run_in_background(function, *args):
+    """
+    Runs the function in a worker thread and closes the thread's database connections afterwards.
+    """
+    try:
+        function(*args)
+    finally:
+        connections.close_all()
+
+
+def log_failure(future):
+    if future.exception() is not None:
+        logger.error('Processing image derivatives failed.', exc_info=future.exception())
+
+
+def get_derivative_urls(file, sizes, request=None):
+    """
+    Returns the URLs of the derivatives of a file by their size name.
+    The generated sizes are stored on the instance, so no storage is accessed.
+    A derivative which is not generated yet has no URL.
+    """
+    if not file:
+        return None
+    urls = {}
+    for size in get_derivative_settings()['SIZES']:
+        url = None
+        if size in sizes:
+            url = file.storage.url(get_derivative_name(file.name, size))
+            if request is not None:
+                url = request.build_absolute_uri(url)
+        urls[size] = url
+    return urls
+
+
+def remember_file(instance, field):
+    """
+    Remembers the current file name of an instance to detect replacements on save.
+    Deferred fields are not loaded.
+    """
+    value = instance.__dict__.get(field)
+    setattr(instance, f'_original_{field}', getattr(value, 'name', value) or None)
+
+
+def handle_file_saved(instance, field):
+    """
+    Schedules the derivatives of a new or replaced file and the cleanup of the replaced file's derivatives.
+    The stored sizes of the replaced file's derivatives are reset.
+    """
+    file = getattr(instance, field)
+    original = getattr(instance, f'_original_{field}', None)
+    if (file.name or None) == original:
+        return
+    if original:
+        type(instance).objects.filter(pk=instance.pk).update(**{get_sizes_field(field): []})
+        setattr(instance, get_sizes_field(field), [])
+        schedule(delete_derivatives, file.storage, original)
+    if file:
+        schedule(store_derivatives, type(instance), instance.pk, field, file.storage, file.name)
+    remember_file(instance, field)
+
+
+def handle_file_deleted(instance, field):
+    """
+    Schedules the cleanup of the derivatives of a deleted instance's file.
+    """
+    file = getattr(instance, field)
+    if file:
+        schedule(delete_derivatives, file.storage, file.name)
@@ -0,0 +1,334 @@
+import functools
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.serializers import ListSerializer, Serializer
+
+
+_current_timings = ContextVar('request_timings', default=None)
+_registry = None
+_registry_lock = threading.Lock()
+
+QUERY_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100]
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+def get_metrics_settings():
+    """
+    Returns the settings of the request metrics (METRICS), completed by their defaults.
+
+    Settings:
+        - ENABLED: Switches the middleware on or off.
+        - SERVER_TIMING: Adds the Server-Timing header to the responses.
+        - BUCKETS: Upper bounds in seconds of the latency histogram buckets.
+        - TOKEN: If set, /metrics requires the header 'Authorization: Bearer <token>',
+          otherwise it is only accessible to logged-in staff users.
+    """
+    config = {
+        'ENABLED': True,
+        'SERVER_TIMING': True,
+        'BUCKETS': [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+        'TOKEN': None,
+    }
+    config.update(getattr(settings, 'METRICS', {}))
+    return config
+
+
+class RequestTimings:
+    """
+    Timings of one request. Called by record_query, it counts and times the executed queries.
+    """
+    __slots__ = ('queries', 'db', 'serializer', 'serializing', 'view_started', 'view')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.serializing = False
+        self.view_started = None
+        self.view = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper adding the query to the timings of the current request, if there is one.
+    """
+    timings = _current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def instrument_connections():
+    """
+    Installs record_query on the database connections of the current thread.
+    Connections are per thread and keep their execute wrappers when they reconnect,
+    so the wrapper is installed once per thread and connection.
+    """
+    for connection in connections.all():
+        if record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(record_query)
+
+
+def time_serializer_data(fget):
+    """
+    Wraps the data property of a serializer class, adding the time of the outermost serialization
+    to the timings of the current request.
+    """
+    @functools.wraps(fget)
+    def data(self):
+        timings = _current_timings.get()
+        if timings is None or timings.serializing:
+            return fget(self)
+        timings.serializing = True
+        started = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            timings.serializer += time.perf_counter() - started
+            timings.serializing = False
+
+    data.timed = True
+    return data
+
+
+def instrument_serializers():
+    """
+    Times the serialization of DRF serializers. DRF has no hook around serialization,
+    so the data properties of Serializer and ListSerializer are wrapped once per process.
+    """
+    for serializer_class in (Serializer, ListSerializer):
+        fget = serializer_class.__dict__['data'].fget
+        if not getattr(fget, 'timed', False):
+            serializer_class.data = property(time_serializer_data(fget))
+
+
+class Histogram:
+    """
+    Histogram with fixed upper bounds, exported with cumulative buckets.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip([*self.buckets, '+Inf'], self.counts):
+            total += count
+            yield bound, total
+
+
+class RouteMetrics:
+    """
+    Aggregated metrics of the requests of one route and method.
+    """
+
+    def __init__(self, buckets):
+        self.duration = Histogram(buckets)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.view_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.response_bytes = 0
+
+
+class MetricsRegistry:
+    """
+    Thread-safe, in-process registry of the request metrics per route name and method.
+
+    Every process keeps its own metrics, with several worker processes each one has to be scraped
+    (or the workers' metrics are only partially visible).
+    """
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self.routes = {}
+        self.lock = threading.Lock()
+
+    def record(self, route, method, duration, timings, size):
+        with self.lock:
+            metrics = self.routes.get((route, method))
+            if metrics is None:
+                metrics = self.routes[(route, method)] = RouteMetrics(self.buckets)
+            metrics.duration.observe(duration)
+            metrics.queries.observe(timings.queries)
+            metrics.db_seconds += timings.db
+            metrics.view_seconds += timings.view
+            metrics.serializer_seconds += timings.serializer
+            metrics.response_bytes += size
+
+    def reset(self):
+        with self.lock:
+            self.routes.clear()
+
+    def export(self):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        with self.lock:
+            routes = sorted(self.routes.items())
+            lines = []
+            self.export_histogram(lines, routes, 'duration', 'coderr_request_duration_seconds', 'Duration of the requests per route.')
+            self.export_histogram(lines, routes, 'queries', 'coderr_request_db_queries', 'Database queries of the requests per route.')
+            for attribute, name, description in [
+                ('db_seconds', 'coderr_request_db_seconds_total', 'Time spent in database queries per route.'),
+                ('view_seconds', 'coderr_request_view_seconds_total', 'Time spent in the views per route.'),
+                ('serializer_seconds', 'coderr_request_serializer_seconds_total', 'Time spent in serializers per route.'),
+                ('response_bytes', 'coderr_response_bytes_total', 'Size of the response bodies per route.'),
+            ]:
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+                lines += [f'{name}{{{get_labels(*key)}}} {format_value(getattr(metrics, attribute))}' for key, metrics in routes]
+        return '\n'.join(lines) + '\n'
+
+    def export_histogram(self, lines, routes, attribute, name, description):
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+        for key, metrics in routes:
+            histogram = getattr(metrics, attribute)
+            labels = get_labels(*key)
+            for bound, count in histogram.cumulative():
+                lines.append(f'{name}_bucket{{{labels},le="{format_value(bound)}"}} {count}')
+            lines.append(f'{name}_sum{{{labels}}} {format_value(histogram.sum)}')
+            lines.append(f'{name}_count{{{labels}}} {sum(histogram.counts)}')
+
+
+def get_labels(route, method):
+    route = route.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'route="{route}",method="{method}"'
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def get_registry():
+    """
+    Returns the metrics registry of this process, created on first use.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry(get_metrics_settings()['BUCKETS'])
+    return _registry
+
+
+def get_server_timing(timings, total, size):
+    """
+    Returns the value of the Server-Timing header, durations in milliseconds.
+    """
+    entries = [
+        f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries"',
+        f'view;dur={timings.view * 1000:.1f}',
+        f'serializer;dur={timings.serializer * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ]
+    if size is not None:
+        entries.append(f'size;desc="{size} bytes"')
+    return ', '.join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    Records the database queries, database time, view time, serializer time and response size of every request.
+    The timings are sent in the Server-Timing header and aggregated per route name and method
+    into the registry exposed on /metrics.
+
+    The queries are timed with an execute wrapper instead of the debug cursor and the aggregation is a few
+    additions under a lock, so the middleware can stay enabled in production.
+    Under ASGI the sync views run in another thread with its own connections, the wrapper is installed there
+    by process_view, which runs in the view's thread, and finds the timings through the copied context.
+    Streaming responses are recorded up to their headers, their size is unknown.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = get_metrics_settings()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.registry = get_registry()
+        instrument_serializers()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token, started = self.start(request)
+        instrument_connections()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        timings, token, started = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timings.reset(token)
+        return self.finish(request, response, timings, started)
+
+    def start(self, request):
+        timings = RequestTimings()
+        request.timings = timings
+        return timings, _current_timings.set(timings), time.perf_counter()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        instrument_connections()
+        request.timings.view_started = time.perf_counter()
+
+    def finish(self, request, response, timings, started):
+        now = time.perf_counter()
+        total = now - started
+        if timings.view_started is not None:
+            timings.view = now - timings.view_started
+        size = None if response.streaming else len(response.content)
+
+        match = request.resolver_match
+        # Unknown routes and methods are grouped, so clients can't create new label values
+        route = match.url_name if match is not None and match.url_name else 'unmatched'
+        method = request.method if request.method in METHODS else 'OTHER'
+        self.registry.record(route, method, total, timings, size or 0)
+        if self.config['SERVER_TIMING']:
+            response['Server-Timing'] = get_server_timing(timings, total, size)
+        return response
+
+
+def metrics_view(request):
+    """
+    Exposes the request metrics of this process in the Prometheus text format.
+    Requires the configured token, without a token only logged-in staff users have access.
+    """
+    token = get_metrics_settings()['TOKEN']
+    if token:
+        authorization = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    elif not request.user.is_staff:
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(get_registry().export(), content_type='text/plain; version=0.0.4; charset=utf-8')
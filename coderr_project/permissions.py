@@ -1,5 +1,6 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 from freelancer_platform_app.models import OfferDetail, Order, Review
+from .authentication import is_business_user, is_customer_user
 
 
 class ReadOnly(BasePermission):
@@ -73,7 +74,7 @@ class IsOwner(BasePermission):
     Methods:
         - has_object_permission: Checks ownership for different types of objects:
             - For OfferDetail: Checks if the user owns the associated offer.
-            - For Order: Checks if the user owns the associated offer via the offer details.
+            - For Order: Checks if the user is the business user of the order.
             - For other objects: Checks if the user is directly the owner.
     """
 
@@ -81,7 +82,7 @@ class IsOwner(BasePermission):
         if isinstance(obj, OfferDetail):
             return request.user == obj.offer.user
         elif isinstance(obj, Order):
-            return request.user == obj.offer_details.offer.user
+            return request.user.pk == obj.business_user_id
         elif isinstance(obj, Review):
             return request.user == obj.reviewer
         else:
@@ -95,13 +96,15 @@ class IsBusinessUser(BasePermission):
     Methods:
         - has_permission: Returns True if the user has an associated business profile.
         - has_object_permission: Grants access to individual objects if the user has a business profile.
+
+    The profile flags are resolved once per request, by the authentication or on first use.
     """
 
     def has_permission(self, request, view):
-        return request.user.business_profile.exists()
+        return is_business_user(request.user)
 
     def has_object_permission(self, request, view, obj):
-        return request.user.business_profile.exists()
+        return is_business_user(request.user)
 
 
 class IsCustomerUser(BasePermission):
@@ -111,10 +114,12 @@ class IsCustomerUser(BasePermission):
     Methods:
         - has_permission: Returns True if the user has an associated customer profile.
         - has_object_permission: Grants access to individual objects if the user has a customer profile.
+
+    The profile flags are resolved once per request, by the authentication or on first use.
     """
 
     def has_permission(self, request, view):
-        return request.user.customer_profile.exists()
+        return is_customer_user(request.user)
 
     def has_object_permission(self, request, view, obj):
-        return request.user.customer_profile.exists()
+        return is_customer_user(request.user)
@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'coderr_project.metrics.ServerTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -71,6 +72,9 @@ CORS_ALLOWED_ORIGINS = [
     'http://localhost:4200',
 ]
 
+# Lets the frontend read the age of the statistics snapshot and the timings of the requests
+CORS_EXPOSE_HEADERS = ['Age', 'Server-Timing']
+
 ROOT_URLCONF = 'coderr_project.urls'
 
 TEMPLATES = [
@@ -103,6 +107,46 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# With several worker processes a shared cache is required (REDIS_URL, needs the redis package),
+# the LocMemCache is per process and the invalidations would only reach the process handling the change
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'coderr',
+        }
+    }
+
+# Response cache of the public offer endpoints, invalidated by signals.
+# Without a shared cache it is only enabled for single-process deployments
+# (the development server or SINGLE_PROCESS=1), other workers would serve stale offers until the timeout
+RESPONSE_CACHE = {
+    'ENABLED': bool(REDIS_URL) or DEBUG or os.environ.get('SINGLE_PROCESS') == '1',
+    'TIMEOUT': 60 * 5,
+    'ALIAS': 'default',
+}
+
+
+# Bucket boundaries of the offer facets (GET /api/offers/facets/)
+OFFER_FACETS = {
+    'PRICE_BOUNDARIES': [50, 100, 250, 500, 1000],
+    'DELIVERY_TIME_BOUNDARIES': [1, 3, 7, 14, 30],
+    'CREATOR_LIMIT': 20,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -146,7 +190,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'coderr_project.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
@@ -155,3 +199,54 @@ REST_FRAMEWORK = {
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
+
+# Resized versions of uploaded images, generated in background threads
+IMAGE_DERIVATIVES = {
+    'SIZES': {
+        'thumbnail': (160, 160),
+        'card': (480, 320),
+    },
+    'WORKERS': 2,
+    'QUALITY': 85,
+}
+
+# Server-sent event streams of order changes, see coderr_project/events.py
+EVENT_STREAM = {
+    'HEARTBEAT': 15,
+    'RETRY': 3000,
+    'BUFFER_SIZE': 1000,
+    'QUEUE_SIZE': 100,
+    'TICKET_MAX_AGE': 30,
+}
+
+# Stale-while-revalidate snapshot of the platform statistics, see freelancer_platform_app/statistics.py
+STATISTICS_SNAPSHOT = {
+    'MAX_AGE': 60,
+    'LOCK_TIMEOUT': 30,
+}
+
+# Endpoint benchmarks of 'python manage.py benchmark', see coderr_project/benchmarks.py
+BENCHMARK = {
+    'ITERATIONS': 15,
+    'THRESHOLD': 0.5,
+    'LATENCY_FLOOR_MS': 2.0,
+    'ALLOCATION_FLOOR_KIB': 64,
+    'RETRIES': 2,
+}
+
+# Server-Timing headers and per-route request metrics on /metrics, see coderr_project/metrics.py
+METRICS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    'BUCKETS': [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+    'TOKEN': os.environ.get('METRICS_TOKEN'),
+}
+
+# In-process cache of authenticated tokens, see coderr_project/authentication.py.
+# Revocations are shared through the cache ALIAS. Without a shared cache (REDIS_URL) the other
+# worker processes still accept a revoked token for up to TTL seconds
+TOKEN_CACHE = {
+    'TTL': 60,
+    'MAX_SIZE': 10000,
+    'ALIAS': 'default',
+}
@@ -1,3 +1,7 @@
+from django.contrib.auth.models import User
+from django.db.models import FilteredRelation, Q
+
+
 def create_profile(type, user, customer_model, business_model):
     """
     Creates a profile for a user based on the specified type.
@@ -17,9 +21,42 @@ def create_profile(type, user, customer_model, business_model):
         return business_model.objects.create(user=user)
 
 
+def resolve_profile(customer_model, business_model, *related, **user_lookup):
+    """
+    Retrieves the profile (customer or business) of a user together with the user in a single query.
+
+    The user's role discriminator (UserRole) selects the profile table, both profile tables are
+    LEFT JOINed on the condition of the role, so only the matching one is read.
+
+    Parameters:
+        - customer_model (Model): The model class for customer profiles.
+        - business_model (Model): The model class for business profiles.
+        - *related: Further relations of the user to load in the same query, e.g. 'rating_aggregate'.
+        - **user_lookup: Lookup selecting the user, e.g. pk=1 or username='name'.
+
+    Returns:
+        - The profile instance with its user loaded if found, otherwise None.
+        The profile type is available as profile.type.
+    """
+    customer_relation = customer_model._meta.get_field('user').remote_field.related_name
+    business_relation = business_model._meta.get_field('user').remote_field.related_name
+    users = User.objects.annotate(
+        resolved_customer_profile=FilteredRelation(customer_relation, condition=Q(role__type='customer')),
+        resolved_business_profile=FilteredRelation(business_relation, condition=Q(role__type='business')),
+    ).select_related('role', 'resolved_customer_profile', 'resolved_business_profile', *related)
+    user = users.filter(**user_lookup).first()
+    if user is None:
+        return None
+    # Unmatched filtered relations are not set on the user
+    profile = getattr(user, 'resolved_customer_profile', None) or getattr(user, 'resolved_business_profile', None)
+    if profile is not None:
+        profile.user = user
+    return profile
+
+
 def get_profile_by_user_id(id, customer_model, business_model):
     """
-    Retrieves a profile (customer or business) based on the user's ID.
+    Retrieves a profile (customer or business) based on the user's ID with a single query.
 
     Parameters:
         - id (int): The ID of the user.
@@ -27,17 +64,14 @@ def get_profile_by_user_id(id, customer_model, business_model):
         - business_model (Model): The model class for business profiles.
 
     Returns:
-        - The profile instance if found, otherwise None.
+        - The profile instance with its user loaded if found, otherwise None.
     """
-    if customer_model.objects.filter(user_id=id).first():
-        return customer_model.objects.get(user_id=id)
-    elif business_model.objects.filter(user_id=id).first():
-        return business_model.objects.get(user_id=id)
+    return resolve_profile(customer_model, business_model, pk=id)
 
 
 def get_profile_by_user_username(username, customer_model, business_model):
     """
-    Retrieves a profile (customer or business) based on the user's username.
+    Retrieves a profile (customer or business) based on the user's username with a single query.
 
     Parameters:
         - username (str): The username of the user.
@@ -45,12 +79,9 @@ def get_profile_by_user_username(username, customer_model, business_model):
         - business_model (Model): The model class for business profiles.
 
     Returns:
-        - The profile instance if found, otherwise None.
+        - The profile instance with its user loaded if found, otherwise None.
     """
-    if customer_model.objects.filter(user__username=username).first():
-        return customer_model.objects.get(user__username=username)
-    elif business_model.objects.filter(user__username=username).first():
-        return business_model.objects.get(user__username=username)
+    return resolve_profile(customer_model, business_model, username=username)
 
 
 def get_user_details(user):
@@ -67,6 +98,21 @@ def get_user_details(user):
     return data
 
 
+def get_request_user_details(context):
+    """
+    Retrieves basic details of the requesting user once per serializer context.
+
+    Parameters:
+        - context (dict): The serializer context containing the current request.
+
+    Returns:
+        - A dictionary containing the user's first name, last name, and username.
+    """
+    if 'request_user_details' not in context:
+        context['request_user_details'] = get_user_details(context['request'].user)
+    return context['request_user_details']
+
+
 def get_profile_serializer(profile, customer_serializer, business_serializer, *args, **kwargs):
     """
     Retrieves the appropriate serializer for a profile based on its type.
@@ -99,23 +145,45 @@ def get_hyperlinked_details(instance, request, serializer):
     Returns:
         - A serialized representation of the instance's details.
     """
-    details = instance.details
+    details = instance.details.all()
     serializer = serializer(details, many=True, context={'request': request})
     data = serializer.data
     return data
 
 
-def get_min_value(details, field):
+def get_min_value(instance, field, annotation):
     """
-    Retrieves the minimum value of a specified field from a set of details.
+    Retrieves the minimum value of a specified field from the details of an instance.
 
     Parameters:
-        - details (QuerySet): A queryset of details.
-        - field (str): The field for which the minimum value is to be found.
+        - instance (object): The instance whose details are evaluated.
+        - field (str): The detail field for which the minimum value is to be found.
+        - annotation (str): The name of the database annotation holding the precomputed minimum.
 
     Returns:
-        - The minimum value of the specified field.
+        - The annotated minimum if available, otherwise the minimum of the (prefetched) details.
+    """
+    if hasattr(instance, annotation):
+        return getattr(instance, annotation)
+    values = [getattr(detail, field) for detail in instance.details.all()]
+    return min(values) if values else None
+
+
+class MaintainedFieldsMixin:
+    """
+    Mixin for models with fields maintained by their own updates (signals, background jobs).
+    A full save of an existing instance doesn't write them, so it can't write back values
+    loaded before they were changed.
+
+    Attributes:
+        - maintained_fields: Names of the fields only written by their own updates.
     """
-    values = details.values_list(field)
-    min_value = values.order_by(field).first()[0]
-    return min_value
+    maintained_fields = []
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            excluded = {*self.maintained_fields, *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields if not field.primary_key and field.attname not in excluded and field.name not in excluded
+            ]
+        super().save(*args, **kwargs)
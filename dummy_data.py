@@ -4,10 +4,25 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'coderr_project.settings')
 django.setup()
 
+import argparse
 import random
+import time
+from decimal import Decimal
+from itertools import accumulate, islice
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from auth_app.models import CustomerProfile, BusinessProfile
-from freelancer_platform_app.models import Offer, OfferDetail, Order, Review
+from django.db import transaction
+from auth_app.models import CustomerProfile, BusinessProfile, UserRole
+from auth_app.search import create_profile_search_index
+from freelancer_platform_app.models import Offer, OfferDetail, Order, OrderCount, RatingAggregate, Review
+from freelancer_platform_app.search import create_search_index
+
+LOCATIONS = ['Berlin', 'Hamburg', 'München', 'Köln', 'Frankfurt', 'Stuttgart', 'Koblenz', 'Mayen', 'Cochem', 'Osnabrück']
+SERVICES = ['Webdesign', 'Web-App', 'Frontend', 'Backend', 'Hosting', 'Wartung', 'Logo-Design', 'Online-Shop', 'SEO', 'Mobile-App']
+FEATURES = ['Design', 'Responsive-Design', 'Frontend', 'Backend', 'Hosting', 'Wartung und Service', 'SEO', 'Mobile-Optimierung']
+OFFER_TYPES = ['basic', 'standard', 'premium']
+STATUS_WEIGHTS = {'completed': 60, 'in_progress': 25, 'cancelled': 15}
+RATING_WEIGHTS = [5, 7, 13, 30, 45]
 
 def add_dummy_data():
 
@@ -230,5 +245,206 @@ def add_dummy_data():
     print('Job done.')
 
 
+def chunked(iterable, size):
+    """
+    Yields lists of at most size items of the iterable.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def bulk_insert(model, objects, chunk_size):
+    """
+    Writes the objects with bulk inserts of chunk_size rows, each chunk in its own transaction.
+
+    Parameters:
+        - model (Model): The model class of the objects.
+        - objects (iterable): The unsaved objects, may be a generator.
+        - chunk_size (int): The number of rows per insert.
+
+    Returns:
+        - The number of written rows.
+    """
+    count = 0
+    for chunk in chunked(objects, chunk_size):
+        with transaction.atomic():
+            model.objects.bulk_create(chunk)
+        count += len(chunk)
+    return count
+
+
+def get_skewed_weights(count, skew):
+    """
+    Returns cumulative Zipf weights for count items, the item of rank n gets the weight 1 / n ** skew.
+    With a skew of about 1, a few items receive most of the picks, a skew of 0 picks uniformly.
+    """
+    return list(accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def create_users(prefix, count, password, chunk_size):
+    """
+    Creates count users named <prefix><n>, all sharing one password hash.
+
+    Returns:
+        - The IDs of the created users.
+    """
+    users = [User(username=f'{prefix}{index}', email=f'{prefix}{index}@example.com', password=password) for index in range(count)]
+    for chunk in chunked(users, chunk_size):
+        with transaction.atomic():
+            User.objects.bulk_create(chunk)
+    return [user.pk for user in users]
+
+
+def create_offers(rng, business_ids, offers_per_business, chunk_size):
+    """
+    Creates the offers of all business users with their three details and denormalized minimum values.
+
+    Returns:
+        - A dictionary mapping each business user's ID to the snapshots of its offer details,
+          as (detail, offer) tuples for creating orders.
+    """
+    offers = []
+    details = []
+    for business_id in business_ids:
+        for _ in range(offers_per_business):
+            service = rng.choice(SERVICES)
+            basic_price = rng.randrange(5, 30) * 10
+            basic_delivery_time = rng.randrange(1, 7)
+            offer = Offer(user_id=business_id, title=f'{service} {rng.choice(LOCATIONS)}', description=f'{service} für Ihr Unternehmen.',
+                          min_price=Decimal(basic_price), min_delivery_time=basic_delivery_time)
+            offers.append(offer)
+            for index, offer_type in enumerate(OFFER_TYPES):
+                details.append(OfferDetail(
+                    offer=offer, title=f'{offer_type.capitalize()}-{service}', offer_type=offer_type,
+                    price=Decimal(basic_price * (index + 1) + (200 if index == 2 else 0)),
+                    delivery_time_in_days=basic_delivery_time * (index + 1),
+                    revisions=rng.randrange(-1, 9), features=rng.sample(FEATURES, index + 1),
+                ))
+    bulk_insert(Offer, offers, chunk_size)
+    for detail in details:
+        detail.offer_id = detail.offer.pk
+    bulk_insert(OfferDetail, details, chunk_size)
+
+    details_by_business = {business_id: [] for business_id in business_ids}
+    for detail in details:
+        details_by_business[detail.offer.user_id].append(detail)
+    return details_by_business
+
+
+def generate_orders(rng, customer_ids, business_ids, details_by_business, orders_per_customer, cumulative_weights):
+    """
+    Yields the orders of all customers. Each customer places between 0 and twice orders_per_customer orders,
+    the business users are picked with the skewed weights. The snapshot of the offer terms is copied
+    like Order.save does, as bulk inserts bypass it.
+    """
+    statuses = list(STATUS_WEIGHTS)
+    status_weights = list(accumulate(STATUS_WEIGHTS.values()))
+    for customer_id in customer_ids:
+        count = rng.randint(0, 2 * orders_per_customer)
+        for business_id in rng.choices(business_ids, cum_weights=cumulative_weights, k=count):
+            if not details_by_business[business_id]:
+                continue
+            detail = rng.choice(details_by_business[business_id])
+            yield Order(
+                customer_user_id=customer_id, business_user_id=business_id, offer_details_id=detail.pk,
+                status=rng.choices(statuses, cum_weights=status_weights)[0], title=detail.offer.title,
+                revisions=detail.revisions, delivery_time_in_days=detail.delivery_time_in_days,
+                price=detail.price, features=detail.features, offer_type=detail.offer_type,
+            )
+
+
+def generate_reviews(rng, customer_ids, business_ids, reviews_per_customer, cumulative_weights):
+    """
+    Yields the reviews of all customers, at most one per business user and customer.
+    Each customer writes between 0 and twice reviews_per_customer reviews, the business users
+    are picked with the skewed weights and the ratings lean towards good ones.
+    """
+    ratings = [1, 2, 3, 4, 5]
+    rating_weights = list(accumulate(RATING_WEIGHTS))
+    for customer_id in customer_ids:
+        count = min(rng.randint(0, 2 * reviews_per_customer), len(business_ids))
+        reviewed = set()
+        for _ in range(count * 4):
+            if len(reviewed) == count:
+                break
+            reviewed.add(rng.choices(business_ids, cum_weights=cumulative_weights)[0])
+        for business_id in reviewed:
+            rating = rng.choices(ratings, cum_weights=rating_weights)[0]
+            yield Review(reviewer_id=customer_id, business_user_id=business_id, rating=rating, description=f'{rating} von 5 Sternen.')
+
+
+def generate_data(customers=1000, businesses=100, offers_per_business=3, orders_per_customer=5, reviews_per_customer=1,
+                  skew=1.1, seed=42, chunk_size=5000, prefix='gen', password='asdasd'):
+    """
+    Generates a synthetic, reproducible dataset for performance testing.
+
+    All rows are written with chunked bulk inserts, which send no signals. The denormalized data
+    (roles, order counters, rating aggregates and search indexes) is therefore rebuilt at the end.
+
+    Parameters:
+        - customers (int): The number of customer users.
+        - businesses (int): The number of business users.
+        - offers_per_business (int): The number of offers of every business user, each with three details.
+        - orders_per_customer (int): The average number of orders per customer.
+        - reviews_per_customer (int): The average number of reviews per customer.
+        - skew (float): The Zipf exponent distributing orders and reviews over the business users,
+          with the default a few business users receive most of them.
+        - seed (int): The seed of the random generator, the same seed produces the same data.
+        - chunk_size (int): The number of rows per bulk insert and transaction.
+        - prefix (str): The prefix of the generated usernames, e.g. 'gencustomer1' and 'genbusiness1'.
+        - password (str): The password of all generated users, hashed only once.
+    """
+    rng = random.Random(seed)
+    started = time.monotonic()
+    password = make_password(password, salt=f'{prefix}{seed}')
+
+    customer_ids = create_users(f'{prefix}customer', customers, password, chunk_size)
+    business_ids = create_users(f'{prefix}business', businesses, password, chunk_size)
+    bulk_insert(CustomerProfile, (CustomerProfile(user_id=user_id) for user_id in customer_ids), chunk_size)
+    bulk_insert(BusinessProfile, (BusinessProfile(
+        user_id=user_id, location=rng.choice(LOCATIONS), tel=str(rng.randrange(10 ** 6, 10 ** 9)),
+        description=f'{rng.choice(SERVICES)} und {rng.choice(SERVICES)} aus einer Hand.', working_hours='9-17',
+    ) for user_id in business_ids), chunk_size)
+    bulk_insert(UserRole, (UserRole(user_id=user_id, type='customer') for user_id in customer_ids), chunk_size)
+    bulk_insert(UserRole, (UserRole(user_id=user_id, type='business') for user_id in business_ids), chunk_size)
+    print(f'{customers} customers and {businesses} business users added to database.')
+
+    details_by_business = create_offers(rng, business_ids, offers_per_business, chunk_size)
+    print(f'{businesses * offers_per_business} offers added to database.')
+
+    # Shuffled ranks, so the busiest business users are not simply the first ones
+    ranked_business_ids = rng.sample(business_ids, len(business_ids))
+    cumulative_weights = get_skewed_weights(len(ranked_business_ids), skew)
+    orders = bulk_insert(Order, generate_orders(rng, customer_ids, ranked_business_ids, details_by_business, orders_per_customer, cumulative_weights), chunk_size)
+    print(f'{orders} orders added to database.')
+    reviews = bulk_insert(Review, generate_reviews(rng, customer_ids, ranked_business_ids, reviews_per_customer, cumulative_weights), chunk_size)
+    print(f'{reviews} reviews added to database.')
+
+    OrderCount.objects.reconcile()
+    RatingAggregate.objects.rebuild()
+    create_search_index()
+    create_profile_search_index()
+    print(f'Job done in {time.monotonic() - started:.1f}s.')
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Adds the demo data, or a generated dataset if any size is given.')
+    parser.add_argument('--customers', type=int, help='Number of generated customer users.')
+    parser.add_argument('--businesses', type=int, help='Number of generated business users.')
+    parser.add_argument('--offers-per-business', type=int, help='Number of offers per business user.')
+    parser.add_argument('--orders-per-customer', type=int, help='Average number of orders per customer.')
+    parser.add_argument('--reviews-per-customer', type=int, help='Average number of reviews per customer.')
+    parser.add_argument('--skew', type=float, help='Zipf exponent concentrating orders and reviews on few business users.')
+    parser.add_argument('--seed', type=int, help='Seed making the generated data reproducible.')
+    parser.add_argument('--chunk-size', type=int, help='Rows per bulk insert.')
+    parser.add_argument('--prefix', help='Prefix of the generated usernames.')
+    return {name: value for name, value in vars(parser.parse_args()).items() if value is not None}
+
+
 if __name__ == '__main__':
-    add_dummy_data()
\ No newline at end of file
+    options = parse_arguments()
+    if options:
+        generate_data(**options)
+    else:
+        add_dummy_data()
\ No newline at end of file
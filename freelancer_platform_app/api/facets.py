@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.db.models import Count, Q
+from ..models import OfferDetail
+
+
+def get_facet_settings():
+    """
+    Returns the facet settings (OFFER_FACETS), completed by their defaults.
+
+    Settings:
+        - PRICE_BOUNDARIES: Ascending boundaries of the price buckets.
+        - DELIVERY_TIME_BOUNDARIES: Ascending boundaries of the delivery time buckets (days).
+        - CREATOR_LIMIT: Maximum number of creators returned, ordered by their number of offers.
+    """
+    config = {'PRICE_BOUNDARIES': [50, 100, 250, 500, 1000], 'DELIVERY_TIME_BOUNDARIES': [1, 3, 7, 14, 30], 'CREATOR_LIMIT': 20}
+    config.update(getattr(settings, 'OFFER_FACETS', {}))
+    return config
+
+
+def get_buckets(boundaries):
+    """
+    Returns the (min, max) ranges defined by the boundaries. The first bucket has no lower
+    and the last bucket no upper limit, the lower limit is inclusive and the upper limit exclusive.
+    """
+    limits = [None, *boundaries, None]
+    return list(zip(limits[:-1], limits[1:]))
+
+
+def get_bucket_filter(field, lower, upper):
+    lookups = {}
+    if lower is not None:
+        lookups[f'{field}__gte'] = lower
+    if upper is not None:
+        lookups[f'{field}__lt'] = upper
+    return Q(**lookups)
+
+
+def get_offer_facets(queryset):
+    """
+    Counts the offers of a (filtered) queryset per price bucket, delivery time bucket,
+    offer type and creator with one grouped aggregate query.
+
+    The offers are grouped by creator, every other facet is a conditional count per creator
+    which is summed up afterwards. Prices and delivery times are bucketed by the offer's minimum values.
+    """
+    config = get_facet_settings()
+    price_buckets = get_buckets(config['PRICE_BOUNDARIES'])
+    delivery_buckets = get_buckets(config['DELIVERY_TIME_BOUNDARIES'])
+    offer_types = [offer_type for offer_type, _ in OfferDetail.TYPE_CHOICES]
+
+    aggregates = {'offer_count': Count('pk', distinct=True)}
+    for index, (lower, upper) in enumerate(price_buckets):
+        aggregates[f'price_{index}'] = Count('pk', distinct=True, filter=get_bucket_filter('min_price', lower, upper))
+    for index, (lower, upper) in enumerate(delivery_buckets):
+        aggregates[f'delivery_{index}'] = Count('pk', distinct=True, filter=get_bucket_filter('min_delivery_time', lower, upper))
+    for offer_type in offer_types:
+        aggregates[f'type_{offer_type}'] = Count('pk', distinct=True, filter=Q(details__offer_type=offer_type))
+
+    rows = list(queryset.order_by().values('user_id').annotate(**aggregates))
+
+    def total(key):
+        return sum(row[key] for row in rows)
+
+    creators = sorted(rows, key=lambda row: (-row['offer_count'], row['user_id']))[:config['CREATOR_LIMIT']]
+    return {
+        'count': total('offer_count'),
+        'price': [
+            {'min': lower, 'max': upper, 'count': total(f'price_{index}')}
+            for index, (lower, upper) in enumerate(price_buckets)
+        ],
+        'delivery_time': [
+            {'min': lower, 'max': upper, 'count': total(f'delivery_{index}')}
+            for index, (lower, upper) in enumerate(delivery_buckets)
+        ],
+        'offer_type': [
+            {'offer_type': offer_type, 'count': total(f'type_{offer_type}')}
+            for offer_type in offer_types
+        ],
+        'creator': [
+            {'creator_id': row['user_id'], 'count': row['offer_count']}
+            for row in creators
+        ],
+    }
@@ -1,5 +1,8 @@
+from django.db.models.expressions import RawSQL
 from django_filters import rest_framework as filters
-from ..models import Offer
+from rest_framework.filters import SearchFilter
+from ..models import Offer, Order, Review
+from ..search import SEARCH_TABLE, search_index_available, get_match_expression
 
 
 class OfferFilter(filters.FilterSet):
@@ -9,7 +12,9 @@ class OfferFilter(filters.FilterSet):
     Filters:
         - creator_id: Filters offers by the ID of the user who created them.
         - min_price: Filters offers where the minimum price of their details is less than or equal to a specified value.
-        - max_delivery_time: Filters offers where the maximum delivery time of their details is less than or equal to a specified value.
+        - max_delivery_time: Filters offers where the minimum delivery time of their details is less than or equal to a specified value.
+
+    Both value filters use the indexed, denormalized columns on Offer instead of joining the details.
     """
 
     creator_id = filters.NumberFilter(field_name='user_id')
@@ -21,15 +26,82 @@ class OfferFilter(filters.FilterSet):
         Filters the queryset to include offers with at least one detail 
         having a price less than or equal to the specified value.
         """
-        return queryset.filter(details__price__lte=value)
+        return queryset.filter(min_price__lte=value)
 
     def filter_max_delivery_time(self, queryset, name, value):
         """
         Filters the queryset to include offers with at least one detail 
         having a delivery time less than or equal to the specified value.
         """
-        return queryset.filter(details__delivery_time_in_days__lte=value)
+        return queryset.filter(min_delivery_time__lte=value)
 
     class Meta:
         model = Offer
         fields = ['creator_id', 'min_price', 'max_delivery_time']
+
+
+class OrderFilter(filters.FilterSet):
+    """
+    Filter class for filtering orders by status and creation date.
+
+    Filters:
+        - status: Filters orders by their status.
+        - created_after: Filters orders created at or after a date and time (ISO 8601).
+        - created_before: Filters orders created before a date and time (ISO 8601).
+    """
+
+    status = filters.ChoiceFilter(choices=Order.STATUS_CHOICES)
+    created_after = filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+
+    class Meta:
+        model = Order
+        fields = ['status', 'created_after', 'created_before']
+
+
+class ReviewFilter(filters.FilterSet):
+    """
+    Filter class for filtering reviews by business user and reviewer.
+
+    Filters:
+        - business_user_id: Filters reviews by the ID of the reviewed business user.
+        - reviewer_id: Filters reviews by the ID of the reviewer.
+
+    Both filters compare the IDs directly instead of validating the users with an extra query.
+    """
+
+    business_user_id = filters.NumberFilter(field_name='business_user_id')
+    reviewer_id = filters.NumberFilter(field_name='reviewer_id')
+
+    class Meta:
+        model = Review
+        fields = ['business_user_id', 'reviewer_id']
+
+
+class OfferSearchFilter(SearchFilter):
+    """
+    Search backend for offers using the FTS5 search index on title and description.
+
+    Every search term is matched as prefix. Results are ranked by relevance (BM25, title weighted higher)
+    unless an explicit ordering is requested. Falls back to the LIKE-based SearchFilter on the view's
+    search_fields if the search index is not available.
+    """
+    title_weight = 10.0
+    description_weight = 1.0
+
+    def filter_queryset(self, request, queryset, view):
+        if not search_index_available():
+            return super().filter_queryset(request, queryset, view)
+
+        match = get_match_expression(self.get_search_terms(request))
+        if not match:
+            return queryset
+
+        table = queryset.model._meta.db_table
+        rank = RawSQL(
+            f'SELECT bm25({SEARCH_TABLE}, %s, %s) FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s AND {SEARCH_TABLE}.rowid = {table}.id',
+            [self.title_weight, self.description_weight, match]
+        )
+        matches = RawSQL(f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [match])
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank).order_by('search_rank', '-id')
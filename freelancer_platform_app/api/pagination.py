@@ -1,4 +1,13 @@
+import base64
+import json
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db.models import DateTimeField, DecimalField, Q
+from django.utils.dateparse import parse_datetime
 from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class OfferPagination(pagination.PageNumberPagination):
@@ -13,3 +22,210 @@ class OfferPagination(pagination.PageNumberPagination):
     page_size = 6
     page_size_query_param = 'page_size'
     max_page_size = 12
+
+
+class CursorPaginationMixin:
+    """
+    Mixin for generic views switching to keyset pagination if requested with '?pagination=cursor'
+    or a cursor parameter, otherwise the view's pagination_class is used (None for an unpaginated list).
+
+    Attributes:
+        - cursor_pagination_class: The keyset pagination class of the cursor mode.
+    """
+    cursor_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or self.cursor_pagination_class.cursor_query_param in params:
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Keyset (cursor) pagination over a composite (field, id) key.
+
+    Pages are selected with a WHERE clause on the last seen key instead of an OFFSET,
+    and no COUNT is executed, so deep pages cost the same as the first one
+    and rows inserted concurrently never shift the following pages.
+
+    Attributes:
+        - page_size: Default number of items per page.
+        - page_size_query_param: Query parameter name for customizing the page size.
+        - max_page_size: Maximum number of items allowed per page.
+        - cursor_query_param: Query parameter name holding the opaque cursor.
+        - ordering_query_param: Query parameter name for choosing the ordering.
+        - ordering_fields: Fields which can be used as the first part of the key.
+        - ordering: Default ordering, e.g. '-updated_at'.
+    """
+    page_size = 6
+    page_size_query_param = 'page_size'
+    max_page_size = 12
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    ordering_fields = []
+    ordering = None
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Returns one page of the queryset, starting after (or before) the key stored in the cursor.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request)
+        self.model = queryset.model
+
+        reverse, key = self.decode_cursor(request)
+        # Rows without a value for the ordering field cannot be positioned by a key
+        queryset = queryset.exclude(**{f'{self.field}__isnull': True})
+        if key is not None:
+            queryset = queryset.filter(self.get_key_filter(key, reverse))
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = has_more if not reverse else key is not None
+        self.has_previous = key is not None if not reverse else has_more
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        """
+        Returns the requested page size, clamped to the configured maximum.
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_ordering(self, request):
+        """
+        Returns the ordering field and direction, falling back to the default ordering
+        if the requested one is not part of ordering_fields.
+        """
+        ordering = request.query_params.get(self.ordering_query_param, self.ordering)
+        if ordering.lstrip('-') not in self.ordering_fields:
+            ordering = self.ordering
+        return ordering.lstrip('-'), ordering.startswith('-')
+
+    def get_order_by(self, reverse):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        return [f'{prefix}{self.field}', f'{prefix}id']
+
+    def get_key_filter(self, key, reverse):
+        """
+        Builds the WHERE clause selecting all rows after the given (value, id) key.
+        """
+        value, pk = key
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        return Q(**{f'{self.field}__{lookup}': value}) | Q(**{self.field: value, f'id__{lookup}': pk})
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, item, reverse):
+        """
+        Returns the URL of the neighbouring page, using the key of the given item as position.
+        """
+        value = getattr(item, self.field)
+        value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        cursor = json.dumps({'v': value, 'id': item.pk, 'r': reverse}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(cursor.encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        """
+        Returns the direction and (value, id) key stored in the cursor of the request.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            return bool(cursor['r']), (self.parse_value(cursor['v']), int(cursor['id']))
+        except (TypeError, ValueError, KeyError, ArithmeticError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_value(self, value):
+        """
+        Converts a value from the cursor back into the type of the ordering field.
+        """
+        field = self.model._meta.get_field(self.field)
+        if isinstance(field, DateTimeField):
+            parsed = parse_datetime(value)
+            if parsed is None:
+                raise ValueError(value)
+            return parsed
+        if isinstance(field, DecimalField):
+            return Decimal(value)
+        return field.to_python(value)
+
+
+class OfferCursorPagination(KeysetPagination):
+    """
+    Keyset pagination for the offers feed, ordered by (updated_at, id) or (min_price, id).
+    """
+    page_size = 6
+    max_page_size = 12
+    ordering_fields = ['updated_at', 'min_price']
+    ordering = '-updated_at'
+
+
+class OrderCursorPagination(KeysetPagination):
+    """
+    Keyset pagination for the order lists, ordered by (created_at, id).
+    """
+    page_size = 20
+    max_page_size = 100
+    ordering_fields = ['created_at']
+    ordering = '-created_at'
+
+
+class ReviewCursorPagination(KeysetPagination):
+    """
+    Keyset pagination for the review list, ordered by (updated_at, id) or (rating, id).
+    """
+    page_size = 10
+    max_page_size = 50
+    ordering_fields = ['updated_at', 'rating']
+    ordering = '-updated_at'
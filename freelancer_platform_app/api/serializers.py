@@ -1,6 +1,11 @@
 from rest_framework import serializers
+from django.db import transaction
+from django.utils import timezone
 from ..models import Offer, OfferDetail, Order, Review
-from coderr_project.utils import get_hyperlinked_details, get_user_details, get_min_value
+from ..search import index_offers
+from coderr_project.cache import invalidate_response_cache
+from coderr_project.images import get_derivative_urls
+from coderr_project.utils import get_hyperlinked_details, get_request_user_details, get_min_value, get_user_details
 from django.contrib.auth.models import User
 from django.contrib.auth.models import AnonymousUser
 from auth_app.models import BusinessProfile
@@ -35,6 +40,33 @@ class DetailsHyperlinkedSerializer(DetailsSerializer, serializers.HyperlinkedMod
 
 
 
+class OfferListSerializer(serializers.ListSerializer):
+    """
+    List serializer for Offer model. Creates many offers with their details
+    in one transaction using a single bulk insert per table.
+    """
+
+    def create(self, validated_data):
+        """
+        Creates the offers and their details for the current user.
+        As bulk inserts send no signals, the minimum values, the search index and the response cache
+        are maintained explicitly.
+        """
+        user = self.context['request'].user
+        with transaction.atomic():
+            details_data = [offer_data.pop('details') for offer_data in validated_data]
+            offers = Offer.objects.bulk_create([Offer(user=user, **offer_data) for offer_data in validated_data])
+            OfferDetail.objects.bulk_create([
+                OfferDetail(offer=offer, **detail)
+                for offer, offer_details in zip(offers, details_data)
+                for detail in offer_details
+            ])
+            Offer.objects.filter(pk__in=[offer.pk for offer in offers]).refresh_min_values()
+            index_offers(offers)
+            transaction.on_commit(lambda: invalidate_response_cache('offers'))
+        return offers
+
+
 class OfferSerializer(serializers.ModelSerializer):
     """
     Serializer for Offer model. Handles serialization of offer details
@@ -46,19 +78,21 @@ class OfferSerializer(serializers.ModelSerializer):
         model = Offer
         fields = ['id', 'user', 'title', 'image', 'description', 'created_at', 'updated_at', 'details']
         read_only_fields = ['user', 'created_at', 'updated_at', 'min_price', 'min_delivery_time']
+        list_serializer_class = OfferListSerializer
 
     def to_representation(self, instance):
         """
         Customizes the representation of the Offer model.
-        Adds user details, hyperlinked details, and minimum price/delivery time for GET requests.
+        Adds user details, hyperlinked details, minimum price/delivery time and image derivatives for GET requests.
         """
         representation = super().to_representation(instance)
         if self.context['request'].method == 'GET':
             if not isinstance(self.context['request'].user, AnonymousUser):
-                representation['user_details'] = get_user_details(self.context['request'].user)
+                representation['user_details'] = get_request_user_details(self.context)
             representation['details'] = get_hyperlinked_details(instance, self.context['request'], DetailsHyperlinkedSerializer)
-            representation['min_price'] = get_min_value(instance.details, 'price')
-            representation['min_delivery_time'] = get_min_value(instance.details, 'delivery_time_in_days')
+            representation['min_price'] = get_min_value(instance, 'price', 'min_price')
+            representation['min_delivery_time'] = get_min_value(instance, 'delivery_time_in_days', 'min_delivery_time')
+            representation['image_derivatives'] = get_derivative_urls(instance.image, instance.image_derivative_sizes, self.context['request'])
 
         return representation
 
@@ -86,9 +120,10 @@ class OfferSerializer(serializers.ModelSerializer):
         """
         detail_data = validated_data.pop('details')
         user = self.context['request'].user
-        offer = Offer.objects.create(user=user, **validated_data)
-        for detail in detail_data:
-            OfferDetail.objects.create(offer=offer, **detail)
+        with transaction.atomic():
+            offer = Offer.objects.create(user=user, **validated_data)
+            for detail in detail_data:
+                OfferDetail.objects.create(offer=offer, **detail)
         return offer
 
 
@@ -107,36 +142,91 @@ class OfferDetailSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """
         Customizes the representation of the Offer model.
-        Adds user details and minimum price/delivery time for GET requests.
+        Adds user details, minimum price/delivery time and image derivatives for GET requests.
         """
         representation = super().to_representation(instance)
         if self.context['request'].method == 'GET':
-            representation['user_details'] = get_user_details(self.context['request'].user)
-            representation['min_price'] = get_min_value(instance.details, 'price')
-            representation['min_delivery_time'] = get_min_value(instance.details, 'delivery_time_in_days')
+            representation['user_details'] = get_request_user_details(self.context)
+            representation['min_price'] = get_min_value(instance, 'price', 'min_price')
+            representation['min_delivery_time'] = get_min_value(instance, 'delivery_time_in_days', 'min_delivery_time')
+            representation['image_derivatives'] = get_derivative_urls(instance.image, instance.image_derivative_sizes, self.context['request'])
         return representation
 
+    def validate(self, attrs):
+        """
+        Validates that every submitted detail matches an existing detail of the offer by its 'offer_type',
+        before the update transaction begins.
+        """
+        offer_types = set(self.instance.details.values_list('offer_type', flat=True)) if self.instance else set()
+        for data in attrs.get('details', []):
+            offer_type = data.get('offer_type')
+            if offer_type not in offer_types:
+                raise serializers.ValidationError({'details': f'Offer-detail of type "{offer_type}" not found.'})
+        return attrs
+
     def update(self, instance, validated_data):
         """
         Updates an offer, including nested details if provided.
-        Matches details based on their 'offer_type'.
+        Matches details based on their 'offer_type'. All details are loaded with one query
+        and the changed ones are written with a single bulk update. Only changed columns
+        are written and everything happens in one transaction.
         """
-        if 'details' in validated_data:
-            detail_data = validated_data.pop('details')
-            for detail in detail_data:
-                offer_type = detail.get('offer_type')
-                detail_instance = instance.details.filter(offer_type=offer_type).first()
-                super().update(detail_instance, detail)
-        instance = super().update(instance, validated_data)
+        detail_data = validated_data.pop('details', [])
+        with transaction.atomic():
+            details = {detail.offer_type: detail for detail in instance.details.all()}
+            changed_details, detail_fields = self.update_details(details, detail_data)
+
+            offer_fields = [field for field, value in validated_data.items() if getattr(instance, field) != value]
+            for field in offer_fields:
+                setattr(instance, field, validated_data[field])
+
+            if changed_details:
+                now = timezone.now()
+                for detail in changed_details:
+                    detail.updated_at = now
+                OfferDetail.objects.bulk_update(changed_details, [*detail_fields, 'updated_at'])
+                instance.min_price = min(detail.price for detail in details.values())
+                instance.min_delivery_time = min(detail.delivery_time_in_days for detail in details.values())
+                offer_fields += ['min_price', 'min_delivery_time']
+
+            if offer_fields:
+                instance.save(update_fields=[*offer_fields, 'updated_at'])
+
+            # Bulk updates send no signals
+            namespaces = [f'offerdetails:{detail.pk}' for detail in changed_details]
+            if changed_details:
+                namespaces += ['offers', f'offers:{instance.pk}']
+            transaction.on_commit(lambda: invalidate_response_cache(*namespaces))
         return instance
 
+    def update_details(self, details, detail_data):
+        """
+        Applies the submitted detail data to the loaded details, matched by 'offer_type'
+        (validated to exist by validate()).
+
+        Returns:
+            - The list of changed details and the set of changed fields.
+        """
+        changed_details = []
+        changed_fields = set()
+        for data in detail_data:
+            detail = details[data['offer_type']]
+            fields = [field for field, value in data.items() if getattr(detail, field) != value]
+            for field in fields:
+                setattr(detail, field, data[field])
+            if fields and detail not in changed_details:
+                changed_details.append(detail)
+            changed_fields.update(fields)
+        return changed_details, changed_fields
+
 
 class OrderSerializer(serializers.ModelSerializer):
     """
-    Serializer for Order model. Adds a method field for the business user
+    Serializer for Order model. Serializes the snapshot of the offer terms stored on the order
     and restricts writable fields to essential attributes for order creation.
     """
-    business_user = serializers.SerializerMethodField()
+
+    price = serializers.DecimalField(max_digits=15, decimal_places=2, coerce_to_string=False, read_only=True)
 
     class Meta:
         model = Order
@@ -146,17 +236,27 @@ class OrderSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """
         Creates a new order for the current user based on the selected offer detail.
+        The terms of the offer detail are copied onto the order.
         """
-        details = OfferDetail.objects.get(pk=self.initial_data.get('offer_detail_id'))
+        details = OfferDetail.objects.select_related('offer').get(pk=self.initial_data.get('offer_detail_id'))
         user = self.context['request'].user
         order = Order.objects.create(customer_user=user, offer_details=details)
         return order
 
-    def get_business_user(self, obj):
-        """
-        Returns the ID of the business user associated with the order.
-        """
-        return obj.business_user.id
+
+class OrderStatusTransitionSerializer(serializers.Serializer):
+    """
+    Serializer validating a bulk status transition of orders.
+    """
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+    from_status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    to_status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
+    def validate(self, attrs):
+        if attrs['from_status'] == attrs['to_status']:
+            raise serializers.ValidationError('from_status and to_status must differ.')
+        attrs['ids'] = list(dict.fromkeys(attrs['ids']))
+        return attrs
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -169,6 +269,16 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ['id', 'business_user', 'reviewer', 'rating', 'description', 'created_at', 'updated_at']
         read_only_fields = ['business_user', 'reviewer', 'created_at', 'updated_at']
 
+    def to_representation(self, instance):
+        """
+        Customizes the representation of the Review model.
+        Adds the details of the reviewer for GET requests.
+        """
+        representation = super().to_representation(instance)
+        if self.context['request'].method == 'GET':
+            representation['reviewer_details'] = get_user_details(instance.reviewer)
+        return representation
+
     def validate(self, attrs):
         reviewer = self.context['request'].user
 
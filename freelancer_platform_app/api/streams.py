@@ -0,0 +1,65 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from coderr_project.authentication import CachedTokenAuthentication
+from coderr_project.events import create_stream_ticket, get_event_settings, get_ticket_user_id, stream_events
+
+
+async def authenticate_stream(request):
+    """
+    Returns the user of the stream, authenticated by the 'Authorization: Token <key>' header
+    like every other endpoint, or by a stream ticket passed as '?ticket=' (see OrderEventTicketView).
+    Raises NotAuthenticated or AuthenticationFailed.
+    """
+    ticket = request.GET.get('ticket')
+    if ticket:
+        user_id = get_ticket_user_id(ticket)
+        user = await User.objects.filter(pk=user_id, is_active=True).afirst() if user_id else None
+        if user is None:
+            raise AuthenticationFailed('Invalid or expired ticket.')
+        return user
+    result = await sync_to_async(CachedTokenAuthentication().authenticate)(request)
+    if result is None:
+        raise NotAuthenticated()
+    return result[0]
+
+
+class OrderEventTicketView(APIView):
+    """
+    Issues a short-lived ticket for opening the order event stream with EventSource,
+    which can't send the token header. The ticket is only valid for the stream.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        data = {'ticket': create_stream_ticket(request.user.pk), 'expires_in': get_event_settings()['TICKET_MAX_AGE']}
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+@require_GET
+async def order_event_stream(request):
+    """
+    Streams the events of the orders of the authenticated customer or business user as server-sent events
+    ('order.created', 'order.status_changed'). A reconnecting client resumes after its Last-Event-ID,
+    browsers reconnect with a new ticket.
+
+    The view is asynchronous, an idle stream only holds a coroutine and a queue.
+    It has to be served through the ASGI application (coderr_project/asgi.py).
+    """
+    try:
+        user = await authenticate_stream(request)
+    except APIException as exc:
+        return JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    response = StreamingHttpResponse(stream_events(user.pk, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
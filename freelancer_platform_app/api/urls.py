@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
-from .views import OfferListView, OfferDetailView, DetailsView, OrderViewSet, ReviewViewSet, BaseInfoView, OrderCountView, CompletedOrderCountView
+from .streams import OrderEventTicketView, order_event_stream
+from .views import OfferListView, OfferBulkCreateView, OfferFacetView, OfferDetailView, DetailsView, OrderViewSet, OrderBulkStatusView, ReviewViewSet, BaseInfoView, OrderCountView, CompletedOrderCountView, OrderCountListView
 
 
 router = routers.DefaultRouter()
@@ -8,11 +9,18 @@ router.register(r'orders', OrderViewSet, basename='orders')
 router.register(r'reviews', ReviewViewSet, basename='reviews')
 
 urlpatterns = [
+    # Registered before the router, whose order detail route would match them
+    path('orders/bulk-status/', OrderBulkStatusView.as_view(), name='orders-bulk-status'),
+    path('orders/events/', order_event_stream, name='orders-events'),
+    path('orders/events/ticket/', OrderEventTicketView.as_view(), name='orders-events-ticket'),
     path('', include(router.urls)),
     path('offers/', OfferListView.as_view(), name='offers'),
+    path('offers/bulk/', OfferBulkCreateView.as_view(), name='offers-bulk'),
+    path('offers/facets/', OfferFacetView.as_view(), name='offers-facets'),
     path('offers/<int:pk>/', OfferDetailView.as_view(), name='offers-detail'),
     path('offerdetails/<int:pk>/', DetailsView.as_view(), name='offerdetail-detail'),
     path('base-info/', BaseInfoView.as_view(), name='base-info'),
     path('order-count/<int:pk>/', OrderCountView.as_view(), name='order-count'),
     path('completed-order-count/<int:pk>/', CompletedOrderCountView.as_view(), name='completed-order-count'),
+    path('order-counts/', OrderCountListView.as_view(), name='order-counts'),
 ]
@@ -2,35 +2,46 @@ from rest_framework import status, generics, viewsets, filters
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Min, Avg
 from django.contrib.auth.models import User
-from auth_app.models import BusinessProfile
-from ..models import Offer, OfferDetail, Order, Review
-from .serializers import OfferSerializer, OfferDetailSerializer, DetailsSerializer, OrderSerializer, ReviewSerializer
-from .filters import OfferFilter
-from .pagination import OfferPagination
-from rest_framework.authentication import TokenAuthentication
+from ..models import Offer, OfferDetail, Order, OrderCount, Review
+from .serializers import OfferSerializer, OfferDetailSerializer, DetailsSerializer, OrderSerializer, OrderStatusTransitionSerializer, ReviewSerializer
+from .filters import OfferFilter, OfferSearchFilter, OrderFilter, ReviewFilter
+from .pagination import CursorPaginationMixin, OfferPagination, OfferCursorPagination, OrderCursorPagination, ReviewCursorPagination
+from .facets import get_offer_facets
+from ..statistics import get_base_info
+from coderr_project.authentication import CachedTokenAuthentication, is_business_user
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from coderr_project.cache import CachedResponseMixin
+from coderr_project.conditional import ConditionalGetMixin
 from coderr_project.permissions import ReadOnly, Forbidden, IsAdmin, IsStaff, IsOwner, IsBusinessUser, IsCustomerUser
 
 
-class OfferListView(generics.ListCreateAPIView):
+class OfferListView(CursorPaginationMixin, CachedResponseMixin, generics.ListCreateAPIView):
     """
     Handles listing and creating offers. Supports filtering, searching, and pagination.
-    Different permissions are applied based on the request method.
+    Different permissions are applied based on the request method. GET responses are cached.
+    Page-number pagination is used by default, keyset pagination with '?pagination=cursor'.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = []
 
-    queryset = Offer.objects.all().annotate(min_price=Min('details__price'))  # Annotates the offers with their minimum price
+    # Prefetches the details of the offers, newest first unless searched or ordered otherwise
+    queryset = Offer.objects.all().prefetch_related('details').order_by('-updated_at', '-id')
     serializer_class = OfferSerializer
 
     # Enables filtering, searching, and ordering for offers
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, OfferSearchFilter, filters.OrderingFilter]
     filterset_class = OfferFilter
-    ordering_fields = ['updated_at', 'min_price']
+    ordering_fields = ['updated_at', 'min_price', 'min_delivery_time']
     search_fields = ['title', 'description']
     pagination_class = OfferPagination
+    cursor_pagination_class = OfferCursorPagination
+
+    # Responses to authenticated users contain their user details
+    cache_user_specific = True
+
+    def get_cache_namespaces(self):
+        return ['offers']
 
     def get_permissions(self):
         """
@@ -45,17 +56,101 @@ class OfferListView(generics.ListCreateAPIView):
         return super(OfferListView, self).get_permissions()
 
 
-class OfferDetailView(generics.RetrieveUpdateDestroyAPIView):
+class OfferFacetView(CachedResponseMixin, generics.GenericAPIView):
+    """
+    Returns facet counts (price, delivery time, offer type and creator) for the offer catalogue.
+    Accepts the same filter and search parameters as the offer list. Responses are cached.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [AllowAny]
+
+    queryset = Offer.objects.all()
+
+    filter_backends = [DjangoFilterBackend, OfferSearchFilter]
+    filterset_class = OfferFilter
+    search_fields = ['title', 'description']
+
+    def get_cache_namespaces(self):
+        return ['offers']
+
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Computes the facets of the filtered offers with one grouped aggregate query.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(get_offer_facets(queryset), status=status.HTTP_200_OK)
+
+
+class OfferBulkCreateView(APIView):
+    """
+    Creates many offers at once. Every offer is validated like a single offer,
+    all valid offers are written in one transaction with batched inserts.
+    Returns a result for every submitted offer.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAdmin | IsBusinessUser]
+
+    max_offers = 500
+
+    def post(self, request):
+        """
+        Validates and creates the submitted list of offers.
+        - 201: All offers were created.
+        - 207: Some offers were created, the others are invalid.
+        - 400: No offer was created.
+        """
+        if not isinstance(request.data, list) or not request.data:
+            return Response({'detail': 'Expected a non-empty list of offers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.max_offers:
+            return Response({'detail': f'At most {self.max_offers} offers can be created at once.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        context = {'request': request}
+        offer_serializers = [OfferSerializer(data=item, context=context) for item in request.data]
+        valid = [serializer.validated_data for serializer in offer_serializers if serializer.is_valid()]
+        offers = []
+        if valid:
+            offers = OfferSerializer(many=True, context=context).create(valid)
+
+        results = []
+        created = iter(offers)
+        for index, serializer in enumerate(offer_serializers):
+            if serializer.errors:
+                results.append({'index': index, 'status': 'invalid', 'errors': serializer.errors})
+            else:
+                results.append({'index': index, 'status': 'created', 'id': next(created).pk})
+
+        if len(offers) == len(offer_serializers):
+            response_status = status.HTTP_201_CREATED
+        elif offers:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        data = {'created': len(offers), 'invalid': len(offer_serializers) - len(offers), 'results': results}
+        return Response(data, status=response_status)
+
+
+class OfferDetailView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Handles retrieving, updating, and deleting specific offers.
-    Applies dynamic permissions based on the request method.
+    Applies dynamic permissions based on the request method. GET responses are cached
+    and support conditional requests.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = []
 
-    queryset = Offer.objects.all()
+    queryset = Offer.objects.all().prefetch_related('details')
     serializer_class = OfferDetailSerializer
 
+    cache_user_specific = True
+    conditional_user_specific = True
+    last_modified_fields = ['updated_at', 'details__updated_at']
+
+    def get_cache_namespaces(self):
+        return [f'offers:{self.kwargs["pk"]}']
+
     def destroy(self, request, *args, **kwargs):
         """
         Deletes the specified offer and returns a success response.
@@ -80,39 +175,67 @@ class OfferDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super(OfferDetailView, self).get_permissions()
 
 
-class DetailsView(generics.RetrieveUpdateDestroyAPIView):
+class DetailsView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Handles retrieving, updating, and deleting offer details.
-    Permissions are set to allow admins, owners, and read-only access.
+    Permissions are set to allow admins, owners, and read-only access. GET responses are cached
+    and support conditional requests.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAdmin | IsOwner | ReadOnly]
 
     queryset = OfferDetail.objects.all()
     serializer_class = DetailsSerializer
 
+    def get_cache_namespaces(self):
+        return [f'offerdetails:{self.kwargs["pk"]}']
+
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Manages orders, including listing, creating, and updating them.
     Filters accessible orders based on the user's role (customer or business user).
+    Supports filtering by status and creation date, and conditional requests with collection-level validators for the list.
+    The list is paginated with keyset pagination ordered by (created_at, id), newest first.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = []
 
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
 
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = OrderFilter
+    pagination_class = OrderCursorPagination
+
+    def get_role(self):
+        """
+        Returns the role ('customer' or 'business') whose orders are listed.
+        It can be chosen with '?role=', by default business users see the orders they received
+        and all other users the orders they placed.
+        """
+        if not hasattr(self, '_role'):
+            role = self.request.query_params.get('role')
+            if role not in ('customer', 'business'):
+                role = 'business' if is_business_user(self.request.user) else 'customer'
+            self._role = role
+        return self._role
+
     def get_queryset(self):
         """
-        Returns orders relevant to the requesting user.
+        Returns orders relevant to the requesting user, newest first by (created_at, id).
         - Superusers see all orders.
-        - Customers and business users see orders they are involved in.
+        - Customers and business users see the orders of their role. Each role is
+          scoped by a single column, so the query is served by its composite index.
         """
         user = self.request.user
         if user.is_superuser:
-            return Order.objects.all()
-        return Order.objects.filter(customer_user=user) | Order.objects.filter(offer_details__offer__user=user)
+            orders = Order.objects.all()
+        elif self.get_role() == 'business':
+            orders = Order.objects.filter(business_user=user)
+        else:
+            orders = Order.objects.filter(customer_user=user)
+        return orders.order_by('-created_at', '-id')
 
     def get_permissions(self):
         """
@@ -144,21 +267,64 @@ class OrderViewSet(viewsets.ModelViewSet):
         return Response({}, status=status.HTTP_204_NO_CONTENT)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class OrderBulkStatusView(APIView):
+    """
+    Moves many orders of the requesting business user from one status to another at once.
+    The transition is a single conditional UPDATE, so orders changed concurrently are reported
+    as conflicts instead of being overwritten. Returns a result for every submitted order.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAdmin | IsBusinessUser]
+
+    def post(self, request):
+        """
+        Transitions the submitted orders and reports the outcome per order:
+        - updated: The order was moved to the new status.
+        - conflict: The order is not in the expected status, its current status is returned.
+        - not_found: The order does not exist or belongs to another business user.
+        """
+        serializer = OrderStatusTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        from_status = serializer.validated_data['from_status']
+        to_status = serializer.validated_data['to_status']
+
+        orders = Order.objects.all() if request.user.is_superuser else Order.objects.filter(business_user=request.user)
+        updated = set(orders.transition_status(ids, from_status, to_status))
+        current = dict(orders.filter(pk__in=set(ids) - updated).values_list('pk', 'status'))
+
+        results = []
+        for pk in ids:
+            if pk in updated:
+                results.append({'id': pk, 'status': 'updated'})
+            elif pk in current:
+                results.append({'id': pk, 'status': 'conflict', 'current_status': current[pk]})
+            else:
+                results.append({'id': pk, 'status': 'not_found'})
+        data = {'updated': len(updated), 'failed': len(ids) - len(updated), 'results': results}
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ReviewViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Handles listing, creating, updating, and deleting reviews.
-    Supports filtering by business user and reviewer, and ordering by date or rating.
+    Supports filtering by business user and reviewer.
+    Supports conditional requests with collection-level validators for the list, covering the embedded reviewer details.
+    The list is paginated with keyset pagination ordered by (updated_at, id) or (rating, id) ('?ordering=').
+    The reviewer's details are loaded in the same query.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = []
 
-    queryset = Review.objects.all()
+    queryset = Review.objects.select_related('reviewer')
     serializer_class = ReviewSerializer
 
-    # Enables filtering and ordering for reviews
-    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
-    filterset_fields = ['business_user_id', 'reviewer_id']
-    ordering_fields = ['updated_at', 'rating']
+    # Enables filtering for reviews, the ordering is applied by the pagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ReviewFilter
+    pagination_class = ReviewCursorPagination
+    # The reviewer details have no timestamp, their values are part of the validators
+    embedded_fields = ['reviewer__username', 'reviewer__first_name', 'reviewer__last_name']
 
     def get_permissions(self):
         """
@@ -186,23 +352,25 @@ class BaseInfoView(APIView):
     """
     Provides aggregated statistics about the platform, such as review count, average rating,
     number of business profiles, and total offers.
+    The statistics are served from a snapshot which is recomputed in the background once it is stale,
+    the Age header holds the age of the snapshot in seconds.
     """
     def get(self, request):
-        # Retrieve platform statistics
-        review_count = Review.objects.count()
-        average_rating = Review.objects.aggregate(avg_rating=Avg('rating'))['avg_rating']
-        average_rating = round(average_rating, 1) if average_rating is not None else 0.0
-        business_profile_count = BusinessProfile.objects.count()
-        offer_count = Offer.objects.count()
-
-        # Return the aggregated data
-        data = {
-            "review_count": review_count,
-            "average_rating": average_rating,
-            "business_profile_count": business_profile_count,
-            "offer_count": offer_count,
-        }
-        return Response(data, status=status.HTTP_200_OK)
+        data, age = get_base_info()
+        response = Response(data, status=status.HTTP_200_OK)
+        response['Age'] = str(age)
+        return response
+
+
+def get_order_count(pk, status_field):
+    """
+    Reads one counter of a business user from the materialized order counters.
+    Returns None if the user does not exist.
+    """
+    counts = OrderCount.objects.filter(business_user_id=pk).values_list(status_field, flat=True).first()
+    if counts is None and not User.objects.filter(pk=pk).exists():
+        return None
+    return counts or 0
 
 
 class OrderCountView(APIView):
@@ -210,12 +378,10 @@ class OrderCountView(APIView):
     Returns the count of in-progress orders for a specific business user.
     """
     def get(self, request, pk):
-        try:
-            user = User.objects.get(pk=pk)
-            order_count = Order.objects.filter(offer_details__offer__user=user, status='in_progress').count()
-            return Response({'order_count': order_count}, status=status.HTTP_200_OK)
-        except:
+        order_count = get_order_count(pk, 'in_progress')
+        if order_count is None:
             return Response({'detail': 'Business user not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'order_count': order_count}, status=status.HTTP_200_OK)
 
 
 class CompletedOrderCountView(APIView):
@@ -223,9 +389,33 @@ class CompletedOrderCountView(APIView):
     Returns the count of completed orders for a specific business user.
     """
     def get(self, request, pk):
-        try:
-            user = User.objects.get(pk=pk)
-            completed_order_count = Order.objects.filter(offer_details__offer__user=user, status='completed').count()
-            return Response({'completed_order_count': completed_order_count}, status=status.HTTP_200_OK)
-        except:
+        completed_order_count = get_order_count(pk, 'completed')
+        if completed_order_count is None:
             return Response({'detail': 'Business user not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'completed_order_count': completed_order_count}, status=status.HTTP_200_OK)
+
+
+class OrderCountListView(APIView):
+    """
+    Returns the order counts of several business users at once, e.g. '?ids=1,2,3'.
+    Unknown users are omitted from the response.
+    """
+    max_ids = 100
+
+    def get(self, request):
+        try:
+            ids = [int(pk) for pk in request.query_params.get('ids', '').split(',') if pk.strip()]
+        except ValueError:
+            return Response({'detail': 'ids must be a comma-separated list of user IDs.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({'detail': 'ids is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.max_ids:
+            return Response({'detail': f'At most {self.max_ids} ids are allowed.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Users without counters have no orders, they are joined with a LEFT JOIN
+        rows = User.objects.filter(pk__in=ids).order_by('pk').values_list('pk', 'order_count__in_progress', 'order_count__completed')
+        data = [
+            {'business_user': pk, 'order_count': in_progress or 0, 'completed_order_count': completed or 0}
+            for pk, in_progress, completed in rows
+        ]
+        return Response(data, status=status.HTTP_200_OK)
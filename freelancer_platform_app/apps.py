@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FreelancerPlatformAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'freelancer_platform_app'
+
+    def ready(self):
+        from . import signals
@@ -0,0 +1,12 @@
+from coderr_project.events import publish_on_commit
+
+
+def publish_order_event(name, pk, customer_user_id, business_user_id, status, previous_status, updated_at):
+    """
+    Publishes an order event to the customer and the business user of the order
+    after the current transaction was committed.
+    """
+    publish_on_commit([customer_user_id, business_user_id], name, {
+        'id': pk, 'customer_user': customer_user_id, 'business_user': business_user_id,
+        'status': status, 'previous_status': previous_status, 'updated_at': updated_at,
+    })
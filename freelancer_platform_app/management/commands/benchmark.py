@@ -0,0 +1,105 @@
+from contextlib import redirect_stdout
+from io import StringIO
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from coderr_project.benchmarks import (
+    calibrate, compare_results, create_fixture, get_benchmark_settings, get_cases, get_unbenchmarked_routes,
+    load_baseline, merge_results, run_case, save_baseline,
+)
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks every API route on a seeded dataset in a separate test database and compares
+    the query counts, latencies and allocation peaks with the committed baseline.
+    Fails if a case regressed beyond the threshold (see coderr_project/benchmarks.py).
+    """
+    help = 'Benchmarks all API routes on a generated dataset and compares the results with the baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, help='Number of measured requests per case.')
+        parser.add_argument('--threshold', type=float, help='Allowed relative increase of latencies and allocations.')
+        parser.add_argument('--baseline', help='Path of the baseline file.')
+        parser.add_argument('--update-baseline', action='store_true', help='Writes the results as new baseline instead of comparing them.')
+        parser.add_argument('--case', action='append', dest='cases', help='Only runs the cases with this name, can be repeated.')
+
+    def handle(self, *args, **options):
+        config = get_benchmark_settings()
+        iterations = options['iterations'] or config['ITERATIONS']
+        if options['threshold'] is not None:
+            config['THRESHOLD'] = options['threshold']
+        path = options['baseline'] or config['BASELINE']
+
+        baseline = load_baseline(path)
+        if options['update_baseline'] and options['cases']:
+            raise CommandError('The baseline is always recorded for all cases, --case can\'t be combined with --update-baseline.')
+        if not options['update_baseline']:
+            if baseline is None:
+                raise CommandError(f'No baseline found at {path}, create it with --update-baseline.')
+            if baseline['dataset'] != config['DATASET']:
+                raise CommandError('The baseline was recorded on another dataset, update it with --update-baseline.')
+
+        calibration = calibrate()
+        speed = 1.0
+        if not options['update_baseline']:
+            # Limits are only relaxed on slower machines, a noisy calibration never tightens them
+            speed = max(1.0, calibration / baseline['calibration_ms'])
+            self.stdout.write(f'Calibration {calibration} ms, baseline latencies are scaled by {speed:.2f}.')
+        expected = None if options['update_baseline'] else baseline['results']
+        results = self.run_benchmarks(config, iterations, options['cases'], expected, speed)
+
+        if options['update_baseline']:
+            save_baseline(path, config['DATASET'], iterations, calibration, results)
+            self.stdout.write(self.style.SUCCESS(f'Wrote the baseline of {len(results)} cases to {path}.'))
+            return
+
+        regressions = compare_results(results, baseline['results'], config, speed)
+        if regressions:
+            raise CommandError('Performance regressions:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS(f'No regressions in {len(results)} cases.'))
+
+    def run_benchmarks(self, config, iterations, names, baseline=None, speed=1.0):
+        """
+        Seeds the dataset in a test database and measures the cases.
+        Cases regressing against the baseline are measured again up to RETRIES times.
+        """
+        from dummy_data import generate_data
+
+        debug = settings.DEBUG
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write('Seeding the dataset...')
+            with redirect_stdout(StringIO()):
+                generate_data(**config['DATASET'])
+            fixture = create_fixture()
+            cases = get_cases(fixture)
+            missing = get_unbenchmarked_routes(cases)
+            if missing:
+                raise CommandError(f'Routes without benchmark: {", ".join(sorted(missing))}')
+
+            results = {}
+            self.stdout.write(f'{"case":<28}{"status":>7}{"queries":>9}{"p50 ms":>10}{"p95 ms":>10}{"peak KiB":>10}')
+            for case in cases:
+                if names and case.name not in names:
+                    continue
+                try:
+                    result = run_case(case, fixture, iterations)
+                    for _ in range(config['RETRIES'] if baseline else 0):
+                        if not compare_results({case.name: result}, baseline, config, speed):
+                            break
+                        result = merge_results(result, run_case(case, fixture, iterations))
+                except AssertionError as error:
+                    raise CommandError(str(error))
+                results[case.name] = result
+                self.stdout.write(
+                    f'{case.name:<28}{result["status"]:>7}{result["queries"]:>9}'
+                    f'{result["p50_ms"]:>10}{result["p95_ms"]:>10}{result["peak_kib"]:>10}'
+                )
+            return results
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            settings.DEBUG = debug
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from ...search import create_search_index, drop_search_index
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the FTS5 full-text search index of offers from the offer table.
+    """
+    help = 'Drops and rebuilds the full-text search index of offers.'
+
+    def handle(self, *args, **options):
+        drop_search_index()
+        if create_search_index():
+            self.stdout.write(self.style.SUCCESS('Rebuilt the offer search index.'))
+        else:
+            self.stdout.write(self.style.WARNING('FTS5 is not available, searching falls back to LIKE queries.'))
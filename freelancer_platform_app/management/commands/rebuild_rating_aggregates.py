@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from ...models import RatingAggregate
+
+
+class Command(BaseCommand):
+    """
+    Backfills or repairs the rating aggregates of the business users.
+    """
+    help = 'Recomputes the review count, rating sum and rating histogram of business users from the reviews.'
+
+    def handle(self, *args, **options):
+        rebuilt = RatingAggregate.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the rating aggregates of {rebuilt} business users.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from ...models import OrderCount
+
+
+class Command(BaseCommand):
+    """
+    Backfills or repairs the materialized order counters of the business users.
+    """
+    help = 'Recomputes the order counters of business users from the orders and corrects differing ones.'
+
+    def handle(self, *args, **options):
+        corrected = OrderCount.objects.reconcile()
+        self.stdout.write(self.style.SUCCESS(f'Corrected {corrected} order counters.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from ...models import Offer
+
+
+class Command(BaseCommand):
+    """
+    Backfills or repairs the denormalized min_price and min_delivery_time columns of offers.
+    """
+    help = 'Recomputes min_price and min_delivery_time of offers from their details.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('offer_ids', nargs='*', type=int, help='Only refresh the offers with these IDs.')
+
+    def handle(self, *args, **options):
+        offers = Offer.objects.all()
+        if options['offer_ids']:
+            offers = offers.filter(pk__in=options['offer_ids'])
+        updated = offers.refresh_min_values()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed minimum values of {updated} offers.'))
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:45
+
+from django.db import migrations, models
+from django.db.models import Min, OuterRef, Subquery
+
+
+def backfill_min_values(apps, schema_editor):
+    Offer = apps.get_model('freelancer_platform_app', 'Offer')
+    OfferDetail = apps.get_model('freelancer_platform_app', 'OfferDetail')
+    details = OfferDetail.objects.filter(offer=OuterRef('pk')).values('offer')
+    Offer.objects.update(
+        min_price=Subquery(details.annotate(value=Min('price')).values('value')),
+        min_delivery_time=Subquery(details.annotate(value=Min('delivery_time_in_days')).values('value')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer_platform_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='min_delivery_time',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='min_price',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, editable=False, max_digits=15, null=True),
+        ),
+        migrations.RunPython(backfill_min_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer_platform_app', '0002_offer_min_price_min_delivery_time'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(fields=['updated_at', 'id'], name='offer_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(fields=['min_price', 'id'], name='offer_min_price_id_idx'),
+        ),
+    ]
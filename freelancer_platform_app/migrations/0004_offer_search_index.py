@@ -0,0 +1,60 @@
+from django.db import migrations
+
+
+# The statements are inlined, the migration must not depend on the current search module
+SEARCH_TABLE = 'freelancer_platform_app_offer_search'
+
+
+def fts5_supported(connection):
+    """
+    Returns True if the database is SQLite and was compiled with the FTS5 extension.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(content)')
+            cursor.execute('DROP TABLE temp.fts5_probe')
+            return True
+        except Exception:
+            return False
+
+
+def create_offer_search_index(apps, schema_editor):
+    """
+    Creates the FTS5 search index for offers and fills it with all existing offers.
+    Without FTS5 the offer search falls back to LIKE queries.
+    """
+    connection = schema_editor.connection
+    if not fts5_supported(connection):
+        return
+    Offer = apps.get_model('freelancer_platform_app', 'Offer')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+            "title, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, description) '
+            f'SELECT id, title, description FROM {Offer._meta.db_table}'
+        )
+
+
+def drop_offer_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer_platform_app', '0003_offer_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_offer_search_index, drop_offer_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer_platform_app', '0004_offer_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offerdetail',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,83 @@
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+SNAPSHOT_FIELDS = ['business_user', 'title', 'revisions', 'delivery_time_in_days', 'price', 'features', 'offer_type']
+
+
+def backfill_order_snapshots(apps, schema_editor):
+    Order = apps.get_model('freelancer_platform_app', 'Order')
+    batch = []
+    for order in Order.objects.select_related('offer_details__offer').order_by('pk').iterator(chunk_size=1000):
+        detail = order.offer_details
+        order.business_user_id = detail.offer.user_id
+        order.title = detail.offer.title
+        order.revisions = detail.revisions
+        order.delivery_time_in_days = detail.delivery_time_in_days
+        order.price = detail.price
+        order.features = detail.features
+        order.offer_type = detail.offer_type
+        batch.append(order)
+        if len(batch) == 1000:
+            Order.objects.bulk_update(batch, SNAPSHOT_FIELDS)
+            batch = []
+    if batch:
+        Order.objects.bulk_update(batch, SNAPSHOT_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer_platform_app', '0005_offerdetail_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='business_user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='order_business', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='title',
+            field=models.CharField(default='', max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='revisions',
+            field=models.IntegerField(default=1, validators=[django.core.validators.MinValueValidator(-1)]),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_time_in_days',
+            field=models.PositiveIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='features',
+            field=models.JSONField(default=list),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='offer_type',
+            field=models.CharField(choices=[('basic', 'basic'), ('standard', 'standard'), ('premium', 'premium')], default='basic', max_length=8),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_order_snapshots, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='order',
+            name='business_user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_business', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_order_counts(apps, schema_editor):
+    Order = apps.get_model('freelancer_platform_app', 'Order')
+    OrderCount = apps.get_model('freelancer_platform_app', 'OrderCount')
+    counters = {}
+    for row in Order.objects.order_by().values('business_user_id', 'status').annotate(count=Count('pk')):
+        counter = counters.setdefault(row['business_user_id'], OrderCount(business_user_id=row['business_user_id']))
+        setattr(counter, row['status'], row['count'])
+    OrderCount.objects.bulk_create(counters.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('freelancer_platform_app', '0006_order_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCount',
+            fields=[
+                ('business_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='order_count', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('in_progress', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_order_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:05
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Review = apps.get_model('freelancer_platform_app', 'Review')
+    RatingAggregate = apps.get_model('freelancer_platform_app', 'RatingAggregate')
+    histogram = {f'rating_{rating}': Count('pk', filter=Q(rating=rating)) for rating in range(1, 6)}
+    rows = Review.objects.order_by().values('business_user_id').annotate(review_count=Count('pk'), rating_sum=Sum('rating'), **histogram)
+    RatingAggregate.objects.bulk_create([RatingAggregate(**row) for row in rows], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('freelancer_platform_app', '0008_order_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingAggregate',
+            fields=[
+                ('business_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_aggregate', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='rating',
+            field=models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,38 @@
-from django.db import models
-from django.core.validators import MinValueValidator
+from django.db import models, transaction
+from django.db.models import Count, F, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Greatest
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.dispatch import Signal
 from django.contrib.auth.models import User
+from django.utils import timezone
+from coderr_project.utils import MaintainedFieldsMixin
 
 
-class Offer(models.Model):
+class OfferQuerySet(models.QuerySet):
+    """
+    Custom queryset for offers providing maintenance of the denormalized minimum values.
+    """
+
+    def refresh_min_values(self):
+        """
+        Recomputes min_price and min_delivery_time of all offers in the queryset
+        from their details in a single UPDATE statement.
+        """
+        details = OfferDetail.objects.filter(offer=OuterRef('pk')).values('offer')
+        return self.update(
+            min_price=Subquery(details.annotate(value=Min('price')).values('value')),
+            min_delivery_time=Subquery(details.annotate(value=Min('delivery_time_in_days')).values('value')),
+        )
+
+
+class Offer(MaintainedFieldsMixin, models.Model):
     """ 
     Represents an offer created by a user. Contains essential details such as title, image, and description.
     Tracks the creation and last updated timestamps.
+    Stores the minimum price and delivery time of its details for indexed filtering and ordering.
     """
+    maintained_fields = ['min_price', 'min_delivery_time', 'image_derivative_sizes']
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
     image = models.FileField(upload_to='uploads/offer_images/', blank=True, null=True)
@@ -15,6 +40,21 @@ class Offer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized values, kept in sync with the details by signals
+    min_price = models.DecimalField(max_digits=15, decimal_places=2, blank=True, null=True, editable=False, db_index=True)
+    min_delivery_time = models.PositiveIntegerField(blank=True, null=True, editable=False, db_index=True)
+    # Sizes of the generated image derivatives, stored by the background generation
+    image_derivative_sizes = models.JSONField(default=list, blank=True, editable=False)
+
+    objects = OfferQuerySet.as_manager()
+
+    class Meta:
+        # Composite keys used by the keyset pagination of the offers feed
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='offer_updated_at_id_idx'),
+            models.Index(fields=['min_price', 'id'], name='offer_min_price_id_idx'),
+        ]
+
 
 class OfferDetail(models.Model):
     """ 
@@ -34,15 +74,59 @@ class OfferDetail(models.Model):
     price = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     features = models.JSONField()
     offer_type = models.CharField(max_length=8, choices=TYPE_CHOICES)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ['offer', 'offer_type']
 
 
+# Sent by OrderQuerySet.transition_status with the transitioned orders, as updates send no post_save
+orders_transitioned = Signal()
+
+
+class OrderQuerySet(models.QuerySet):
+    """
+    Custom queryset for orders providing bulk status transitions.
+    """
+
+    def transition_status(self, ids, from_status, to_status):
+        """
+        Moves the orders of the queryset with the given IDs from one status to another with a single
+        conditional UPDATE. Orders whose status was changed concurrently are not touched.
+        As updates send no signals, the order counters are adjusted in the same transaction
+        and orders_transitioned is sent for the order events.
+
+        Returns:
+            - The IDs of the updated orders.
+        """
+        while True:
+            with transaction.atomic():
+                now = timezone.now()
+                # Locks the candidates where supported, the UPDATE's status condition decides with any locking
+                updated = list(
+                    self.filter(pk__in=ids, status=from_status).select_for_update()
+                    .values_list('pk', 'customer_user_id', 'business_user_id')
+                )
+                count = self.filter(pk__in=[pk for pk, _, _ in updated], status=from_status).update(status=to_status, updated_at=now)
+                if count != len(updated):
+                    # A candidate changed in between, the transition is rolled back and repeated
+                    transaction.set_rollback(True)
+                    continue
+                changes = {}
+                for pk, customer_user_id, business_user_id in updated:
+                    changes[(business_user_id, from_status)] = changes.get((business_user_id, from_status), 0) - 1
+                    changes[(business_user_id, to_status)] = changes.get((business_user_id, to_status), 0) + 1
+                OrderCount.objects.apply_changes(changes)
+                orders_transitioned.send(sender=Order, orders=updated, from_status=from_status, to_status=to_status, updated_at=now)
+            break
+        return [pk for pk, _, _ in updated]
+
+
 class Order(models.Model):
     """ 
     Represents an order placed by a customer for a specific offer detail.
     Tracks the status of the order and related timestamps.
+    Stores a snapshot of the ordered offer terms, so later changes of the offer don't alter the order.
     """
     TYPE_CHOICES = (
         ("basic", "basic"),
@@ -62,41 +146,133 @@ class Order(models.Model):
 
     offer_details = models.ForeignKey(OfferDetail, on_delete=models.CASCADE, related_name='order_details')
 
-    # Computed properties to provide convenient access to related fields
-    @property
-    def business_user(self):
-        """ Returns the user who created the offer related to this order. """
-        return self.offer_details.offer.user
+    # Snapshot of the offer terms at the time of ordering
+    business_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='order_business')
+    title = models.CharField(max_length=255)
+    revisions = models.IntegerField(default=1, validators=[MinValueValidator(-1)])
+    delivery_time_in_days = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    features = models.JSONField()
+    offer_type = models.CharField(max_length=8, choices=TYPE_CHOICES)
 
-    @property
-    def title(self):
-        """ Returns the title of the offer related to this order. """
-        return self.offer_details.offer.title
+    def save(self, *args, **kwargs):
+        """
+        Takes the snapshot of the offer terms when the order is created.
+        The order is saved in a transaction, so the order counters are updated atomically with it.
+        """
+        if self._state.adding and not self.business_user_id:
+            self.take_snapshot()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        # The post_save receivers compare the status with the one loaded before
+        self._original_status = self.status
 
-    @property
-    def revisions(self):
-        """ Returns the number of revisions allowed for this order. """
-        return self.offer_details.revisions
+    def take_snapshot(self):
+        """ Copies the terms of the ordered offer detail and the offer's creator onto the order. """
+        detail = self.offer_details
+        self.business_user_id = detail.offer.user_id
+        self.title = detail.offer.title
+        self.revisions = detail.revisions
+        self.delivery_time_in_days = detail.delivery_time_in_days
+        self.price = detail.price
+        self.features = detail.features
+        self.offer_type = detail.offer_type
 
-    @property
-    def delivery_time_in_days(self):
-        """ Returns the delivery time in days for this order. """
-        return self.offer_details.delivery_time_in_days
+    objects = OrderQuerySet.as_manager()
 
-    @property
-    def price(self):
-        """ Returns the price of this order. """
-        return self.offer_details.price
+    class Meta:
+        # Composite keys of the order lists of customers and business users, ordered by (created_at, id)
+        indexes = [
+            models.Index(fields=['customer_user', 'created_at', 'id'], name='order_customer_created_idx'),
+            models.Index(fields=['business_user', 'created_at', 'id'], name='order_business_created_idx'),
+            models.Index(fields=['business_user', 'status', 'created_at', 'id'], name='order_business_status_idx'),
+        ]
 
-    @property
-    def features(self):
-        """ Returns the features of this order. """
-        return self.offer_details.features
 
-    @property
-    def offer_type(self):
-        """ Returns the type of the offer detail for this order (basic/standard/premium). """
-        return self.offer_details.offer_type
+class BusinessCounterQuerySet(models.QuerySet):
+    """
+    Base queryset for counters stored per business user, providing their atomic increments.
+    """
+
+    def add(self, business_user_id, deltas, **values):
+        """
+        Adds the deltas to the counter fields of a business user with one UPDATE.
+        A missing counter is created with the increments.
+
+        Parameters:
+            - deltas: Mapping of counter fields to their change.
+            - values: Further fields set on the counter.
+        """
+        # Drifted counters never become negative, they are corrected by the management commands
+        values.update({field: Greatest(F(field) + delta, 0) for field, delta in deltas.items()})
+        updated = self.filter(business_user_id=business_user_id).update(**values)
+        # A missing counter is only created for increments, e.g. not while its user is deleted
+        if not updated and any(delta > 0 for delta in deltas.values()):
+            counter, created = self.get_or_create(
+                business_user_id=business_user_id, defaults={field: max(delta, 0) for field, delta in deltas.items()}
+            )
+            if not created:
+                self.filter(business_user_id=business_user_id).update(**values)
+
+
+class OrderCountQuerySet(BusinessCounterQuerySet):
+    """
+    Custom queryset for the order counters providing their maintenance.
+    """
+
+    def apply_changes(self, changes):
+        """
+        Adds the changes to the counters with one UPDATE per business user.
+
+        Parameters:
+            - changes: Mapping of (business_user_id, status) to the change of the count.
+        """
+        by_user = {}
+        for (business_user_id, status), delta in changes.items():
+            if delta:
+                by_user.setdefault(business_user_id, {})[status] = delta
+        for business_user_id, deltas in by_user.items():
+            self.add(business_user_id, deltas)
+
+    def reconcile(self):
+        """
+        Recomputes all counters from the orders with one grouped query and writes the differing ones.
+
+        Returns:
+            - The number of corrected counters.
+        """
+        statuses = [status for status, _ in Order.STATUS_CHOICES]
+        with transaction.atomic():
+            counters = {counter.business_user_id: counter for counter in self.select_for_update()}
+            expected = {}
+            rows = Order.objects.order_by().values('business_user_id', 'status').annotate(count=Count('pk'))
+            for row in rows:
+                expected.setdefault(row['business_user_id'], dict.fromkeys(statuses, 0))[row['status']] = row['count']
+
+            changed = []
+            for business_user_id, counter in counters.items():
+                counts = expected.pop(business_user_id, dict.fromkeys(statuses, 0))
+                if any(getattr(counter, status) != counts[status] for status in statuses):
+                    for status in statuses:
+                        setattr(counter, status, counts[status])
+                    changed.append(counter)
+            self.bulk_update(changed, statuses, batch_size=500)
+            self.bulk_create([OrderCount(business_user_id=business_user_id, **counts) for business_user_id, counts in expected.items()], batch_size=500)
+            corrected = len(changed) + len(expected)
+        return corrected
+
+
+class OrderCount(models.Model):
+    """
+    Materialized number of orders per status of a business user.
+    Maintained by the order signals in the same transaction as the order changes.
+    """
+    business_user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='order_count')
+    in_progress = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+
+    objects = OrderCountQuerySet.as_manager()
 
 
 class Review(models.Model):
@@ -106,10 +282,82 @@ class Review(models.Model):
     """
     business_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review_business')
     reviewer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review_customer')
-    rating = models.IntegerField()
+    rating = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ['reviewer', 'business_user']
+        # Composite keys of the review lists of business users, ordered by (updated_at, id) or (rating, id)
+        indexes = [
+            models.Index(fields=['business_user', 'updated_at', 'id'], name='review_business_updated_idx'),
+            models.Index(fields=['business_user', 'rating', 'id'], name='review_business_rating_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the review in a transaction, so the rating aggregates are updated atomically with it.
+        """
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        # The post_save receivers compare the rating with the one loaded before
+        self._original_rating = self.rating
+        self._original_business_user_id = self.business_user_id
+
+
+class RatingAggregateQuerySet(BusinessCounterQuerySet):
+    """
+    Custom queryset for the rating aggregates providing their maintenance.
+    """
+
+    def apply_review(self, business_user_id, rating, sign):
+        """
+        Adds (sign=1) or removes (sign=-1) a review with the given rating to the aggregate of a business user.
+        """
+        deltas = {'review_count': sign, 'rating_sum': sign * rating}
+        if 1 <= rating <= 5:
+            deltas[f'rating_{rating}'] = sign
+        self.add(business_user_id, deltas, updated_at=timezone.now())
+
+    def rebuild(self):
+        """
+        Recomputes all aggregates from the reviews with one grouped query.
+
+        Returns:
+            - The number of aggregates.
+        """
+        histogram = {f'rating_{rating}': Count('pk', filter=models.Q(rating=rating)) for rating in range(1, 6)}
+        rows = Review.objects.order_by().values('business_user_id').annotate(review_count=Count('pk'), rating_sum=Sum('rating'), **histogram)
+        with transaction.atomic():
+            self.all().delete()
+            aggregates = self.bulk_create([RatingAggregate(**row) for row in rows], batch_size=500)
+        return len(aggregates)
+
+
+class RatingAggregate(models.Model):
+    """
+    Materialized number, rating sum and 1-5 star histogram of the reviews of a business user.
+    Maintained by the review signals in the same transaction as the review changes.
+    """
+    business_user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='rating_aggregate')
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RatingAggregateQuerySet.as_manager()
+
+    @property
+    def average_rating(self):
+        """ Returns the average rating rounded to one decimal, 0.0 without reviews. """
+        return round(self.rating_sum / self.review_count, 1) if self.review_count else 0.0
+
+    @property
+    def histogram(self):
+        """ Returns the number of reviews per rating. """
+        return {str(rating): getattr(self, f'rating_{rating}') for rating in range(1, 6)}
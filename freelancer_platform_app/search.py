@@ -0,0 +1,124 @@
+from django.db import connection as default_connection
+from .models import Offer
+
+
+SEARCH_TABLE = 'freelancer_platform_app_offer_search'
+
+# Caches the availability of the search index per database
+_available = {}
+
+
+def fts5_supported(connection=default_connection):
+    """
+    Returns True if the database is SQLite and was compiled with the FTS5 extension.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(content)')
+            cursor.execute('DROP TABLE temp.fts5_probe')
+            return True
+        except Exception:
+            return False
+
+
+def search_index_available(connection=default_connection, table=SEARCH_TABLE):
+    """
+    Returns True if the full-text search index (by default the one of the offers) exists in the database.
+    The result is cached per database and index.
+    """
+    key = (connection.alias, str(connection.settings_dict['NAME']), table)
+    if key not in _available:
+        _available[key] = connection.vendor == 'sqlite' and table in connection.introspection.table_names()
+    return _available[key]
+
+
+def reset_search_index_availability():
+    """
+    Forgets the cached availability of the search indexes, e.g. after one was created or dropped.
+    """
+    _available.clear()
+
+
+def create_search_index(connection=default_connection):
+    """
+    Creates the FTS5 search index for offers and fills it with all existing offers.
+    Does nothing if FTS5 is not supported by the database.
+    """
+    if not fts5_supported(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+            "title, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, description) '
+            f'SELECT id, title, description FROM {Offer._meta.db_table}'
+        )
+    reset_search_index_availability()
+    return True
+
+
+def drop_search_index(connection=default_connection):
+    """
+    Removes the FTS5 search index for offers.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+    reset_search_index_availability()
+
+
+def index_offer(offer, connection=default_connection):
+    """
+    Adds an offer to the search index or replaces its indexed title and description.
+    """
+    if not search_index_available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [offer.pk])
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, description) VALUES (%s, %s, %s)',
+            [offer.pk, offer.title, offer.description]
+        )
+
+
+def index_offers(offers, connection=default_connection):
+    """
+    Adds newly created offers to the search index with a single batched insert.
+    """
+    if not offers or not search_index_available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, title, description) VALUES (%s, %s, %s)',
+            [(offer.pk, offer.title, offer.description) for offer in offers]
+        )
+
+
+def remove_offer(offer_id, connection=default_connection):
+    """
+    Removes an offer from the search index.
+    """
+    if not search_index_available(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [offer_id])
+
+
+def get_match_expression(terms):
+    """
+    Builds an FTS5 MATCH expression from search terms.
+    Every term is quoted to escape the query syntax and used as prefix query.
+    """
+    phrases = []
+    for term in terms:
+        term = term.replace('"', '""').strip()
+        if term:
+            phrases.append(f'"{term}"*')
+    return ' '.join(phrases)
@@ -0,0 +1,189 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from django.utils import timezone
+from coderr_project.cache import invalidate_response_cache
+from coderr_project.images import derivatives_generated, remember_file, handle_file_saved, handle_file_deleted
+from .events import publish_order_event
+from .models import Offer, OfferDetail, Order, OrderCount, RatingAggregate, Review, orders_transitioned
+from .search import index_offer, remove_offer
+
+
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+def refresh_offer_min_values(sender, instance, **kwargs):
+    """
+    Keeps the denormalized min_price and min_delivery_time of an offer
+    in sync whenever one of its details is created, updated or deleted.
+    """
+    Offer.objects.filter(pk=instance.offer_id).refresh_min_values()
+
+
+@receiver(post_save, sender=Offer)
+def update_offer_search_index(sender, instance, **kwargs):
+    """
+    Adds or updates the offer in the full-text search index.
+    """
+    index_offer(instance)
+
+
+@receiver(post_delete, sender=Offer)
+def remove_offer_from_search_index(sender, instance, **kwargs):
+    """
+    Removes the deleted offer from the full-text search index.
+    """
+    remove_offer(instance.pk)
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def invalidate_offer_responses(sender, instance, **kwargs):
+    """
+    Invalidates the cached offer list and the cached responses of the changed offer
+    after the transaction was committed, so concurrent requests can't cache the old rows under the new version.
+    """
+    namespaces = ('offers', f'offers:{instance.pk}')
+    transaction.on_commit(lambda: invalidate_response_cache(*namespaces))
+
+
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+def invalidate_offer_detail_responses(sender, instance, **kwargs):
+    """
+    Invalidates the cached offer list and the cached responses of the changed detail and its offer
+    after the transaction was committed.
+    """
+    namespaces = ('offers', f'offers:{instance.offer_id}', f'offerdetails:{instance.pk}')
+    transaction.on_commit(lambda: invalidate_response_cache(*namespaces))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_responses(sender, instance, **kwargs):
+    """
+    Invalidates the cached user-specific responses of the changed user after the transaction was committed.
+    """
+    namespace = f'user:{instance.pk}'
+    transaction.on_commit(lambda: invalidate_response_cache(namespace))
+
+
+@receiver(post_init, sender=Offer)
+def remember_offer_image(sender, instance, **kwargs):
+    """
+    Remembers the loaded image of the offer to detect replacements.
+    """
+    remember_file(instance, 'image')
+
+
+@receiver(post_save, sender=Offer)
+def process_offer_image(sender, instance, **kwargs):
+    """
+    Generates the derivatives of a new image in the background and removes those of a replaced one.
+    """
+    handle_file_saved(instance, 'image')
+
+
+@receiver(post_delete, sender=Offer)
+def delete_offer_image_derivatives(sender, instance, **kwargs):
+    """
+    Removes the derivatives of the deleted offer's image.
+    """
+    handle_file_deleted(instance, 'image')
+
+
+@receiver(derivatives_generated, sender=Offer)
+def refresh_offer_image_derivatives(sender, pk, **kwargs):
+    """
+    Renews the validators and invalidates the cached responses of an offer whose image derivatives were generated.
+    """
+    Offer.objects.filter(pk=pk).update(updated_at=timezone.now())
+    invalidate_response_cache('offers', f'offers:{pk}')
+
+
+@receiver(post_init, sender=Order)
+def remember_order_status(sender, instance, **kwargs):
+    """
+    Remembers the loaded status of the order to detect status changes.
+    """
+    instance._original_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Order)
+def count_saved_order(sender, instance, created, **kwargs):
+    """
+    Updates the order counters of the business user for a created order or a changed status.
+    Runs in the transaction of Order.save.
+    """
+    original = None if created else instance._original_status
+    if original != instance.status:
+        changes = {(instance.business_user_id, instance.status): 1}
+        if original:
+            changes[(instance.business_user_id, original)] = -1
+        OrderCount.objects.apply_changes(changes)
+
+
+@receiver(post_save, sender=Order)
+def publish_saved_order(sender, instance, created, **kwargs):
+    """
+    Publishes an event for a created order or a changed status to the customer and the business user
+    after the transaction was committed.
+    """
+    original = None if created else instance._original_status
+    if original == instance.status:
+        return
+    publish_order_event(
+        'order.created' if created else 'order.status_changed', instance.pk, instance.customer_user_id,
+        instance.business_user_id, instance.status, original, instance.updated_at
+    )
+
+
+@receiver(orders_transitioned, sender=Order)
+def publish_transitioned_orders(sender, orders, from_status, to_status, updated_at, **kwargs):
+    """
+    Publishes an event for every order of a bulk status transition after the transaction was committed.
+    """
+    for pk, customer_user_id, business_user_id in orders:
+        publish_order_event('order.status_changed', pk, customer_user_id, business_user_id, to_status, from_status, updated_at)
+
+
+@receiver(post_delete, sender=Order)
+def count_deleted_order(sender, instance, **kwargs):
+    """
+    Updates the order counters of the business user for a deleted order.
+    Runs in the transaction of the deletion.
+    """
+    OrderCount.objects.apply_changes({(instance.business_user_id, instance._original_status or instance.status): -1})
+
+
+@receiver(post_init, sender=Review)
+def remember_review_rating(sender, instance, **kwargs):
+    """
+    Remembers the loaded rating and business user of the review to detect changes.
+    """
+    instance._original_rating = instance.__dict__.get('rating')
+    instance._original_business_user_id = instance.__dict__.get('business_user_id')
+
+
+@receiver(post_save, sender=Review)
+def aggregate_saved_review(sender, instance, created, **kwargs):
+    """
+    Updates the rating aggregate of the business user for a created review or a changed rating.
+    Runs in the transaction of Review.save.
+    """
+    original = None if created else (instance._original_business_user_id, instance._original_rating)
+    if original == (instance.business_user_id, instance.rating):
+        return
+    if original and None not in original:
+        RatingAggregate.objects.apply_review(*original, -1)
+    RatingAggregate.objects.apply_review(instance.business_user_id, instance.rating, 1)
+
+
+@receiver(post_delete, sender=Review)
+def aggregate_deleted_review(sender, instance, **kwargs):
+    """
+    Updates the rating aggregate of the business user for a deleted review.
+    Runs in the transaction of the deletion.
+    """
+    RatingAggregate.objects.apply_review(
+        instance._original_business_user_id or instance.business_user_id, instance._original_rating or instance.rating, -1
+    )
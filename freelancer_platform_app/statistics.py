@@ -0,0 +1,105 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, connections
+from auth_app.models import BusinessProfile
+from coderr_project.cache import get_cache
+from .models import Offer, RatingAggregate
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'statistics:base_info'
+LOCK_KEY = 'statistics:base_info:lock'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_snapshot_settings():
+    """
+    Returns the settings of the statistics snapshot (STATISTICS_SNAPSHOT), completed by their defaults.
+
+    Settings:
+        - MAX_AGE: Seconds a snapshot is served without being recomputed.
+        - LOCK_TIMEOUT: Seconds a started recompute blocks further ones.
+    """
+    config = {'MAX_AGE': 60, 'LOCK_TIMEOUT': 30}
+    config.update(getattr(settings, 'STATISTICS_SNAPSHOT', {}))
+    return config
+
+
+def get_executor():
+    """
+    Returns the thread recomputing the snapshots, created on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='statistics')
+    return _executor
+
+
+def compute_base_info():
+    """
+    Computes the platform statistics with one query. The review statistics are summed up
+    from the rating aggregates of the business users.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT (SELECT COALESCE(SUM(review_count), 0) FROM {RatingAggregate._meta.db_table}), '
+            f'(SELECT COALESCE(SUM(rating_sum), 0) FROM {RatingAggregate._meta.db_table}), '
+            f'(SELECT COUNT(*) FROM {BusinessProfile._meta.db_table}), '
+            f'(SELECT COUNT(*) FROM {Offer._meta.db_table})'
+        )
+        review_count, rating_sum, business_profile_count, offer_count = cursor.fetchone()
+    return {
+        'review_count': review_count,
+        'average_rating': round(rating_sum / review_count, 1) if review_count else 0.0,
+        'business_profile_count': business_profile_count,
+        'offer_count': offer_count,
+    }
+
+
+def refresh_base_info():
+    """
+    Recomputes the snapshot of the platform statistics and stores it without expiry.
+    """
+    snapshot = {'data': compute_base_info(), 'computed_at': time.time()}
+    get_cache().set(SNAPSHOT_KEY, snapshot, timeout=None)
+    return snapshot
+
+
+def refresh_in_background():
+    """
+    Recomputes the snapshot in a background thread, unless a recompute is already running.
+    """
+    if not get_cache().add(LOCK_KEY, True, timeout=get_snapshot_settings()['LOCK_TIMEOUT']):
+        return
+    get_executor().submit(run_refresh)
+
+
+def run_refresh():
+    try:
+        refresh_base_info()
+    except Exception:
+        logger.exception('Recomputing the platform statistics failed.')
+    finally:
+        get_cache().delete(LOCK_KEY)
+        connections.close_all()
+
+
+def get_base_info():
+    """
+    Returns the snapshot of the platform statistics and its age in seconds (stale-while-revalidate).
+    A stale snapshot is returned as it is and recomputed in the background.
+    Only without any snapshot, e.g. after a cache flush, it is computed within the request.
+    """
+    snapshot = get_cache().get(SNAPSHOT_KEY)
+    if snapshot is None:
+        snapshot = refresh_base_info()
+    age = max(0, int(time.time() - snapshot['computed_at']))
+    if age >= get_snapshot_settings()['MAX_AGE']:
+        refresh_in_background()
+    return snapshot['data'], age
@@ -0,0 +1,32 @@
+from django.test import SimpleTestCase
+from coderr_project.benchmarks import compare_results, get_benchmark_settings, get_cases, get_unbenchmarked_routes, merge_results
+
+
+class BenchmarkSuiteTests(SimpleTestCase):
+    """
+    Ensures that the benchmark suite covers every route and detects regressions.
+    """
+
+    def setUp(self):
+        self.config = get_benchmark_settings()
+        self.baseline = {'offers': {'status': 200, 'queries': 3, 'p50_ms': 10.0, 'p95_ms': 20.0, 'peak_kib': 100.0}}
+
+    def test_every_route_is_benchmarked(self):
+        fixture = {key: 1 for key in ['customer_id', 'business_id', 'unreviewed_business_id', 'offer_id', 'detail_id', 'order_id', 'review_id']}
+        fixture.update({'customer_username': 'customer', 'order_ids': [1], 'order_count_ids': '1', 'tokens': {}})
+        self.assertEqual(get_unbenchmarked_routes(get_cases(fixture)), set())
+
+    def test_additional_queries_are_regressions(self):
+        results = {'offers': {**self.baseline['offers'], 'queries': 4}}
+        self.assertEqual(compare_results(results, self.baseline, self.config), ['offers: 4 queries, baseline 3'])
+
+    def test_latency_within_threshold_and_speed(self):
+        results = {'offers': {**self.baseline['offers'], 'p50_ms': 16.0}}
+        self.assertEqual(compare_results(results, self.baseline, self.config), [])
+        results['offers']['p50_ms'] = 18.0
+        self.assertEqual(len(compare_results(results, self.baseline, self.config)), 1)
+        self.assertEqual(compare_results(results, self.baseline, self.config, speed=1.2), [])
+
+    def test_merge_keeps_best_values(self):
+        other = {'status': 200, 'queries': 3, 'p50_ms': 8.0, 'p95_ms': 25.0, 'peak_kib': 90.0}
+        self.assertEqual(merge_results(self.baseline['offers'], other), {'status': 200, 'queries': 3, 'p50_ms': 8.0, 'p95_ms': 20.0, 'peak_kib': 90.0})
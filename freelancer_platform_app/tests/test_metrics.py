@@ -0,0 +1,80 @@
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from coderr_project.cache import get_cache
+from coderr_project.metrics import get_registry
+from ..models import Offer, OfferDetail
+
+
+class RequestMetricsTests(APITestCase):
+    """
+    Ensures that the requests report their timings in the Server-Timing header
+    and are aggregated per route on /metrics.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = user = User.objects.create_user(username='business', password='asdasd')
+        for index in range(3):
+            offer = Offer.objects.create(user=user, title=f'Offer {index}', description='Webdesign')
+            OfferDetail.objects.create(offer=offer, title='Basic', delivery_time_in_days=3, price=100, features=[], offer_type='basic')
+
+    def setUp(self):
+        get_cache().clear()
+        get_registry().reset()
+
+    def get_timings(self, response):
+        entries = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            entries[name] = dict(param.split('=', 1) for param in params)
+        return entries
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/offers/')
+        timings = self.get_timings(response)
+        self.assertEqual(set(timings), {'db', 'view', 'serializer', 'total', 'size'})
+        self.assertEqual(timings['db']['desc'], '"3 queries"')
+        self.assertGreater(float(timings['serializer']['dur']), 0)
+        self.assertGreaterEqual(float(timings['total']['dur']), float(timings['view']['dur']))
+        self.assertEqual(timings['size']['desc'], f'"{len(response.content)} bytes"')
+
+    def test_metrics_are_aggregated_per_route(self):
+        self.client.get('/api/offers/')
+        self.client.get('/api/offers/')
+        offer = Offer.objects.first()
+        self.client.force_authenticate(self.user)
+        self.client.get(f'/api/offers/{offer.pk}/')
+        self.client.get('/api/unknown/')
+
+        with override_settings(METRICS={'TOKEN': 'secret'}):
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        metrics = response.content.decode()
+        self.assertIn('coderr_request_duration_seconds_count{route="offers",method="GET"} 2', metrics)
+        self.assertIn('coderr_request_duration_seconds_count{route="offers-detail",method="GET"} 1', metrics)
+        self.assertIn('coderr_request_duration_seconds_bucket{route="offers",method="GET",le="+Inf"} 2', metrics)
+        # The second request is answered from the response cache
+        self.assertIn('coderr_request_db_queries_bucket{route="offers",method="GET",le="0"} 1', metrics)
+        self.assertIn('coderr_request_db_queries_bucket{route="offers",method="GET",le="5"} 2', metrics)
+        self.assertIn('coderr_request_db_queries_sum{route="offers",method="GET"} 3', metrics)
+        self.assertIn('route="unmatched",method="GET"', metrics)
+
+    async def test_asgi_requests_are_recorded(self):
+        response = await self.async_client.get('/api/offers/')
+        self.assertEqual(self.get_timings(response)['db']['desc'], '"3 queries"')
+        self.assertIn('coderr_request_db_queries_sum{route="offers",method="GET"} 3', get_registry().export())
+
+    @override_settings(METRICS={'TOKEN': 'secret'})
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret').status_code, 200)
+
+    @override_settings(METRICS={'TOKEN': None})
+    def test_metrics_without_token_require_staff(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.client.force_login(User.objects.create_user(username='admin', password='asdasd', is_staff=True))
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
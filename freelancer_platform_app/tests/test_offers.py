@@ -0,0 +1,513 @@
+import io
+import shutil
+import tempfile
+import warnings
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
+from PIL import Image
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from auth_app.models import BusinessProfile
+from coderr_project.authentication import get_token_cache
+from coderr_project.cache import get_cache, get_response_cache_stats
+from coderr_project.images import store_derivatives
+from ..models import Offer, OfferDetail
+from ..search import SEARCH_TABLE, reset_search_index_availability
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class OfferQueryCountTests(APITestCase):
+    """
+    Ensures that listing and retrieving offers runs in a fixed number of queries,
+    independent of the number of offers on a page.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='business', password='asdasd', first_name='Kevin', last_name='Theisen')
+        BusinessProfile.objects.create(user=cls.user)
+        cls.token = Token.objects.create(user=cls.user)
+        for index in range(12):
+            offer = Offer.objects.create(user=cls.user, title=f'Offer {index}', description='Description')
+            for offer_type, price, delivery_time in [('basic', 100, 7), ('standard', 200, 5), ('premium', 300, 3)]:
+                OfferDetail.objects.create(
+                    offer=offer, title=offer_type, revisions=1, delivery_time_in_days=delivery_time + index,
+                    price=price + index, features=['Feature'], offer_type=offer_type
+                )
+
+    def setUp(self):
+        get_token_cache().clear()
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_list_query_count_is_independent_of_page_size(self):
+        small_count, _ = self.count_queries('/api/offers/?page_size=1')
+        large_count, response = self.count_queries('/api/offers/?page_size=12')
+        self.assertEqual(small_count, large_count)
+        self.assertLessEqual(large_count, 3)
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_pages_are_ordered_newest_first_by_default(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            first = self.client.get('/api/offers/', {'page_size': 6}).data['results']
+            second = self.client.get('/api/offers/', {'page_size': 6, 'page': 2}).data['results']
+        ids = [offer['id'] for offer in first + second]
+        self.assertEqual(ids, list(Offer.objects.order_by('-updated_at', '-id').values_list('pk', flat=True)))
+
+    def test_list_returns_min_values(self):
+        _, response = self.count_queries('/api/offers/?page_size=12&ordering=min_price')
+        first = response.data['results'][0]
+        self.assertEqual(first['min_price'], 100)
+        self.assertEqual(first['min_delivery_time'], 3)
+        self.assertEqual(len(first['details']), 3)
+
+    def test_authenticated_list_query_count_is_independent_of_page_size(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        # Authenticates once, the following requests use the cached token
+        self.count_queries('/api/offers/?page_size=1')
+        small_count, _ = self.count_queries('/api/offers/?page_size=1')
+        large_count, response = self.count_queries('/api/offers/?page_size=12')
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(response.data['results'][0]['user_details']['username'], 'business')
+
+    def test_retrieve_query_count(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        offer = Offer.objects.first()
+        # Token with profile flags, conditional validators, offer and prefetched details
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/offers/{offer.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['min_price'], 100)
+
+
+class OfferCursorPaginationTests(APITestCase):
+    """
+    Ensures that the keyset pagination walks the offers feed without gaps or duplicates.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='business', password='asdasd')
+        for index in range(7):
+            offer = Offer.objects.create(user=user, title=f'Offer {index}', description='Description')
+            OfferDetail.objects.create(
+                offer=offer, title='basic', delivery_time_in_days=1, price=100 + index % 3,
+                features=[], offer_type='basic'
+            )
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids += [offer['id'] for offer in response.data['results']]
+            url = response.data['next']
+        return ids, response
+
+    def test_walks_all_offers_by_min_price(self):
+        ids, response = self.walk('/api/offers/?pagination=cursor&ordering=min_price&page_size=2')
+        expected = list(Offer.objects.order_by('min_price', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual([offer['id'] for offer in previous.data['results']], expected[-3:-1])
+
+    def test_walks_all_offers_by_updated_at(self):
+        ids, _ = self.walk('/api/offers/?pagination=cursor&page_size=3')
+        expected = list(Offer.objects.order_by('-updated_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/offers/?cursor=invalid')
+        self.assertEqual(response.status_code, 404)
+
+
+class OfferMinValueTests(APITestCase):
+    """
+    Ensures that the denormalized minimum price and delivery time follow the details of an offer.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='business', password='asdasd')
+        cls.offer = Offer.objects.create(user=user, title='Webdesign', description='Description')
+        cls.basic = OfferDetail.objects.create(
+            offer=cls.offer, title='basic', delivery_time_in_days=7, price=100, features=[], offer_type='basic'
+        )
+
+    def assertMinValues(self, min_price, min_delivery_time):
+        self.offer.refresh_from_db()
+        self.assertEqual((self.offer.min_price, self.offer.min_delivery_time), (min_price, min_delivery_time))
+
+    def test_min_values_follow_detail_changes(self):
+        self.assertMinValues(100, 7)
+        premium = OfferDetail.objects.create(
+            offer=self.offer, title='premium', delivery_time_in_days=3, price=300, features=[], offer_type='premium'
+        )
+        self.assertMinValues(100, 3)
+        premium.price = 50
+        premium.save()
+        self.assertMinValues(50, 3)
+        premium.delete()
+        self.assertMinValues(100, 7)
+        self.basic.delete()
+        self.assertMinValues(None, None)
+
+    def test_offer_save_keeps_min_values(self):
+        stale = Offer.objects.get(pk=self.offer.pk)
+        self.basic.price = 20
+        self.basic.save()
+        stale.title = 'Design'
+        stale.save()
+        self.assertMinValues(20, 7)
+        self.assertEqual(self.offer.title, 'Design')
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class OfferSearchTests(APITestCase):
+    """
+    Ensures that the full-text search index is kept in sync and ranks its results.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='business', password='asdasd')
+        cls.design = Offer.objects.create(user=user, title='Webdesign', description='Modern design for your website.')
+        cls.hosting = Offer.objects.create(user=user, title='Hosting', description='Hosting for your webdesign.')
+        cls.backend = Offer.objects.create(user=user, title='Backend', description='An API for your app.')
+
+    def search(self, term):
+        response = self.client.get('/api/offers/', {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [offer['id'] for offer in response.data['results']]
+
+    def test_prefix_search_ranks_title_matches_first(self):
+        self.assertEqual(self.search('webdes'), [self.design.pk, self.hosting.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.backend.title = 'Webdesign Backend'
+        self.backend.save()
+        self.assertIn(self.backend.pk, self.search('webdesign'))
+
+        self.hosting.delete()
+        self.assertNotIn(self.hosting.pk, self.search('hosting'))
+
+    def test_search_syntax_is_escaped(self):
+        self.assertEqual(self.search('"api'), [self.backend.pk])
+
+
+class OfferSearchMigrationTests(OfferSearchTests):
+    """
+    Ensures that the search index migration fills the index and that the search falls back to LIKE queries without FTS5.
+    """
+    migration = import_module('freelancer_platform_app.migrations.0004_offer_search_index')
+
+    def setUp(self):
+        self.addCleanup(reset_search_index_availability)
+        schema_editor = SimpleNamespace(connection=connection)
+        self.migration.drop_offer_search_index(apps, schema_editor)
+        self.migration.create_offer_search_index(apps, schema_editor)
+        reset_search_index_availability()
+
+    def test_migration_fills_index_with_existing_offers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {SEARCH_TABLE}')
+            self.assertEqual(cursor.fetchone()[0], 3)
+
+    def test_search_falls_back_without_fts5(self):
+        schema_editor = SimpleNamespace(connection=connection)
+        self.migration.drop_offer_search_index(apps, schema_editor)
+        with mock.patch.object(self.migration, 'fts5_supported', return_value=False):
+            self.migration.create_offer_search_index(apps, schema_editor)
+        reset_search_index_availability()
+        self.assertNotIn(SEARCH_TABLE, connection.introspection.table_names())
+        self.assertEqual(sorted(self.search('webdesign')), sorted([self.design.pk, self.hosting.pk]))
+        self.assertEqual(self.search('"api'), [])
+
+
+class OfferResponseCacheTests(APITestCase):
+    """
+    Ensures that cached offer responses are served without queries and invalidated by changes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='business', password='asdasd')
+        cls.offer = Offer.objects.create(user=user, title='Webdesign', description='Description')
+        cls.detail = OfferDetail.objects.create(
+            offer=cls.offer, title='basic', delivery_time_in_days=3, price=100, features=[], offer_type='basic'
+        )
+
+    def test_hit_after_miss_and_normalized_parameters(self):
+        hits = get_response_cache_stats()['hits']
+        first = self.client.get('/api/offers/?page_size=50&ordering=min_price')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/offers/?ordering=min_price&page_size=12')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(get_response_cache_stats()['hits'], hits + 1)
+
+    def test_detail_change_invalidates_list_and_detail(self):
+        self.client.get('/api/offers/')
+        self.client.get(f'/api/offerdetails/{self.detail.pk}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.detail.price = 50
+            self.detail.save()
+            # Until the commit, concurrent requests must not cache the old rows under a new version
+            self.assertEqual(self.client.get('/api/offers/')['X-Cache'], 'HIT')
+
+        response = self.client.get('/api/offers/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['min_price'], 50)
+        response = self.client.get(f'/api/offerdetails/{self.detail.pk}/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['price'], 50)
+
+
+class OfferConditionalGetTests(APITestCase):
+    """
+    Ensures that unchanged offers are answered with 304 and changed ones with new validators.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='business', password='asdasd')
+        cls.token = Token.objects.create(user=cls.user)
+        cls.offer = Offer.objects.create(user=cls.user, title='Webdesign', description='Description')
+        cls.detail = OfferDetail.objects.create(
+            offer=cls.offer, title='basic', delivery_time_in_days=3, price=100, features=[], offer_type='basic'
+        )
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_not_modified_until_detail_changes(self):
+        url = f'/api/offers/{self.offer.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.detail.price = 80
+        self.detail.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_modified_after_requesting_user_renamed(self):
+        url = f'/api/offers/{self.offer.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Max'
+            self.user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user_details']['first_name'], 'Max')
+
+
+class OfferBulkCreateTests(APITestCase):
+    """
+    Ensures that bulk creation validates every offer and writes them with a constant number of queries.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='business', password='asdasd')
+        BusinessProfile.objects.create(user=cls.user)
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def offer_data(self, index):
+        return {
+            'title': f'Offer {index}',
+            'description': 'Description',
+            'details': [
+                {'title': offer_type, 'revisions': 1, 'delivery_time_in_days': 5 - position, 'price': 100 * (position + 1),
+                 'features': ['Feature'], 'offer_type': offer_type}
+                for position, offer_type in enumerate(['basic', 'standard', 'premium'])
+            ],
+        }
+
+    def count_queries(self, url, data):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(url, data, format='json')
+        return len(context.captured_queries), response
+
+    def test_per_item_results(self):
+        invalid = self.offer_data(1)
+        invalid['details'] = invalid['details'][:2]
+        response = self.client.post('/api/offers/bulk/', [self.offer_data(0), invalid], format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([result['status'] for result in response.data['results']], ['created', 'invalid'])
+
+        offer = Offer.objects.get(pk=response.data['results'][0]['id'])
+        self.assertEqual((offer.min_price, offer.min_delivery_time), (100, 3))
+        self.assertEqual(offer.details.count(), 3)
+        self.assertEqual(self.client.get('/api/offers/', {'search': 'offer'}).data['count'], 1)
+
+    def test_bulk_queries_are_constant_compared_to_single_offers(self):
+        single_count, response = self.count_queries('/api/offers/', self.offer_data(0))
+        self.assertEqual(response.status_code, 201)
+        bulk_count_small, _ = self.count_queries('/api/offers/bulk/', [self.offer_data(index) for index in range(2)])
+        bulk_count_large, response = self.count_queries('/api/offers/bulk/', [self.offer_data(index) for index in range(20)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(bulk_count_small, bulk_count_large)
+        self.assertLess(bulk_count_large * 10, single_count * 20)
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class OfferUpdateTests(APITestCase):
+    """
+    Ensures that nested detail updates are batched, atomic and validated.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='business', password='asdasd')
+        cls.token = Token.objects.create(user=cls.user)
+        cls.offer = Offer.objects.create(user=cls.user, title='Webdesign', description='Description')
+        for offer_type, price in [('basic', 100), ('standard', 200), ('premium', 300)]:
+            OfferDetail.objects.create(
+                offer=cls.offer, title=offer_type, delivery_time_in_days=5, price=price, features=[], offer_type=offer_type
+            )
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = f'/api/offers/{self.offer.pk}/'
+
+    def test_updates_all_tiers_with_one_bulk_update(self):
+        data = {'title': 'Design', 'details': [
+            {'offer_type': offer_type, 'price': price} for offer_type, price in [('basic', 50), ('standard', 60), ('premium', 70)]
+        ]}
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, 200)
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertNotIn('"description"', updates[1])
+
+        self.offer.refresh_from_db()
+        self.assertEqual((self.offer.title, self.offer.min_price), ('Design', 50))
+
+    def test_unknown_offer_type_is_rejected_without_changes(self):
+        OfferDetail.objects.filter(offer=self.offer, offer_type='premium').delete()
+        data = {'title': 'Design', 'details': [{'offer_type': 'basic', 'price': 10}, {'offer_type': 'premium', 'price': 5}]}
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('premium', str(response.data['details']))
+        self.assertFalse(any(query['sql'].startswith(('SAVEPOINT', 'BEGIN', 'UPDATE')) for query in context.captured_queries))
+        self.offer.refresh_from_db()
+        self.assertEqual((self.offer.title, self.offer.min_price), ('Webdesign', 100))
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False}, OFFER_FACETS={'PRICE_BOUNDARIES': [150], 'DELIVERY_TIME_BOUNDARIES': [4]})
+class OfferFacetTests(APITestCase):
+    """
+    Ensures that all facets are computed with one query over the filtered offers.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = User.objects.create_user(username='first', password='asdasd')
+        cls.second = User.objects.create_user(username='second', password='asdasd')
+        for user, title, price, delivery_time in [
+            (cls.first, 'Webdesign', 100, 3), (cls.first, 'Webhosting', 200, 5), (cls.second, 'Backend', 300, 2)
+        ]:
+            offer = Offer.objects.create(user=user, title=title, description='Description')
+            for offer_type in ['basic', 'standard']:
+                OfferDetail.objects.create(
+                    offer=offer, title=offer_type, delivery_time_in_days=delivery_time, price=price,
+                    features=[], offer_type=offer_type
+                )
+
+    def test_facets_of_filtered_offers(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/offers/facets/', {'search': 'web'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([bucket['count'] for bucket in response.data['price']], [1, 1])
+        self.assertEqual([bucket['count'] for bucket in response.data['delivery_time']], [1, 1])
+        self.assertEqual([bucket['count'] for bucket in response.data['offer_type']], [2, 2, 0])
+        self.assertEqual(response.data['creator'], [{'creator_id': self.first.pk, 'count': 2}])
+
+    def test_facets_accept_offer_filters(self):
+        response = self.client.get('/api/offers/facets/', {'max_delivery_time': 3})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['creator']), 2)
+
+
+class OfferImageDerivativeTests(APITestCase):
+    """
+    Ensures that the generated image derivatives are stored on the offer, listed without storage access
+    and invalidate the cached responses and validators of the offer.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        get_cache().clear()
+        self.user = User.objects.create_user(username='business', password='asdasd')
+        BusinessProfile.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        self.offer = Offer.objects.create(user=self.user, title='Webdesign', description='Description', image=self.get_image('offer.png'))
+        OfferDetail.objects.create(offer=self.offer, title='basic', delivery_time_in_days=3, price=100, features=[], offer_type='basic')
+
+    def get_image(self, name):
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), (200, 30, 30)).save(buffer, format='PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def generate(self):
+        store_derivatives(Offer, self.offer.pk, 'image', self.offer.image.storage, self.offer.image.name)
+
+    def test_generation_invalidates_responses_and_validators(self):
+        url = f'/api/offers/{self.offer.pk}/'
+        first = self.client.get(url)
+        self.assertEqual(first.data['image_derivatives'], {'thumbnail': None, 'card': None})
+        self.assertEqual(self.client.get('/api/offers/')['X-Cache'], 'MISS')
+
+        self.generate()
+        self.assertEqual(Offer.objects.get(pk=self.offer.pk).image_derivative_sizes, ['thumbnail', 'card'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+        response = self.client.get('/api/offers/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertTrue(response.data['results'][0]['image_derivatives']['thumbnail'].endswith('/derivatives/offer.png.thumbnail.jpg'))
+
+    def test_listing_does_not_access_the_storage(self):
+        self.generate()
+        with mock.patch.object(FileSystemStorage, 'exists', side_effect=AssertionError('storage accessed')):
+            response = self.client.get('/api/offers/')
+        self.assertEqual(set(response.data['results'][0]['image_derivatives']), {'thumbnail', 'card'})
+
+    def test_replaced_image_resets_sizes_and_full_save_keeps_them(self):
+        stale = Offer.objects.get(pk=self.offer.pk)
+        self.generate()
+        stale.title = 'Logo design'
+        stale.save()
+        self.assertEqual(Offer.objects.get(pk=self.offer.pk).image_derivative_sizes, ['thumbnail', 'card'])
+
+        offer = Offer.objects.get(pk=self.offer.pk)
+        offer.image = self.get_image('replaced.png')
+        offer.save()
+        self.assertEqual(Offer.objects.get(pk=self.offer.pk).image_derivative_sizes, [])
+        # The derivatives of the replaced image are not stored for the new one
+        self.generate()
+        self.assertEqual(Offer.objects.get(pk=self.offer.pk).image_derivative_sizes, [])
@@ -0,0 +1,346 @@
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, models
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from auth_app.models import BusinessProfile, CustomerProfile
+from coderr_project.authentication import get_token_cache
+from coderr_project.events import create_stream_ticket, get_broadcaster
+from ..models import Offer, OfferDetail, Order, OrderCount
+
+
+class OrderTestCase(APITestCase):
+    """
+    Creates a business user with one offer and a customer user for the order tests.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = User.objects.create_user(username='business', password='asdasd')
+        BusinessProfile.objects.create(user=cls.business)
+        cls.business_token = Token.objects.create(user=cls.business)
+        cls.customer = User.objects.create_user(username='customer', password='asdasd')
+        CustomerProfile.objects.create(user=cls.customer)
+        cls.customer_token = Token.objects.create(user=cls.customer)
+        cls.offer = Offer.objects.create(user=cls.business, title='Logo Design', description='Description')
+        cls.details = {}
+        for offer_type, price, delivery_time in [('basic', 100, 7), ('standard', 200, 5), ('premium', 300, 3)]:
+            cls.details[offer_type] = OfferDetail.objects.create(
+                offer=cls.offer, title=offer_type, revisions=2, delivery_time_in_days=delivery_time,
+                price=price, features=['Logo'], offer_type=offer_type
+            )
+
+    def setUp(self):
+        get_token_cache().clear()
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+
+class OrderSnapshotTests(OrderTestCase):
+    """
+    Ensures that orders keep the offer terms of the time of ordering and are listed from the order table only.
+    """
+
+    def test_create_copies_offer_terms(self):
+        self.authenticate(self.customer_token)
+        response = self.client.post('/api/orders/', {'offer_detail_id': self.details['standard'].pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['business_user'], self.business.pk)
+        self.assertEqual(response.data['title'], 'Logo Design')
+        self.assertEqual(response.data['offer_type'], 'standard')
+        self.assertEqual(response.data['delivery_time_in_days'], 5)
+        self.assertEqual(response.data['features'], ['Logo'])
+        # The price is serialized as a number, as before the snapshot
+        self.assertEqual(response.json()['price'], 200)
+
+    def test_order_keeps_terms_after_offer_change(self):
+        order = Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'])
+        OfferDetail.objects.filter(pk=self.details['basic'].pk).update(price=999, delivery_time_in_days=1)
+        Offer.objects.filter(pk=self.offer.pk).update(title='Changed')
+        order.refresh_from_db()
+        self.assertEqual(order.price, 100)
+        self.assertEqual(order.delivery_time_in_days, 7)
+        self.assertEqual(order.title, 'Logo Design')
+
+    def test_list_reads_order_table_only(self):
+        for detail in self.details.values():
+            Order.objects.create(customer_user=self.customer, offer_details=detail)
+        self.authenticate(self.business_token)
+        # Token with profile flags, conditional validators and orders
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/orders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class OrderCountTests(OrderTestCase):
+    """
+    Ensures that the materialized order counters follow order creation, status changes and deletion.
+    """
+
+    def get_counts(self):
+        counter = OrderCount.objects.get(business_user=self.business)
+        return counter.in_progress, counter.completed, counter.cancelled
+
+    def test_counters_follow_order_changes(self):
+        order = Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'])
+        Order.objects.create(customer_user=self.customer, offer_details=self.details['premium'])
+        self.assertEqual(self.get_counts(), (2, 0, 0))
+
+        self.authenticate(self.business_token)
+        response = self.client.patch(f'/api/orders/{order.pk}/', {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_counts(), (1, 1, 0))
+
+        Order.objects.get(pk=order.pk).delete()
+        self.assertEqual(self.get_counts(), (1, 0, 0))
+
+    def test_count_endpoints_read_counters(self):
+        Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'], status='completed')
+        Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'])
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/order-count/{self.business.pk}/')
+        self.assertEqual(response.data, {'order_count': 1})
+        response = self.client.get(f'/api/completed-order-count/{self.business.pk}/')
+        self.assertEqual(response.data, {'completed_order_count': 1})
+        response = self.client.get(f'/api/order-count/{self.customer.pk}/')
+        self.assertEqual(response.data, {'order_count': 0})
+        response = self.client.get('/api/order-count/999/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_batch_endpoint(self):
+        Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'])
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/order-counts/?ids={self.business.pk},{self.customer.pk},999')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [
+            {'business_user': self.business.pk, 'order_count': 1, 'completed_order_count': 0},
+            {'business_user': self.customer.pk, 'order_count': 0, 'completed_order_count': 0},
+        ])
+        self.assertEqual(self.client.get('/api/order-counts/?ids=a').status_code, 400)
+
+    def test_reconcile_command(self):
+        Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'])
+        Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'], status='cancelled')
+        OrderCount.objects.update(in_progress=5, cancelled=0)
+        call_command('reconcile_order_counts', stdout=StringIO())
+        self.assertEqual(self.get_counts(), (1, 0, 1))
+
+
+class OrderListTests(OrderTestCase):
+    """
+    Ensures that the order list is scoped by role, filterable and walkable with the keyset pagination.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        statuses = ['in_progress', 'completed', 'cancelled']
+        cls.orders = [
+            Order.objects.create(customer_user=cls.customer, offer_details=cls.details['basic'], status=statuses[index % 3])
+            for index in range(7)
+        ]
+
+    def test_filters_by_status_and_date(self):
+        self.authenticate(self.business_token)
+        response = self.client.get('/api/orders/?status=completed')
+        self.assertEqual([order['id'] for order in response.data['results']], [self.orders[4].pk, self.orders[1].pk])
+        created_at = self.orders[3].created_at.isoformat()
+        response = self.client.get('/api/orders/', {'created_after': created_at})
+        self.assertEqual([order['id'] for order in response.data['results']], [order.pk for order in reversed(self.orders[3:])])
+
+    def test_cursor_pagination_walks_all_orders(self):
+        self.authenticate(self.customer_token)
+        url = '/api/orders/?page_size=3'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [order['id'] for order in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, [order.pk for order in reversed(self.orders)])
+
+    def get_list_plan(self, url):
+        """
+        Returns the query plan of the page query the order list executed for the url.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        sql = next(query['sql'] for query in queries if 'LIMIT' in query['sql'] and 'freelancer_platform_app_order' in query['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return ' '.join(str(row[-1]) for row in cursor.fetchall())
+
+    def test_role_scoping_uses_index(self):
+        self.authenticate(self.business_token)
+        plan = self.get_list_plan('/api/orders/')
+        self.assertIn('order_business_created_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        plan = self.get_list_plan('/api/orders/?status=completed')
+        self.assertIn('order_business_status_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+        response = self.client.get('/api/orders/?role=customer')
+        self.assertEqual(response.data['results'], [])
+
+
+class OrderBulkStatusTests(OrderTestCase):
+    """
+    Ensures that bulk status transitions only move owned orders in the expected status and keep the counters in sync.
+    """
+
+    def test_transition_reports_outcome_per_order(self):
+        other_business = User.objects.create_user(username='other', password='asdasd')
+        other_offer = Offer.objects.create(user=other_business, title='Other', description='Description')
+        other_detail = OfferDetail.objects.create(
+            offer=other_offer, title='basic', delivery_time_in_days=1, price=10, features=[], offer_type='basic'
+        )
+        open_order = Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'])
+        done_order = Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'], status='completed')
+        foreign_order = Order.objects.create(customer_user=self.customer, offer_details=other_detail)
+
+        self.authenticate(self.business_token)
+        data = {'ids': [open_order.pk, done_order.pk, foreign_order.pk, 999], 'from_status': 'in_progress', 'to_status': 'completed'}
+        response = self.client.post('/api/orders/bulk-status/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['results'], [
+            {'id': open_order.pk, 'status': 'updated'},
+            {'id': done_order.pk, 'status': 'conflict', 'current_status': 'completed'},
+            {'id': foreign_order.pk, 'status': 'not_found'},
+            {'id': 999, 'status': 'not_found'},
+        ])
+        open_order.refresh_from_db()
+        foreign_order.refresh_from_db()
+        self.assertEqual(open_order.status, 'completed')
+        self.assertEqual(foreign_order.status, 'in_progress')
+        counter = OrderCount.objects.get(business_user=self.business)
+        self.assertEqual((counter.in_progress, counter.completed), (0, 2))
+
+    def test_transition_reports_only_its_own_rows(self):
+        now = timezone.now()
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            open_order = Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'])
+            done_order = Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'], status='completed')
+            updated = Order.objects.transition_status([open_order.pk, done_order.pk], 'in_progress', 'completed')
+        self.assertEqual(updated, [open_order.pk])
+        counter = OrderCount.objects.get(business_user=self.business)
+        self.assertEqual((counter.in_progress, counter.completed), (0, 2))
+
+    def test_transition_is_repeated_after_concurrent_change(self):
+        first = Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'])
+        second = Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'])
+        update = models.QuerySet.update
+        calls = []
+
+        def update_concurrently(queryset, **kwargs):
+            if queryset.model is Order:
+                if not calls:
+                    # Another request cancels an order between the select and the transition's UPDATE
+                    update(Order.objects.filter(pk=second.pk), status='cancelled')
+                calls.append(queryset.count())
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(models.QuerySet, 'update', autospec=True, side_effect=update_concurrently):
+            updated = Order.objects.transition_status([first.pk, second.pk], 'in_progress', 'completed')
+        # The first UPDATE only matched one of the two candidates and was rolled back with the concurrent change
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(updated, [first.pk, second.pk])
+        counter = OrderCount.objects.get(business_user=self.business)
+        self.assertEqual((counter.in_progress, counter.completed, counter.cancelled), (0, 2, 0))
+
+    def test_transition_is_restricted_and_validated(self):
+        self.authenticate(self.customer_token)
+        data = {'ids': [1], 'from_status': 'in_progress', 'to_status': 'completed'}
+        self.assertEqual(self.client.post('/api/orders/bulk-status/', data, format='json').status_code, 403)
+        self.authenticate(self.business_token)
+        data['to_status'] = 'in_progress'
+        self.assertEqual(self.client.post('/api/orders/bulk-status/', data, format='json').status_code, 400)
+
+
+@override_settings(EVENT_STREAM={'HEARTBEAT': 0.05})
+class OrderEventStreamTests(OrderTestCase):
+    """
+    Ensures that order changes are published to the involved users and streamed as server-sent events.
+    """
+
+    def test_order_changes_are_published_to_involved_users(self):
+        broadcaster = get_broadcaster()
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(customer_user=self.customer, offer_details=self.details['basic'])
+        created = broadcaster.buffer[-1]
+        self.assertEqual((created.name, created.data['id']), ('order.created', order.pk))
+        self.assertEqual(created.user_ids, {self.customer.pk, self.business.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'completed'
+            order.save()
+        changed = broadcaster.buffer[-1]
+        self.assertEqual(changed.name, 'order.status_changed')
+        self.assertEqual((changed.data['previous_status'], changed.data['status']), ('in_progress', 'completed'))
+
+    async def test_stream_requires_token(self):
+        response = await self.async_client.get('/api/orders/events/')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(f'/api/orders/events/?token={self.business_token.key}')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get('/api/orders/events/?ticket=invalid')
+        self.assertEqual(response.status_code, 401)
+
+    def test_ticket_opens_only_the_stream(self):
+        response = self.client.post('/api/orders/events/ticket/')
+        self.assertEqual(response.status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.business_token.key}')
+        response = self.client.post('/api/orders/events/ticket/')
+        self.assertEqual(response.status_code, 201)
+        ticket = response.data['ticket']
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {ticket}')
+        self.assertEqual(self.client.get('/api/orders/').status_code, 401)
+        self.client.credentials()
+        with override_settings(EVENT_STREAM={'TICKET_MAX_AGE': -1}):
+            response = self.client.get(f'/api/orders/events/?ticket={ticket}')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_accepts_ticket(self):
+        response = await self.async_client.get(f'/api/orders/events/?ticket={create_stream_ticket(self.business.pk)}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        await chunks.aclose()
+
+    async def test_stream_delivers_events_and_heartbeats(self):
+        response = await self.async_client.get('/api/orders/events/', headers={'Authorization': f'Token {self.business_token.key}'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        self.assertEqual(await anext(chunks), b': heartbeat\n\n')
+        event = get_broadcaster().publish([self.business.pk], 'order.created', {'id': 1})
+        self.assertEqual(await anext(chunks), event.encode().encode())
+        await chunks.aclose()
+
+    async def test_stream_resumes_after_last_event_id(self):
+        broadcaster = get_broadcaster()
+        first = broadcaster.publish([self.business.pk], 'order.created', {'id': 1})
+        broadcaster.publish([self.customer.pk], 'order.created', {'id': 2})
+        missed = broadcaster.publish([self.business.pk], 'order.status_changed', {'id': 1})
+        response = await self.async_client.get(
+            '/api/orders/events/', headers={'Authorization': f'Token {self.business_token.key}', 'Last-Event-ID': first.id}
+        )
+        chunks = aiter(response.streaming_content)
+        await anext(chunks)
+        self.assertEqual(await anext(chunks), missed.encode().encode())
+        await chunks.aclose()
+
+        response = await self.async_client.get(
+            '/api/orders/events/', headers={'Authorization': f'Token {self.business_token.key}', 'Last-Event-ID': 'unknown-1'}
+        )
+        chunks = aiter(response.streaming_content)
+        await anext(chunks)
+        self.assertTrue((await anext(chunks)).startswith(b'event: reset'))
+        await chunks.aclose()
@@ -0,0 +1,152 @@
+import base64
+import json
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from auth_app.models import BusinessProfile, CustomerProfile
+from coderr_project.authentication import get_token_cache
+from coderr_project.cache import get_cache
+from ..models import RatingAggregate, Review
+from ..statistics import SNAPSHOT_KEY
+
+
+class RatingAggregateTests(APITestCase):
+    """
+    Ensures that the rating aggregates follow review creation, updates and deletion
+    and are used by the statistics and business profile endpoints.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = User.objects.create_user(username='business', password='asdasd')
+        BusinessProfile.objects.create(user=cls.business)
+        cls.customers = []
+        for index in range(3):
+            customer = User.objects.create_user(username=f'customer{index}', password='asdasd')
+            CustomerProfile.objects.create(user=customer)
+            Token.objects.create(user=customer)
+            cls.customers.append(customer)
+
+    def setUp(self):
+        get_cache().delete(SNAPSHOT_KEY)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {user.auth_token.key}')
+
+    def get_aggregate(self):
+        aggregate = RatingAggregate.objects.get(business_user=self.business)
+        return aggregate.review_count, aggregate.rating_sum, aggregate.histogram
+
+    def test_aggregate_follows_review_changes(self):
+        self.authenticate(self.customers[0])
+        response = self.client.post('/api/reviews/', {'business_user': self.business.pk, 'rating': 4, 'description': 'Good'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        Review.objects.create(business_user=self.business, reviewer=self.customers[1], rating=2, description='Okay')
+        self.assertEqual(self.get_aggregate(), (2, 6, {'1': 0, '2': 1, '3': 0, '4': 1, '5': 0}))
+
+        response = self.client.patch(f'/api/reviews/{response.data["id"]}/', {'rating': 5}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_aggregate(), (2, 7, {'1': 0, '2': 1, '3': 0, '4': 0, '5': 1}))
+
+        Review.objects.get(reviewer=self.customers[1]).delete()
+        self.assertEqual(self.get_aggregate(), (1, 5, {'1': 0, '2': 0, '3': 0, '4': 0, '5': 1}))
+
+    def test_rating_is_validated(self):
+        self.authenticate(self.customers[0])
+        response = self.client.post('/api/reviews/', {'business_user': self.business.pk, 'rating': 6, 'description': 'Good'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_endpoints_read_aggregates(self):
+        for customer, rating in zip(self.customers, [5, 4, 4]):
+            Review.objects.create(business_user=self.business, reviewer=customer, rating=rating, description='Review')
+        response = self.client.get('/api/base-info/')
+        self.assertEqual((response.data['review_count'], response.data['average_rating']), (3, 4.3))
+
+        self.authenticate(self.customers[0])
+        response = self.client.get('/api/profiles/business/')
+        self.assertEqual(response.data['results'][0]['rating']['review_count'], 3)
+        response = self.client.get(f'/api/profile/{self.business.pk}/')
+        self.assertEqual(response.data['rating']['histogram']['4'], 2)
+
+        etag = response['ETag']
+        Review.objects.filter(reviewer=self.customers[0]).get().delete()
+        response = self.client.get(f'/api/profile/{self.business.pk}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rating']['average_rating'], 4.0)
+
+    def test_rebuild_command(self):
+        Review.objects.create(business_user=self.business, reviewer=self.customers[0], rating=3, description='Review')
+        RatingAggregate.objects.update(review_count=10, rating_sum=0, rating_3=0)
+        call_command('rebuild_rating_aggregates', stdout=StringIO())
+        self.assertEqual(self.get_aggregate(), (1, 3, {'1': 0, '2': 0, '3': 1, '4': 0, '5': 0}))
+
+
+class ReviewListTests(APITestCase):
+    """
+    Ensures that the review feed is walkable with the keyset pagination and embeds the reviewers without extra queries.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = User.objects.create_user(username='business', password='asdasd')
+        BusinessProfile.objects.create(user=cls.business)
+        cls.reviews = []
+        for index in range(7):
+            customer = User.objects.create_user(username=f'customer{index}', password='asdasd', first_name=f'Name {index}')
+            CustomerProfile.objects.create(user=customer)
+            cls.reviews.append(Review.objects.create(business_user=cls.business, reviewer=customer, rating=index % 5 + 1, description='Review'))
+        cls.token = Token.objects.create(user=customer)
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_cursor_pagination_by_rating(self):
+        url = f'/api/reviews/?page_size=3&ordering=-rating&business_user_id={self.business.pk}'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [(review['rating'], review['id']) for review in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, sorted(((review.rating, review.pk) for review in self.reviews), reverse=True))
+
+    def test_list_embeds_reviewer_details(self):
+        # Token with profile flags, conditional validators, reviewer details and a page of reviews with their reviewers
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/reviews/?business_user_id={self.business.pk}')
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertEqual(response.data['results'][-1]['reviewer_details']['first_name'], 'Name 0')
+
+    def test_reviewer_changes_change_validators(self):
+        url = f'/api/reviews/?business_user_id={self.business.pk}'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        User.objects.filter(pk=self.reviews[0].reviewer_id).update(first_name='Changed')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][-1]['reviewer_details']['first_name'], 'Changed')
+
+    def test_tampered_cursor_of_integer_ordering(self):
+        cursor = base64.urlsafe_b64encode(json.dumps({'v': 'abc', 'id': 1, 'r': False}).encode()).decode()
+        response = self.client.get('/api/reviews/', {'ordering': 'rating', 'cursor': cursor})
+        self.assertEqual(response.status_code, 404)
+
+    def test_list_is_paginated_by_default(self):
+        response = self.client.get('/api/reviews/', {'page_size': 5})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_business_filter_uses_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(f'/api/reviews/?business_user_id={self.business.pk}')
+        sql = next(query['sql'] for query in queries if 'LIMIT' in query['sql'] and 'freelancer_platform_app_review' in query['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('review_business_updated_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
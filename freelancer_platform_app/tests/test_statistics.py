@@ -0,0 +1,58 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from rest_framework.test import APITestCase
+from auth_app.models import BusinessProfile
+from coderr_project.cache import get_cache
+from ..models import Offer
+from ..statistics import SNAPSHOT_KEY, LOCK_KEY
+
+
+class BaseInfoSnapshotTests(APITestCase):
+    """
+    Ensures that the platform statistics are served from a snapshot which is recomputed in the background once stale.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.business = User.objects.create_user(username='business', password='asdasd')
+        BusinessProfile.objects.create(user=cls.business)
+        Offer.objects.create(user=cls.business, title='Offer', description='Description')
+
+    def setUp(self):
+        get_cache().delete_many([SNAPSHOT_KEY, LOCK_KEY])
+
+    def test_first_request_computes_snapshot_with_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/base-info/')
+        self.assertEqual(response.data, {'review_count': 0, 'average_rating': 0.0, 'business_profile_count': 1, 'offer_count': 1})
+        self.assertEqual(response['Age'], '0')
+
+    def test_fresh_snapshot_is_served_without_queries(self):
+        self.client.get('/api/base-info/')
+        Offer.objects.create(user=self.business, title='Offer', description='Description')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/base-info/')
+        self.assertEqual(response.data['offer_count'], 1)
+
+    def test_stale_snapshot_is_served_and_recomputed_in_background(self):
+        self.client.get('/api/base-info/')
+        Offer.objects.create(user=self.business, title='Offer', description='Description')
+        snapshot = get_cache().get(SNAPSHOT_KEY)
+        snapshot['computed_at'] -= 120
+        get_cache().set(SNAPSHOT_KEY, snapshot, timeout=None)
+
+        with mock.patch('freelancer_platform_app.statistics.get_executor') as get_executor:
+            response = self.client.get('/api/base-info/')
+            self.assertEqual(response.data['offer_count'], 1)
+            self.assertGreaterEqual(int(response['Age']), 120)
+            get_executor.return_value.submit.assert_called_once()
+            # A second stale request doesn't start another recompute
+            self.client.get('/api/base-info/')
+            get_executor.return_value.submit.assert_called_once()
+
+        # Runs the scheduled recompute in this thread, as the test data isn't committed
+        refresh = get_executor.return_value.submit.call_args.args[0]
+        with mock.patch('freelancer_platform_app.statistics.connections'):
+            refresh()
+        response = self.client.get('/api/base-info/')
+        self.assertEqual((response.data['offer_count'], response['Age']), (2, '0'))